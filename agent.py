@@ -1,12 +1,23 @@
 import socketio
 import sys
+import os
 import time
+import json
+import zlib
+import argparse
+import threading
 
 # Create a Socket.IO client instance
 sio = socketio.Client()
 
 SERVER_URL = 'http://127.0.0.1:5001'
 
+# Batch wire format version, bumped on incompatible changes
+PROTOCOL_VERSION = 1
+# Per-interface counters, in psutil.net_io_counters() field order
+COUNTER_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+                  'errin', 'errout', 'dropin', 'dropout')
+
 @sio.event
 def connect():
     print(f"✅ Connected to server at {SERVER_URL}")
@@ -15,14 +26,285 @@ def connect():
 def disconnect():
     print("❌ Disconnected from server")
 
-def main():
+
+class MetricAggregator:
+    """
+    Turns periodic interface counter samples into per-window totals.
+
+    Each sample is diffed against the previous one; the window keeps the summed
+    deltas plus the peak send/receive rate seen between two samples, so the
+    server gets both volume and burstiness without receiving every sample.
+    """
+
+    def __init__(self, interfaces=None):
+        self.interfaces = set(interfaces) if interfaces else None
+        self._last = None
+        self._window_start = None
+        self._samples = 0
+        self._totals = {}
+
+    def sample(self, counters, now):
+        """Add a {interface: counters} sample taken at `now` (seconds)."""
+        if self._last is not None:
+            last_time, last_counters = self._last
+            elapsed = now - last_time
+            if elapsed > 0:
+                for name, values in counters.items():
+                    previous = last_counters.get(name)
+                    if previous is None or (self.interfaces and name not in self.interfaces):
+                        continue
+                    # Counters that went backwards were reset (driver reload, wrap)
+                    deltas = [max(int(current) - int(old), 0)
+                              for current, old in zip(values, previous)]
+                    totals = self._totals.setdefault(name, [0] * len(COUNTER_FIELDS) + [0.0, 0.0])
+                    for index, delta in enumerate(deltas):
+                        totals[index] += delta
+                    totals[-2] = max(totals[-2], deltas[0] / elapsed)
+                    totals[-1] = max(totals[-1], deltas[1] / elapsed)
+                self._samples += 1
+        if self._window_start is None:
+            self._window_start = now
+        self._last = (now, {name: tuple(values) for name, values in counters.items()})
+
+    def drain(self, now):
+        """Return the aggregated window ending at `now` and start a new one."""
+        if self._window_start is None or self._samples == 0:
+            return None
+        window = {
+            'start': self._window_start,
+            'end': now,
+            'samples': self._samples,
+            'interfaces': {
+                name: dict(zip(COUNTER_FIELDS + ('peak_sent_rate', 'peak_recv_rate'), totals))
+                for name, totals in self._totals.items()
+            }
+        }
+        self._window_start = now
+        self._samples = 0
+        self._totals = {}
+        return window
+
+
+def encode_batch(batch):
+    """Serialize a batch as zlib-compressed JSON."""
+    return zlib.compress(json.dumps(batch, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_batch(payload):
+    """Inverse of encode_batch."""
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+class Spool:
+    """
+    Bounded on-disk queue of encoded batches, one file per sequence number.
+
+    Every batch is spooled before it is sent and removed once the server
+    acknowledges it, so batches produced while disconnected (or while the agent
+    was restarted) are replayed in order. When more than `max_batches` are
+    pending the oldest are dropped; the server sees the gap in `seq`.
+    The last sequence number is persisted so it keeps increasing across restarts.
+    """
+
+    SUFFIX = '.batch'
+
+    def __init__(self, directory, max_batches=1000):
+        self.directory = directory
+        self.max_batches = max(1, int(max_batches))
+        self.dropped = 0
+        os.makedirs(directory, exist_ok=True)
+        self._seq_path = os.path.join(directory, 'seq')
+        pending = self.pending()
+        self._seq = pending[-1] if pending else 0
+        try:
+            with open(self._seq_path, encoding='utf-8') as f:
+                self._seq = max(self._seq, int(f.read().strip() or 0))
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def _path(self, seq):
+        return os.path.join(self.directory, f'{seq:012d}{self.SUFFIX}')
+
+    def _write(self, path, data):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def next_seq(self):
+        """Allocate and persist the next sequence number."""
+        self._seq += 1
+        self._write(self._seq_path, str(self._seq).encode())
+        return self._seq
+
+    def append(self, seq, data):
+        """Spool an encoded batch, dropping the oldest ones beyond the bound."""
+        self._write(self._path(seq), data)
+        pending = self.pending()
+        for old_seq in pending[:max(len(pending) - self.max_batches, 0)]:
+            self.remove(old_seq)
+            self.dropped += 1
+
+    def pending(self):
+        """Sequence numbers waiting to be delivered, oldest first."""
+        return sorted(int(name[:-len(self.SUFFIX)]) for name in os.listdir(self.directory)
+                      if name.endswith(self.SUFFIX) and name[:-len(self.SUFFIX)].isdigit())
+
+    def read(self, seq):
+        with open(self._path(seq), 'rb') as f:
+            return f.read()
+
+    def remove(self, seq):
+        try:
+            os.remove(self._path(seq))
+        except FileNotFoundError:
+            pass
+
+
+class HeadlessAgent:
+    """
+    Samples local interface counters and pushes compressed batches to the server.
+
+    The sampling loop runs in the caller's thread; delivery runs in a separate
+    thread so a slow or unreachable server never delays sampling. Each batch is
+    sent as an `agent_metrics` event and is only removed from the spool after
+    the server acknowledges it (at-least-once; the server de-duplicates by seq).
+    """
+
+    def __init__(self, client, host_id, host_name, spool, sample_interval=1.0,
+                 batch_interval=10.0, ack_timeout=10.0, interfaces=None, read_counters=None):
+        self.client = client
+        self.host_id = str(host_id)
+        self.host_name = host_name
+        self.spool = spool
+        self.sample_interval = sample_interval
+        self.batch_interval = batch_interval
+        self.ack_timeout = ack_timeout
+        self.aggregator = MetricAggregator(interfaces)
+        self.read_counters = read_counters or _read_psutil_counters
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+    def build_batch(self, now):
+        """Drain the current window into a spooled batch; returns its seq or None."""
+        window = self.aggregator.drain(now)
+        if window is None:
+            return None
+        seq = self.spool.next_seq()
+        batch = dict(window, v=PROTOCOL_VERSION, host_id=self.host_id,
+                     host_name=self.host_name, seq=seq, spool_dropped=self.spool.dropped)
+        self.spool.append(seq, encode_batch(batch))
+        self._wakeup.set()
+        return seq
+
+    def flush_spool(self):
+        """Send spooled batches in order until one is not acknowledged."""
+        sent = 0
+        for seq in self.spool.pending():
+            if not self.client.connected:
+                break
+            try:
+                payload = self.spool.read(seq)
+            except FileNotFoundError:
+                continue
+            try:
+                ack = self.client.call('agent_metrics', {
+                    'v': PROTOCOL_VERSION, 'host_id': self.host_id, 'seq': seq,
+                    'encoding': 'zlib+json', 'payload': payload
+                }, timeout=self.ack_timeout)
+            except socketio.exceptions.SocketIOError:
+                break
+            if not isinstance(ack, dict):
+                break
+            if not ack.get('ok'):
+                # Rejected batches would be rejected again on every replay
+                print(f"Server rejected batch {seq}: {ack.get('error')}")
+            self.spool.remove(seq)
+            sent += 1
+        return sent
+
+    def _sender(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.batch_interval)
+            self._wakeup.clear()
+            self.flush_spool()
+
+    def wake(self):
+        """Trigger an immediate replay (e.g. after reconnecting)."""
+        self._wakeup.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def run(self):
+        sender = threading.Thread(target=self._sender, name='agent-sender', daemon=True)
+        sender.start()
+        next_sample = time.monotonic()
+        next_batch = next_sample + self.batch_interval
+        while not self._stop.is_set():
+            now = time.monotonic()
+            self.aggregator.sample(self.read_counters(), time.time())
+            if now >= next_batch:
+                self.build_batch(time.time())
+                next_batch += self.batch_interval
+            next_sample += self.sample_interval
+            self._stop.wait(max(next_sample - time.monotonic(), 0))
+        self.build_batch(time.time())
+        self.flush_spool()
+
+
+def _read_psutil_counters():
+    import psutil
+    return {name: tuple(counters) for name, counters in psutil.net_io_counters(pernic=True).items()}
+
+
+def headless(args):
+    spool = Spool(args.spool_dir, max_batches=args.spool_max_batches)
+    agent = HeadlessAgent(sio, args.client_id, args.client_name or args.client_id, spool,
+                          sample_interval=args.sample_interval, batch_interval=args.batch_interval,
+                          interfaces=args.interface)
+    # Replay anything spooled while we were disconnected
+    sio.on('connect', lambda: (print(f"✅ Connected to server at {SERVER_URL}"), agent.wake()))
+    # The server only accepts metrics from authenticated agent connections
+    auth = {'host_id': agent.host_id}
+    if args.token:
+        auth['agent_token'] = args.token
+
+    def connect_forever():
+        delay = 1
+        while True:
+            try:
+                sio.connect(SERVER_URL, auth=auth)
+                return
+            except socketio.exceptions.ConnectionError as e:
+                print(f"Connection failed: {e}, retrying in {delay}s")
+                time.sleep(delay)
+                delay = min(delay * 2, 60)
+
+    # The client reconnects by itself once the first connection succeeded
+    threading.Thread(target=connect_forever, name='agent-connect', daemon=True).start()
+    print(f"Headless agent {agent.host_id}: sampling every {args.sample_interval}s, "
+          f"pushing every {args.batch_interval}s, spool {args.spool_dir}")
+    try:
+        agent.run()
+    except KeyboardInterrupt:
+        agent.stop()
+    finally:
+        if sio.connected:
+            sio.disconnect()
+
+
+def interactive():
     print("Distributed Host Monitoring - Client Agent")
     print("------------------------------------------")
-    
+
     # Get client info
     client_id = input("Enter Client ID (match with XML): ")
     client_name = input("Enter Client Name: ")
-    
+
     try:
         sio.connect(SERVER_URL)
     except Exception as e:
@@ -36,15 +318,15 @@ def main():
         print("3. IE Start")
         print("4. IE Close")
         print("q. Quit")
-        
+
         choice = input("Choice: ")
-        
+
         if choice == 'q':
             break
-        
+
         event_type = ""
         msg = ""
-        
+
         if choice == '1':
             event_type = "System Start"
             msg = f"Host {client_name} ({client_id}) System Started"
@@ -60,7 +342,7 @@ def main():
         else:
             print("Invalid choice")
             continue
-            
+
         payload = {
             'client_id': client_id,
             'client_name': client_name,
@@ -68,12 +350,38 @@ def main():
             'msg': msg,
             'timestamp': time.time()
         }
-        
+
         sio.emit('client_event', payload)
         print(f"Sent: {msg}")
 
     sio.disconnect()
 
+def main():
+    global SERVER_URL
+    parser = argparse.ArgumentParser(description='Distributed Host Monitoring - Client Agent')
+    parser.add_argument('--server', default=SERVER_URL)
+    parser.add_argument('--headless', action='store_true',
+                        help='collect interface metrics and push batches instead of the interactive menu')
+    parser.add_argument('--client-id', help='client ID (match with XML), required with --headless')
+    parser.add_argument('--client-name')
+    parser.add_argument('--token', default=os.environ.get('NETMON_AGENT_TOKEN'),
+                        help="this host's entry in the server's AGENT_TOKENS (default: $NETMON_AGENT_TOKEN)")
+    parser.add_argument('--sample-interval', type=float, default=1.0)
+    parser.add_argument('--batch-interval', type=float, default=10.0)
+    parser.add_argument('--interface', action='append', help='only report this interface (repeatable)')
+    parser.add_argument('--spool-dir', default=os.path.join(os.path.expanduser('~'), '.netmon-agent', 'spool'))
+    parser.add_argument('--spool-max-batches', type=int, default=8640,
+                        help='batches kept while disconnected (default: 24h at 10s batches)')
+    args = parser.parse_args()
+    SERVER_URL = args.server
+
+    if not args.headless:
+        interactive()
+        return
+    if not args.client_id:
+        parser.error('--client-id is required with --headless')
+    headless(args)
+
 if __name__ == '__main__':
     try:
         main()
@@ -2,6 +2,8 @@
 应用入口模块
 负责创建Flask应用，初始化扩展，注册蓝图，并启动应用。
 """
+import os
+
 from flask import Flask
 from flask_migrate import Migrate
 
@@ -14,8 +16,10 @@ from routes.history import history_bp
 from routes.thresholds import thresholds_bp
 from routes.alerts import alerts_bp
 from routes.client_management import client_bp
+from routes.flows import flows_bp
 from routes import monitoring  # 导入 WebSocket 事件处理
-from services.traffic_monitor import monitor_traffic_task
+from services.leader_election import ensure_monitoring_tasks
+from services.message_queue import message_queue_options
 
 def create_app(config_name='default'):
     """
@@ -37,7 +41,8 @@ def create_app(config_name='default'):
     socketio.init_app(
         app,
         cors_allowed_origins=app.config['CORS_ORIGINS'],
-        async_mode=app.config['SOCKETIO_ASYNC_MODE']
+        async_mode=app.config['SOCKETIO_ASYNC_MODE'],
+        **message_queue_options(app.config)
     )
     db.init_app(app)
     jwt.init_app(app)
@@ -50,6 +55,7 @@ def create_app(config_name='default'):
     app.register_blueprint(thresholds_bp, url_prefix='/api/thresholds')
     app.register_blueprint(alerts_bp, url_prefix='/api/alerts')
     app.register_blueprint(client_bp, url_prefix='/api/clients')
+    app.register_blueprint(flows_bp, url_prefix='/api/flows')
 
     with app.app_context():
         # 确保 monitoring 模块被加载
@@ -72,7 +78,10 @@ def create_app(config_name='default'):
 if __name__ == '__main__':
     created_app = create_app('development')
 
-    socketio.start_background_task(target=monitor_traffic_task, app=created_app)
+    # 与 serve.py 相同: 启动流量监控和抓包任务(配置消息队列时先参与选举)，
+    # 并记录已启动，客户端连接时不会再启动第二份。调试模式下只在重载器的子进程中启动
+    if not created_app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        ensure_monitoring_tasks(created_app)
 
     print("=" * 60)
     print("🚀 启动网络监控服务器")
@@ -0,0 +1,357 @@
+"""
+Agent 集群负载测试
+在子进程中启动真实的应用(临时 SQLite 数据库，不运行本机流量监控和抓包)，
+用 asyncio 模拟 N 个 Agent 按指定频率推送 agent_metrics 批次(可选附带 client_event 事件)，
+以及 M 个订阅 traffic_data 广播的仪表盘，统计:
+
+- 接收吞吐量: 服务器确认的批次数/秒、接口采样数/秒
+- 批次确认延迟(Agent 发出到收到确认)和广播延迟(服务器发出到仪表盘收到)的分位数
+- 服务器进程的 CPU 占用和内存(RSS)
+
+结果写入 JSON 报告，便于在不同构建之间比较。
+
+用法:
+    python benchmarks/bench_agent_fleet.py --agents 500 --dashboards 100 --output fleet.json
+    python benchmarks/bench_agent_fleet.py --modes eventlet threading --batch-interval 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+import psutil
+
+from bench_socketio_broadcast import HOST, DashboardClient, percentile, wait_for_port
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+
+
+# ---------------------------------------------------------------- 服务器端
+
+def agent_token(host_id):
+    """模拟 Agent 的认证令牌"""
+    return f'bench-{host_id}'
+
+
+def serve(mode, port, db_path, broadcast_interval, agents):
+    """应用服务器(在子进程中运行)"""
+    # pylint: disable=import-outside-toplevel
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+    Config.SOCKETIO_ASYNC_MODE = mode
+    Config.SOCKETIO_MESSAGE_QUEUE = None
+    Config.AGENT_TOKENS = {f'sim-{index}': agent_token(f'sim-{index}') for index in range(agents)}
+    import routes.monitoring
+    # 只测量 Agent 接收和推送路径，不采集本机流量、不抓包
+    routes.monitoring.ensure_monitoring_tasks = lambda app: None
+    from app import create_app
+    from extensions import db, socketio
+
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+
+    def broadcast():
+        rates = [{'interface': f'eth{i}', 'bytes_sent_sec': 1000.0, 'bytes_recv_sec': 2000.0}
+                 for i in range(4)]
+        while True:
+            socketio.sleep(broadcast_interval)
+            socketio.emit('traffic_data', {'rates': rates, 'sent_at': time.time()})
+
+    if broadcast_interval > 0:
+        socketio.start_background_task(broadcast)
+    options = {'allow_unsafe_werkzeug': True} if mode == 'threading' else {}
+    socketio.run(app, host=HOST, port=port, log_output=False, **options)
+
+
+# ---------------------------------------------------------------- 客户端
+
+class SimulatedAgent(DashboardClient):
+    """模拟 agent.py --headless: 按固定间隔推送压缩批次并等待确认"""
+
+    def __init__(self, port, index, args, stats):
+        super().__init__(port, [])
+        self.host_id = f'sim-{index}'
+        self.args = args
+        self.stats = stats
+        self._pending = {}
+        self._next_ack = 0
+        self._seq = 0
+
+    def _batch_payload(self):
+        # pylint: disable=import-outside-toplevel
+        from agent import PROTOCOL_VERSION, encode_batch
+        self._seq += 1
+        now = time.time()
+        interfaces = {
+            f'eth{i}': {'bytes_sent': random.randint(0, 10 ** 7), 'bytes_recv': random.randint(0, 10 ** 7),
+                        'packets_sent': 1000, 'packets_recv': 1000, 'errin': 0, 'errout': 0,
+                        'dropin': 0, 'dropout': 0, 'peak_sent_rate': 10 ** 6, 'peak_recv_rate': 10 ** 6}
+            for i in range(self.args.interfaces)
+        }
+        batch = {'v': PROTOCOL_VERSION, 'host_id': self.host_id, 'host_name': self.host_id,
+                 'seq': self._seq, 'start': now - self.args.batch_interval, 'end': now,
+                 'samples': 10, 'spool_dropped': 0, 'interfaces': interfaces}
+        return encode_batch(batch)
+
+    def _send_batch(self):
+        payload = self._batch_payload()
+        ack_id = self._next_ack
+        self._next_ack += 1
+        header = {'v': 1, 'host_id': self.host_id, 'seq': self._seq, 'encoding': 'zlib+json',
+                  'payload': {'_placeholder': True, 'num': 0}}
+        # Socket.IO BINARY_EVENT: 文本帧之后紧跟一个二进制附件帧
+        self._send(f'451-{ack_id}' + json.dumps(['agent_metrics', header], separators=(',', ':')))
+        self._send(payload, opcode=0x2)
+        self._pending[ack_id] = time.perf_counter()
+        self.stats['batches_sent'] += 1
+        self.stats['bytes_sent'] += len(payload)
+
+    def _send_event(self):
+        event = {'client_id': self.host_id, 'client_name': self.host_id, 'type': 'IE Start',
+                 'msg': f'Host {self.host_id} IE Browser Started', 'timestamp': time.time()}
+        self._send('42' + json.dumps(['client_event', event], separators=(',', ':')))
+        self.stats['events_sent'] += 1
+
+    def _on_ack(self, text):
+        digits = len(text) - len(text[2:].lstrip('0123456789'))
+        sent = self._pending.pop(int(text[2:digits]), None)
+        if sent is None:
+            return
+        self.stats['ack_latencies'].append(time.perf_counter() - sent)
+        ack = json.loads(text[digits:])[0]
+        self.stats['batches_acked' if ack.get('ok') else 'batches_rejected'] += 1
+
+    async def _produce(self, stop):
+        await self.connected.wait()
+        # 错开各 Agent 的发送时间
+        await asyncio.sleep(random.uniform(0, self.args.batch_interval))
+        loop = asyncio.get_running_loop()
+        next_batch = next_event = loop.time()
+        while not stop.is_set():
+            now = loop.time()
+            if now >= next_batch:
+                self._send_batch()
+                next_batch += self.args.batch_interval
+            if self.args.event_interval and now >= next_event:
+                self._send_event()
+                next_event += self.args.event_interval
+            wakeups = [next_batch] + ([next_event] if self.args.event_interval else [])
+            await asyncio.sleep(max(min(wakeups) - loop.time(), 0))
+
+    async def run(self, stop):
+        """连接、推送批次并处理确认，直到 stop 被设置"""
+        await self._handshake()
+        producer = asyncio.ensure_future(self._produce(stop))
+        try:
+            while not stop.is_set():
+                opcode, payload = await self._recv()
+                if opcode == 0x8:
+                    return
+                if opcode != 0x1:
+                    continue
+                text = payload.decode()
+                if text.startswith('0'):
+                    auth = {'host_id': self.host_id, 'agent_token': agent_token(self.host_id)}
+                    self._send('40' + json.dumps(auth, separators=(',', ':')))
+                elif text.startswith('40'):
+                    self.connected.set()
+                elif text == '2':
+                    self._send('3')
+                elif text.startswith('43'):
+                    self._on_ack(text)
+        finally:
+            producer.cancel()
+            self.writer.close()
+
+
+async def sample_server(pid, stop, samples):
+    """每 0.5 秒记录一次服务器进程的 RSS"""
+    process = psutil.Process(pid)
+    while not stop.is_set():
+        samples.append(process.memory_info().rss)
+        await asyncio.sleep(0.5)
+
+
+def fetch_status(port):
+    """读取 /api/clients/status 的汇总，服务器过载无法及时应答时返回 None"""
+    try:
+        with urllib.request.urlopen(f'http://{HOST}:{port}/api/clients/status', timeout=30) as response:
+            return json.loads(response.read())['summary']
+    except OSError:
+        return None
+
+
+async def run_fleet(port, pid, args):
+    """建立连接，测量 duration 秒内的吞吐量、延迟和资源占用"""
+    stats = {'batches_sent': 0, 'batches_acked': 0, 'batches_rejected': 0, 'events_sent': 0,
+             'bytes_sent': 0, 'ack_latencies': []}
+    broadcast_latencies = []
+    stop = asyncio.Event()
+    limiter = asyncio.Semaphore(args.connect_concurrency)
+    agents = [SimulatedAgent(port, index, args, stats) for index in range(args.agents)]
+    dashboards = [DashboardClient(port, broadcast_latencies) for _ in range(args.dashboards)]
+
+    async def start(client):
+        async with limiter:
+            task = asyncio.ensure_future(client.run(stop))
+            try:
+                await asyncio.wait_for(client.connected.wait(), 30)
+            except asyncio.TimeoutError:
+                pass
+            return task
+
+    started = time.perf_counter()
+    tasks = await asyncio.gather(*(start(client) for client in agents + dashboards))
+    connect_seconds = time.perf_counter() - started
+
+    # 预热后清零，只统计稳定阶段
+    await asyncio.sleep(args.warmup)
+    for key, value in stats.items():
+        stats[key] = [] if isinstance(value, list) else 0
+    broadcast_latencies.clear()
+    process = psutil.Process(pid)
+    cpu_before = process.cpu_times()
+    rss_samples = []
+    sampler = asyncio.ensure_future(sample_server(pid, stop, rss_samples))
+    measured = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    elapsed = time.perf_counter() - measured
+    cpu_after = process.cpu_times()
+    status = await asyncio.get_running_loop().run_in_executor(None, fetch_status, port)
+
+    stop.set()
+    for task in tasks + [sampler]:
+        task.cancel()
+    await asyncio.gather(*tasks, sampler, return_exceptions=True)
+
+    cpu_seconds = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    ack_ms = [value * 1000 for value in stats['ack_latencies']]
+    broadcast_ms = [value * 1000 for value in broadcast_latencies]
+    return {
+        'agents_connected': sum(agent.connected.is_set() for agent in agents),
+        'dashboards_connected': sum(dashboard.connected.is_set() for dashboard in dashboards),
+        'connect_seconds': round(connect_seconds, 2),
+        'duration_seconds': round(elapsed, 2),
+        'batches_sent': stats['batches_sent'],
+        'batches_acked': stats['batches_acked'],
+        'batches_rejected': stats['batches_rejected'],
+        'events_sent': stats['events_sent'],
+        'ingest_batches_per_sec': round(stats['batches_acked'] / elapsed, 1),
+        'ingest_samples_per_sec': round(stats['batches_acked'] * args.interfaces / elapsed, 1),
+        'payload_kib_per_sec': round(stats['bytes_sent'] / elapsed / 1024, 1),
+        'ack_latency_ms': summarize(ack_ms),
+        'broadcast_latency_ms': summarize(broadcast_ms),
+        'server': {
+            'cpu_percent': round(cpu_seconds / elapsed * 100, 1),
+            'rss_mb_peak': round(max(rss_samples, default=0) / 2 ** 20, 1),
+            'rss_mb_end': round((rss_samples[-1] if rss_samples else 0) / 2 ** 20, 1)
+        },
+        'hosts': status
+    }
+
+
+def summarize(values):
+    """延迟分位数(毫秒)"""
+    return {
+        'count': len(values),
+        'p50': round(percentile(values, 0.5), 2),
+        'p95': round(percentile(values, 0.95), 2),
+        'p99': round(percentile(values, 0.99), 2),
+        'max': round(max(values, default=float('nan')), 2)
+    }
+
+
+def git_revision():
+    """当前构建的提交号(非 git 工作区时为 None)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """执行负载测试"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--serve', metavar='MODE', help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--modes', nargs='+', default=['eventlet'])
+    parser.add_argument('--agents', type=int, default=200)
+    parser.add_argument('--dashboards', type=int, default=50)
+    parser.add_argument('--batch-interval', type=float, default=1.0, help='每个 Agent 的批次间隔(秒)')
+    parser.add_argument('--interfaces', type=int, default=4, help='每个批次包含的接口数')
+    parser.add_argument('--event-interval', type=float, default=0,
+                        help='每个 Agent 发送 client_event 的间隔(秒)，0 表示不发送')
+    parser.add_argument('--broadcast-interval', type=float, default=1.0, help='traffic_data 广播间隔(秒)')
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--connect-concurrency', type=int, default=200)
+    parser.add_argument('--port', type=int, default=5951)
+    parser.add_argument('--output', help='JSON 报告路径')
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.db, args.broadcast_interval, args.agents)
+        return
+
+    sys.path.insert(0, REPO_DIR)
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'params': {key: value for key, value in vars(args).items() if key not in ('serve', 'db', 'output')},
+        'results': []
+    }
+
+    print(f"{'mode':<10}{'agents':>8}{'dash':>6}{'batch/s':>9}{'ack p50':>9}{'ack p99':>9}"
+          f"{'bc p50':>8}{'bc p99':>8}{'cpu %':>7}{'rss MB':>8}{'up':>6}")
+    for index, mode in enumerate(args.modes):
+        port = args.port + index
+        with tempfile.TemporaryDirectory() as tmpdir:
+            server = subprocess.Popen([
+                sys.executable, __file__, '--serve', mode, '--port', str(port),
+                '--db', os.path.join(tmpdir, 'bench.db'),
+                '--broadcast-interval', str(args.broadcast_interval), '--agents', str(args.agents)
+            ], cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_for_port(port)
+                result = asyncio.run(run_fleet(port, server.pid, args))
+            finally:
+                server.terminate()
+                server.wait()
+        result['mode'] = mode
+        report['results'].append(result)
+        print(f"{mode:<10}{result['agents_connected']:>8}{result['dashboards_connected']:>6}"
+              f"{result['ingest_batches_per_sec']:>9.1f}"
+              f"{result['ack_latency_ms']['p50']:>9.1f}{result['ack_latency_ms']['p99']:>9.1f}"
+              f"{result['broadcast_latency_ms']['p50']:>8.1f}{result['broadcast_latency_ms']['p99']:>8.1f}"
+              f"{result['server']['cpu_percent']:>7.1f}{result['server']['rss_mb_peak']:>8.1f}"
+              f"{result['hosts']['up'] if result['hosts'] else '-':>6}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"报告已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+数据包处理流水线基准测试
+通过 pcap 离线回放(无需 root 权限)把同一批数据包送入 packet_sniffer 的处理流水线，
+对每种抓包后端和分类器组合输出:
+
+- 端到端吞吐量: PcapReplayBackend -> PacketPipeline 的每秒数据包数(取多轮中最好的一轮)
+- 各阶段每个数据包的耗时: Scapy 解析 / 头部解析 / 协议分类 / 计数 / 流表 / 摘要推送缓冲
+- 各阶段每个数据包的内存分配: 阶段结束时仍存活的内存块数(阶段输出)，
+  以及 tracemalloc 统计的峰值字节数(含临时对象)
+
+组合:
+- afpacket/table: 原始帧 -> struct 解析头部 -> 查表分类(AF_PACKET 后端和抓包工作进程的路径)
+- scapy/table: Scapy 数据包 -> 原始字节查表分类(当前 Scapy 后端的路径)
+- scapy/haslayer: Scapy 数据包 -> 逐层 haslayer() 分类(原实现，作为对照)
+
+推送缓冲区在测试期间不会被清空，处于溢出采样的稳定状态，与抓包速度超过推送速度时一致。
+
+用法:
+    python benchmarks/bench_sniffer_pipeline.py --packets 50000
+    python benchmarks/bench_sniffer_pipeline.py --pcap capture.pcap --output sniffer.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import scapy.all as scapy # pylint: disable=wrong-import-position
+from services.capture_backends import format_summary, parse_headers # pylint: disable=wrong-import-position
+from services.flow_table import FlowTable, flow_key # pylint: disable=wrong-import-position
+from services.packet_sniffer import ( # pylint: disable=wrong-import-position
+    PacketBatchEmitter, PacketPipeline, get_protocol_name
+)
+from services.pcap_replay import PcapReplayBackend, read_pcap, synthetic_frames # pylint: disable=wrong-import-position
+from services.protocol_classifier import classify_headers # pylint: disable=wrong-import-position
+
+CONFIGURATIONS = (('afpacket', 'table'), ('scapy', 'table'), ('scapy', 'haslayer'))
+
+
+class HaslayerPipeline(PacketPipeline):
+    """对照组: 所有数据包都用 get_protocol_name() 逐层分类，不跟踪流"""
+
+    def handle_packet(self, packet):
+        packet_id = self._next_id()
+        self.protocol_counts[get_protocol_name(packet)] += 1
+        if self.emitter.offer(packet.summary, packet_id):
+            self.remember_frame(packet_id, packet.original)
+
+
+def new_pipeline(classifier):
+    """创建与实时抓包配置相同的流水线(不打印进度)"""
+    pipeline_class = HaslayerPipeline if classifier == 'haslayer' else PacketPipeline
+    return pipeline_class(PacketBatchEmitter(), defaultdict(int), print_interval=1 << 62,
+                          flow_table=FlowTable())
+
+
+def end_to_end(frames, backend, classifier, repeat):
+    """完整流水线的吞吐量(数据包/秒)，返回最好的一轮及协议计数"""
+    best, counts = 0.0, None
+    for _ in range(repeat):
+        pipeline = new_pipeline(classifier)
+        replay = PcapReplayBackend(frames=frames, as_packets=backend == 'scapy')
+        started = time.perf_counter()
+        pipeline.run(replay)
+        elapsed = time.perf_counter() - started
+        best = max(best, replay.replayed / elapsed)
+        counts = dict(pipeline.protocol_counts)
+    return best, counts
+
+
+def stage_functions(backend, classifier):
+    """
+    各阶段的批处理函数: 输入上一阶段的输出列表，返回本阶段的输出列表。
+    """
+    stages = []
+    if backend == 'scapy':
+        stages.append(('decode', lambda frames: [scapy.Ether(frame) for frame, _ in frames]))
+    if classifier == 'table':
+        if backend == 'scapy':
+            stages.append(('parse', lambda packets: [(parse_headers(p.original), p) for p in packets]))
+        else:
+            stages.append(('parse', lambda frames: [(parse_headers(frame), frame) for frame, _ in frames]))
+        stages.append(('classify', lambda items: [(classify_headers(h), h, x) for h, x in items]))
+    else:
+        stages.append(('classify', lambda packets: [(get_protocol_name(p), None, p) for p in packets]))
+
+    def count(items):
+        counts = defaultdict(int)
+        for name, _, _ in items:
+            counts[name] += 1
+        return items
+
+    def track_flows(items):
+        table = FlowTable()
+        for index, (_, headers, _) in enumerate(items):
+            key = flow_key(headers)
+            if key is not None:
+                table.update(key, headers.length, index * 1e-5)
+        return items
+
+    def emit(items):
+        emitter = PacketBatchEmitter()
+        for index, (_, headers, item) in enumerate(items):
+            if backend == 'scapy':
+                emitter.offer(item.summary, index)
+            elif headers is not None:
+                emitter.offer(lambda h=headers: format_summary(h), index)
+        return items
+
+    stages.append(('count', count))
+    if classifier == 'table':
+        stages.append(('flow', track_flows))
+    stages.append(('emit', emit))
+    return stages
+
+
+def measure_stages(frames, backend, classifier):
+    """逐阶段计时并统计内存分配"""
+    results = {}
+    items = frames
+    count = len(frames)
+    for name, stage in stage_functions(backend, classifier):
+        gc.collect()
+        gc.disable()
+        try:
+            blocks_before = sys.getallocatedblocks()
+            started = time.perf_counter()
+            output = stage(items)
+            elapsed = time.perf_counter() - started
+            blocks_after = sys.getallocatedblocks()
+        finally:
+            gc.enable()
+        del output
+
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        output = stage(items)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {
+            'us_per_packet': round(elapsed / count * 1e6, 3),
+            'alloc_blocks_per_packet': round((blocks_after - blocks_before) / count, 2),
+            'peak_bytes_per_packet': round((peak - before) / count, 1)
+        }
+        items = output
+    return results
+
+
+def main():
+    """执行基准测试"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pcap', help='回放的 pcap 文件，默认使用合成流量')
+    parser.add_argument('--packets', type=int, default=50000, help='合成数据包数')
+    parser.add_argument('--flows', type=int, default=4096, help='合成流量中的流数量')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3, help='端到端测试轮数')
+    parser.add_argument('--scapy-limit', type=int, default=20000,
+                        help='Scapy 组合最多使用的数据包数(Scapy 解析较慢)')
+    parser.add_argument('--output', help='JSON 报告路径')
+    args = parser.parse_args()
+
+    if args.pcap:
+        frames = read_pcap(args.pcap)
+        source = os.path.basename(args.pcap)
+    else:
+        frames = synthetic_frames(args.packets, flows=args.flows, seed=args.seed)
+        source = f'synthetic({args.packets}, flows={args.flows}, seed={args.seed})'
+    print(f"数据源: {source}, {len(frames)} 个数据包, "
+          f"平均 {sum(len(frame) for frame, _ in frames) / max(len(frames), 1):.0f} 字节")
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'source': source,
+        'packets': len(frames),
+        'results': []
+    }
+    stage_names = ('decode', 'parse', 'classify', 'count', 'flow', 'emit')
+    print(f"{'backend/classifier':<20}{'pkts/s':>11}" + ''.join(f"{name + ' us':>12}" for name in stage_names)
+          + f"{'blocks/pkt':>12}")
+    for backend, classifier in CONFIGURATIONS:
+        subset = frames[:args.scapy_limit] if backend == 'scapy' else frames
+        pps, counts = end_to_end(subset, backend, classifier, args.repeat)
+        stages = measure_stages(subset, backend, classifier)
+        report['results'].append({
+            'backend': backend,
+            'classifier': classifier,
+            'packets': len(subset),
+            'packets_per_sec': round(pps, 1),
+            'stages': stages,
+            'protocol_counts': counts
+        })
+        cells = ''.join(
+            f"{stages[name]['us_per_packet']:>12.2f}" if name in stages else f"{'-':>12}"
+            for name in stage_names
+        )
+        blocks = sum(stage['alloc_blocks_per_packet'] for stage in stages.values())
+        print(f"{backend + '/' + classifier:<20}{pps:>11.0f}{cells}{blocks:>12.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"报告已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+"""
+Socket.IO 广播负载测试
+为每种异步模式启动一个服务器子进程，用 asyncio 打开数千个模拟仪表盘的 WebSocket 连接，
+统计广播延迟分位数。
+
+默认服务器只做合成的 traffic_data 广播；--app 时启动真实应用(create_app)，
+同进程运行流量监控任务和数据包嗅探任务(无限循环回放合成 pcap，不需要 root 权限)，
+另由一个探测任务按相同间隔广播带发送时间的 bench_probe 事件，
+其延迟反映监控任务和抓包循环是否阻塞了事件循环。
+
+用法:
+    python benchmarks/bench_socketio_broadcast.py --clients 2000 --modes threading eventlet
+    python benchmarks/bench_socketio_broadcast.py --app --clients 2000 --modes threading eventlet
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+HOST = '127.0.0.1'
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+# ---------------------------------------------------------------- 服务器端
+
+def serve(mode, port, interval, interfaces):
+    """广播服务器(在子进程中运行)"""
+    # pylint: disable=import-outside-toplevel
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+    from flask import Flask
+    from flask_socketio import SocketIO
+
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode=mode, cors_allowed_origins='*')
+
+    def broadcast():
+        rates = [
+            {'interface': f'eth{i}', 'bytes_sent_sec': 1000.0 * i, 'bytes_recv_sec': 2000.0 * i}
+            for i in range(interfaces)
+        ]
+        while True:
+            socketio.sleep(interval)
+            socketio.emit('traffic_data', {'rates': rates, 'sent_at': time.time()})
+
+    socketio.start_background_task(broadcast)
+    options = {'allow_unsafe_werkzeug': True} if mode == 'threading' else {}
+    socketio.run(app, host=HOST, port=port, log_output=False, **options)
+
+
+def serve_app(mode, port, interval, workdir):
+    """真实应用服务器(在子进程中运行)，流量监控和抓包任务与 serve.py 相同地在本进程启动"""
+    # pylint: disable=import-outside-toplevel
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+    elif mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from services.pcap_replay import synthetic_frames, write_pcap
+    pcap_path = os.path.join(workdir, 'replay.pcap')
+    write_pcap(pcap_path, synthetic_frames(20000))
+
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'app.db')
+    Config.ALERT_COOLDOWN_DB = None
+    Config.SOCKETIO_ASYNC_MODE = mode
+    Config.SOCKETIO_MESSAGE_QUEUE = None
+    Config.TRAFFIC_UPDATE_INTERVAL = interval
+    # 抓包循环在 Web 进程内运行，持续回放数据包
+    Config.CAPTURE_MODE = 'thread'
+    Config.CAPTURE_BACKEND = 'pcap'
+    Config.CAPTURE_PCAP_FILE = pcap_path
+    Config.CAPTURE_REPLAY_LOOPS = 0
+    from app import create_app
+    from extensions import db, socketio
+    from services.leader_election import ensure_monitoring_tasks
+
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+    ensure_monitoring_tasks(app)
+
+    def probe():
+        while True:
+            socketio.sleep(interval)
+            socketio.emit('bench_probe', {'sent_at': time.time()})
+
+    socketio.start_background_task(probe)
+    options = {'allow_unsafe_werkzeug': True} if mode == 'threading' else {}
+    socketio.run(app, host=HOST, port=port, log_output=False, **options)
+
+
+# ---------------------------------------------------------------- 客户端
+
+class DashboardClient:
+    """最小的 Engine.IO v4 / Socket.IO v5 WebSocket 客户端"""
+
+    def __init__(self, port, latencies):
+        self.port = port
+        self.latencies = latencies
+        self.traffic_frames = 0
+        self.reader = None
+        self.writer = None
+        self.connected = asyncio.Event()
+
+    async def _handshake(self):
+        self.reader, self.writer = await asyncio.open_connection(HOST, self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((
+            "GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\n"
+            f"Host: {HOST}:{self.port}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        response = await self.reader.readuntil(b'\r\n\r\n')
+        if b' 101 ' not in response.split(b'\r\n', 1)[0]:
+            raise ConnectionError(response.split(b'\r\n', 1)[0].decode())
+
+    def _send(self, data, opcode=0x1):
+        """发送一个带掩码的 WebSocket 帧(文本帧，或 opcode=0x2 的二进制帧)"""
+        payload = data.encode() if isinstance(data, str) else data
+        mask = os.urandom(4)
+        if len(payload) < 126:
+            header = struct.pack('!BB', 0x80 | opcode, 0x80 | len(payload))
+        elif len(payload) < 1 << 16:
+            header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, len(payload))
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, len(payload))
+        key = (mask * (len(payload) // 4 + 1))[:len(payload)]
+        masked = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(len(payload), 'big')
+        self.writer.write(header + mask + masked)
+
+    async def _recv(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7f
+        if length == 126:
+            (length,) = struct.unpack('!H', await self.reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack('!Q', await self.reader.readexactly(8))
+        payload = await self.reader.readexactly(length)
+        return first & 0x0f, payload
+
+    async def run(self, stop):
+        """连接并接收广播直到 stop 被设置"""
+        await self._handshake()
+        try:
+            while not stop.is_set():
+                opcode, payload = await self._recv()
+                if opcode == 0x8:
+                    return
+                if opcode != 0x1:
+                    continue
+                received = time.time()
+                text = payload.decode()
+                if text.startswith('0'):
+                    self._send('40')
+                elif text.startswith('40'):
+                    self.connected.set()
+                elif text == '2':
+                    self._send('3')
+                elif text.startswith('42'):
+                    event, data = json.loads(text[2:])
+                    if event == 'traffic_data':
+                        self.traffic_frames += 1
+                    # 真实应用的 traffic_data 不带发送时间，延迟由 bench_probe 测量
+                    if event in ('traffic_data', 'bench_probe') and 'sent_at' in data:
+                        self.latencies.append(received - data['sent_at'])
+        finally:
+            self.writer.close()
+
+
+def percentile(values, q):
+    """计算分位数"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def wait_for_port(port, timeout=30):
+    """等待服务器开始监听"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex((HOST, port)) == 0:
+                return
+        time.sleep(0.2)
+    raise TimeoutError(f"服务器未在 {timeout} 秒内启动")
+
+
+async def run_clients(port, clients, duration, connect_concurrency):
+    """建立连接、收集 duration 秒的广播延迟"""
+    latencies = []
+    stop = asyncio.Event()
+    limiter = asyncio.Semaphore(connect_concurrency)
+    dashboards = [DashboardClient(port, latencies) for _ in range(clients)]
+
+    async def start(dashboard):
+        async with limiter:
+            task = asyncio.ensure_future(dashboard.run(stop))
+            try:
+                await asyncio.wait_for(dashboard.connected.wait(), 30)
+            except asyncio.TimeoutError:
+                pass
+            return task
+
+    started = time.perf_counter()
+    tasks = await asyncio.gather(*(start(dashboard) for dashboard in dashboards))
+    connect_seconds = time.perf_counter() - started
+    connected = sum(dashboard.connected.is_set() for dashboard in dashboards)
+
+    latencies.clear()
+    for dashboard in dashboards:
+        dashboard.traffic_frames = 0
+    await asyncio.sleep(duration)
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    traffic_frames = sum(dashboard.traffic_frames for dashboard in dashboards)
+    return connected, connect_seconds, latencies, traffic_frames
+
+
+def main():
+    """执行负载测试"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--serve', metavar='MODE', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--app', action='store_true',
+                        help='启动真实应用(流量监控 + 数据包嗅探任务)而不是合成广播服务器')
+    parser.add_argument('--modes', nargs='+', default=['threading', 'eventlet'])
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--interval', type=float, default=1.0, help='广播间隔(秒)')
+    parser.add_argument('--interfaces', type=int, default=20, help='每帧包含的接口数')
+    parser.add_argument('--connect-concurrency', type=int, default=200)
+    parser.add_argument('--port', type=int, default=5901)
+    args = parser.parse_args()
+
+    if args.serve:
+        if args.app:
+            serve_app(args.serve, args.port, args.interval, args.workdir)
+        else:
+            serve(args.serve, args.port, args.interval, args.interfaces)
+        return
+
+    print(f"{'mode':<10}{'clients':>9}{'connect s':>11}{'msgs':>9}{'traffic':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for index, mode in enumerate(args.modes):
+        port = args.port + index
+        with tempfile.TemporaryDirectory() as workdir:
+            command = [
+                sys.executable, __file__, '--serve', mode, '--port', str(port),
+                '--interval', str(args.interval), '--interfaces', str(args.interfaces)
+            ]
+            if args.app:
+                command += ['--app', '--workdir', workdir]
+            server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_for_port(port)
+                connected, connect_seconds, latencies, traffic_frames = asyncio.run(
+                    run_clients(port, args.clients, args.duration, args.connect_concurrency)
+                )
+            finally:
+                server.terminate()
+                server.wait()
+        ms = [value * 1000 for value in latencies]
+        print(f"{mode:<10}{connected:>9}{connect_seconds:>11.1f}{len(ms):>9}{traffic_frames:>9}"
+              f"{percentile(ms, 0.5):>9.1f}{percentile(ms, 0.95):>9.1f}"
+              f"{percentile(ms, 0.99):>9.1f}{max(ms, default=float('nan')):>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
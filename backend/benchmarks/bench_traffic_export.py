@@ -0,0 +1,92 @@
+"""
+流量导出基准测试
+在临时 SQLite 数据库中生成指定数量的流量记录，分别以各导出格式流式读取，
+输出吞吐量(行/秒)、导出大小以及导出过程中的 Python 内存峰值。
+
+用法:
+    python benchmarks/bench_traffic_export.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask # pylint: disable=wrong-import-position
+from sqlalchemy import insert # pylint: disable=wrong-import-position
+from extensions import db # pylint: disable=wrong-import-position
+from models import Traffic # pylint: disable=wrong-import-position
+from routes.history import history_bp # pylint: disable=wrong-import-position
+from services.traffic_export import ENCODERS # pylint: disable=wrong-import-position
+
+
+def populate(rows, interfaces=4, batch=10000):
+    """批量插入测试数据"""
+    start = datetime(2026, 1, 1)
+    for offset in range(0, rows, batch):
+        db.session.execute(insert(Traffic), [{
+            'interface': f'eth{i % interfaces}',
+            'bytes_sent': i * 1500,
+            'bytes_recv': i * 900,
+            'created_at': start + timedelta(seconds=3 * i)
+        } for i in range(offset, min(offset + batch, rows))])
+    db.session.commit()
+
+
+def consume(client, export_format):
+    """流式读取一次导出，返回字节数"""
+    response = client.get('/api/history/traffic/export', query_string={'format': export_format},
+                          buffered=False)
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    response.close()
+    return size
+
+
+def run_export(client, export_format):
+    """返回 (耗时秒, 字节数, 内存峰值字节)；内存单独测量，避免 tracemalloc 影响计时"""
+    started = time.perf_counter()
+    size = consume(client, export_format)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    consume(client, export_format)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, size, peak
+
+
+def main():
+    """执行基准测试"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app.config['TRAFFIC_EXPORT_CHUNK_SIZE'] = args.chunk_size
+        db.init_app(app)
+        app.register_blueprint(history_bp, url_prefix='/api/history')
+
+        with app.app_context():
+            db.create_all()
+            populate(args.rows)
+            client = app.test_client()
+            print(f"{'format':<10}{'rows/s':>14}{'MB':>10}{'peak KB':>12}")
+            for export_format in ENCODERS:
+                elapsed, size, peak = run_export(client, export_format)
+                print(f"{export_format:<10}{args.rows / elapsed:>14,.0f}"
+                      f"{size / 1e6:>10.1f}{peak / 1024:>12.0f}")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -14,12 +14,27 @@ class Config:
         "http://127.0.0.1:5173",
         "http://127.0.0.1:5174"
     ]
-    SOCKETIO_ASYNC_MODE = "threading"
+    # Socket.IO 异步模式: threading(开发服务器) / eventlet / gevent(协作式，生产环境使用 serve.py 启动)
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE', 'threading')
+    # 多个 Web 进程共享房间的消息队列: redis://host:6379/0 或 unix:///tmp/netmon-socketio.sock，
+    # 为空表示单进程部署
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_CHANNEL = 'network-monitor'
+    # 主进程选举: redis:// 地址或锁文件路径。为空时 Redis 消息队列使用同一 Redis，
+    # Unix 套接字消息队列使用临时目录下的文件锁，其他消息队列必须显式配置
+    LEADER_LOCK = os.environ.get('LEADER_LOCK')
+    LEADER_LEASE_TTL = 15         # Redis 租约有效期(秒)
+    LEADER_RENEW_INTERVAL = 5     # 竞选/续约间隔(秒)
 
     # 数据库配置 使用SQLite
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASE_DIR, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # 告警冷却状态(SQLite 文件，多个进程共享，重启后保留；默认文件及其 -wal/-shm 已被 .gitignore 忽略)，
+    # None 表示只保存在内存中
+    ALERT_COOLDOWN_DB = os.environ.get('ALERT_COOLDOWN_DB', os.path.join(BASE_DIR, 'cooldowns.db'))
+    ALERT_COOLDOWN_SECONDS = 300          # 同一阈值/接口两次告警之间的最短间隔(秒)
+    ALERT_COOLDOWN_MAX_ENTRIES = 100000   # 进程内缓存的冷却键数量上限
 
     # JWT配置
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'super-secret-key-change-this'
@@ -27,9 +42,96 @@ class Config:
     JWT_REFRESH_TOKEN_EXPIRES = 30 * 24 * 60 * 60  # 30天
 
     TRAFFIC_UPDATE_INTERVAL = 3  # 秒
+    # 网卡计数器来源: psutil(跨平台) / procfs(/proc/net/dev) / sysfs(/sys/class/net)
+    COUNTER_SOURCE = os.environ.get('COUNTER_SOURCE', 'psutil')
+    # sysfs 来源最多缓存文件描述符的接口数(每个接口 8 个)，其余接口每次读取时打开再关闭
+    SYSFS_CACHED_INTERFACES = 64
+    # 采样模式: fixed(按 TRAFFIC_UPDATE_INTERVAL 采样) / hires(亚秒级自适应采样，按 TRAFFIC_UPDATE_INTERVAL 聚合推送)
+    TRAFFIC_SAMPLING_MODE = os.environ.get('TRAFFIC_SAMPLING_MODE', 'fixed')
+    HIRES_MIN_INTERVAL_MS = 100       # 流量突变时的最小采样间隔
+    HIRES_MAX_INTERVAL_MS = 1000      # 链路空闲时的最大采样间隔
+    HIRES_RING_SECONDS = 60           # 内存中保留的细粒度采样时长
+    HIRES_CPU_BUDGET = 0.02           # 采样耗时占用单核 CPU 的比例上限
+    HIRES_IDLE_BPS = 1024             # 总速率低于该值(字节/秒)视为空闲
+    HIRES_BURST_ZSCORE = 3.0          # 速率偏离均值超过该倍数标准差视为突发
+    # 实时流量推送: 订阅客户端接收 traffic_delta 增量帧
+    TRAFFIC_STREAM_MIN_INTERVAL_MS = 1000  # 每个客户端的最小推送间隔
+    TRAFFIC_STREAM_ACK_TIMEOUT = 10        # 等待客户端确认的超时时间(秒)，超时后重发关键帧
+    TRAFFIC_STREAM_KEYFRAME_EVERY = 60     # 每隔多少帧发送一次关键帧
+    TRAFFIC_STREAM_LEGACY_BROADCAST = True # 是否继续向所有客户端广播完整的 traffic_data
+    TRAFFIC_FLUSH_INTERVAL = 30       # 流量采样最长缓存时间(秒)
+    TRAFFIC_FLUSH_BATCH_SIZE = 500    # 缓存达到该数量时立即批量写入
+    TRAFFIC_MAX_BACKLOG = 50000       # 写缓冲区积压上限，超出时丢弃最旧的采样
+    TRAFFIC_ROLLUP_INTERVAL = 60      # 增量汇总任务执行间隔(秒)
+    TRAFFIC_ROLLUP_BATCH_SIZE = 5000  # 每批汇总的原始记录数
+    TRAFFIC_EXPORT_CHUNK_SIZE = 2000  # 导出时每批从数据库读取的行数
+    # 各层级数据保留天数: 'raw' 为原始采样，60/3600/86400 为对应时间桶，None 表示永久保留
+    TRAFFIC_RETENTION_DAYS = {'raw': 7, 60: 30, 3600: 365, 86400: None}
+    # 告警队列: 采样循环只入队，告警工作任务合并、批量写库并分发通知
+    ALERT_COALESCE_WINDOW = 600       # 同一阈值/接口在该时间(秒)内的告警合并为一条记录并累加次数
+    ALERT_FLUSH_INTERVAL = 1          # 告警工作任务处理间隔(秒)
+    ALERT_BATCH_SIZE = 200            # 每批处理的告警数
+    ALERT_MAX_BACKLOG = 10000         # 告警队列积压上限，超出时丢弃最旧的告警
+    # 额外的通知渠道(socketio 和 log 始终启用): webhook / email / stub(本地替身)
+    ALERT_SINKS = [sink for sink in os.environ.get('ALERT_SINKS', '').split(',') if sink]
+    ALERT_SINK_LEVELS = {'log': ['error'], 'email': ['error']}  # 渠道 -> 处理的告警级别
+    ALERT_WEBHOOK_URL = os.environ.get('ALERT_WEBHOOK_URL')
+    ALERT_SMTP_HOST = os.environ.get('ALERT_SMTP_HOST')
+    ALERT_SMTP_PORT = int(os.environ.get('ALERT_SMTP_PORT', 25))
+    ALERT_EMAIL_FROM = os.environ.get('ALERT_EMAIL_FROM', 'network-monitor@localhost')
+    ALERT_EMAIL_TO = [addr for addr in os.environ.get('ALERT_EMAIL_TO', '').split(',') if addr]
+    ALERT_RETRY_MAX_ATTEMPTS = 5      # 通知投递最大尝试次数
+    ALERT_RETRY_BACKOFF_INITIAL = 1   # 首次重试等待(秒)，之后按 2 倍退避
+    ALERT_RETRY_BACKOFF_MAX = 60
+    ALERT_DELIVERY_MAX_BACKLOG = 1000  # Webhook/邮件投递队列积压上限，超出时丢弃最旧的通知
+    # Agent 指标接收(agent.py --headless 推送的 agent_metrics 批次)
+    AGENT_STALE_SECONDS = 45          # 超过该时间(秒)未上报的主机标记为离线
+    AGENT_WHEEL_TICK = 1              # 离线检测时间轮的槽位粒度(秒)
+    AGENT_MAX_HOSTS = 10000           # 主机状态表容量上限
+    AGENT_MAX_BATCH_BYTES = 1 << 20   # 单个批次压缩前后的大小上限
+    # Agent 认证: 连接时 auth 携带 host_id 和 agent_token。AGENT_TOKENS 格式为 "host_id:token,..."；
+    # 未配置令牌时只接受 clients.xml 中已注册且来源 IP 一致的主机(AGENT_REQUIRE_REGISTERED)
+    AGENT_TOKENS = dict(
+        item.split(':', 1) for item in os.environ.get('AGENT_TOKENS', '').split(',') if ':' in item
+    )
+    AGENT_REQUIRE_REGISTERED = True
     MAX_PACKETS_DISPLAY = 50
     PACKET_PRINT_INTERVAL = 100
 
+    # 数据包批量推送配置
+    PACKET_BATCH_INTERVAL_MS = 500   # 每隔多少毫秒推送一帧 new_packets
+    PACKET_BATCH_MAX_SIZE = 50       # 每帧最多包含的数据包摘要数，缓冲达到该数量时立即推送
+    PACKET_BUFFER_CAPACITY = 1000    # 环形缓冲区容量
+    PACKET_SAMPLE_RATE = 10          # 缓冲区溢出时每 N 个数据包保留 1 个
+
+    # 抓包后端配置
+    CAPTURE_BACKEND = os.environ.get('CAPTURE_BACKEND', 'scapy')  # 'scapy'、'afpacket'(仅 Linux) 或 'pcap'(离线回放)
+    CAPTURE_INTERFACE = os.environ.get('CAPTURE_INTERFACE')       # None 表示所有接口
+    CAPTURE_BPF_FILTER = os.environ.get('CAPTURE_BPF_FILTER')     # 例如 "ip or ip6 or arp"
+    CAPTURE_USE_MMAP_RING = True       # afpacket 后端是否使用 TPACKET_V3 环形缓冲区
+    CAPTURE_RING_BLOCK_SIZE = 1 << 20  # 环形缓冲区每块字节数
+    CAPTURE_RING_BLOCK_COUNT = 64
+    CAPTURE_RING_FRAME_SIZE = 2048
+    # pcap 离线回放(CAPTURE_BACKEND='pcap'): 不需要 root 权限，回放结束后抓包任务(或工作进程)正常退出，
+    # 时间戳平移到回放时的当前时间
+    CAPTURE_PCAP_FILE = os.environ.get('CAPTURE_PCAP_FILE')
+    CAPTURE_REPLAY_LOOPS = 1              # 回放次数，0 表示无限循环
+    CAPTURE_REPLAY_AS_PACKETS = False     # True 时解析为 Scapy 数据包(模拟 scapy 后端)，否则回调原始帧
+
+    # 抓包运行模式: 'thread' 在 Web 进程内抓包；'process' 为每个接口启动独立的抓包工作进程
+    CAPTURE_MODE = os.environ.get('CAPTURE_MODE', 'thread')
+    CAPTURE_INTERFACES = [                # process 模式下每个接口一个工作进程，为空时抓取所有接口
+        iface for iface in os.environ.get('CAPTURE_INTERFACES', '').split(',') if iface
+    ]
+    CAPTURE_CPU_AFFINITY = {}             # 接口 -> CPU 编号，例如 {'eth0': 2}
+    CAPTURE_SOCKET_PATH = None            # 工作进程与 Web 进程通信的 Unix 套接字，默认位于临时目录
+
+    # 流表配置
+    FLOW_TABLE_CAPACITY = 262144    # 最大并发流数量(硬上限)
+    FLOW_IDLE_TIMEOUT = 120         # 流空闲超时(秒)
+    TOP_TALKERS_INTERVAL = 5        # 推送 top_talkers 的间隔(秒)
+    TOP_TALKERS_COUNT = 10
+
 
 class DevelopmentConfig(Config):
     """开发环境配置"""
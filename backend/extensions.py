@@ -15,10 +15,12 @@ jwt = JWTManager()
 
 # 全局变量
 # 注意：这些全局变量用于在不同的上下文之间共享状态
-_last_io_counters = {}
+_counter_snapshot = None
 _traffic_monitoring_task = None
 _packet_monitoring_task = None
-_packet_count = 0
-_packet_print_interval = 100
 _protocol_counts = {}
-_alert_cooldowns = {}
\ No newline at end of file
+_packet_stats = {}
+_capture_worker_stats = {}
+_flow_table = None
+_worker_top_flows = {}
+_worker_flow_counts = {}
\ No newline at end of file
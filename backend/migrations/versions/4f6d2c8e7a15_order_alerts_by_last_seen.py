@@ -0,0 +1,28 @@
+"""Order alerts by last_seen_at
+
+Revision ID: 4f6d2c8e7a15
+Revises: 9e1c4b7d2a63
+Create Date: 2026-10-18 21:04:36.527193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f6d2c8e7a15'
+down_revision = '9e1c4b7d2a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 合并之前写入的告警没有 last_seen_at
+    op.execute(sa.text('UPDATE alerts SET last_seen_at = created_at WHERE last_seen_at IS NULL'))
+    op.drop_index('ix_alerts_user_id_is_read_created_at', table_name='alerts')
+    op.create_index('ix_alerts_user_id_is_read_last_seen_at', 'alerts', ['user_id', 'is_read', 'last_seen_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_alerts_user_id_is_read_last_seen_at', table_name='alerts')
+    op.create_index('ix_alerts_user_id_is_read_created_at', 'alerts', ['user_id', 'is_read', 'created_at'], unique=False)
@@ -6,5 +6,6 @@ from models.user import User
 from models.traffic import Traffic
 from models.threshold import Threshold
 from models.alert import Alert
+from models.traffic_rollup import TrafficRollup, RollupWatermark
 
-__all__ = ['User', 'Traffic', 'Threshold', 'Alert']
+__all__ = ['User', 'Traffic', 'Threshold', 'Alert', 'TrafficRollup', 'RollupWatermark']
@@ -6,9 +6,17 @@
 from datetime import datetime, timezone
 from extensions import db
 
+def _default_last_seen_at(context):
+    # 未指定时与 created_at 相同(新记录的首次和最近一次出现时间一致)
+    return context.get_current_parameters().get('created_at') or datetime.now(timezone.utc)
+
 class Alert(db.Model):
     """告警模型"""
     __tablename__ = 'alerts'
+    __table_args__ = (
+        # 告警列表按最近一次出现时间排序: 合并后再次触发的告警回到列表顶部
+        db.Index('ix_alerts_user_id_is_read_last_seen_at', 'user_id', 'is_read', 'last_seen_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -16,6 +24,11 @@ class Alert(db.Model):
     level = db.Column(db.String(50), nullable=False, default='warning')
     is_read = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    # 合并信息: 同一阈值/接口在合并窗口内的重复告警只保留一条记录并累加次数
+    threshold_id = db.Column(db.Integer, nullable=True)
+    interface = db.Column(db.String(64), nullable=True)
+    count = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    last_seen_at = db.Column(db.DateTime, nullable=True, default=_default_last_seen_at)
 
     user = db.relationship('User', backref=db.backref('alerts', lazy=True))
 
@@ -27,5 +40,9 @@ class Alert(db.Model):
             'message': self.message,
             'level': self.level,
             'is_read': self.is_read,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'threshold_id': self.threshold_id,
+            'interface': self.interface,
+            'count': self.count or 1,
+            'last_seen_at': (self.last_seen_at or self.created_at).strftime('%Y-%m-%d %H:%M:%S')
         }
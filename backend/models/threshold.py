@@ -11,6 +11,9 @@ class Threshold(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     metric = db.Column(db.String(50), nullable=False)  # 例如: 'upload_speed', 'download_speed'
     value = db.Column(db.Float, nullable=False)
+    interface = db.Column(db.String(64), nullable=True)  # 为空表示适用于所有接口
+    aggregation = db.Column(db.String(10), default='avg', nullable=False)  # avg/min/max/p95/p99
+    window_seconds = db.Column(db.Integer, nullable=True)  # 为空时使用默认窗口长度
     is_enabled = db.Column(db.Boolean, default=True, nullable=False)
 
     def __repr__(self):
@@ -9,17 +9,25 @@ from extensions import db
 class Traffic(db.Model):
     """流量数据模型"""
     __tablename__ = 'traffic'
+    __table_args__ = (
+        db.Index('ix_traffic_interface_created_at', 'interface', 'created_at'),
+        db.Index('ix_traffic_created_at_id', 'created_at', 'id'),
+        db.Index('ix_traffic_host_id_created_at', 'host_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
+    # 上报该采样的 Agent 主机 ID，本机采样为 None
+    host_id = db.Column(db.String(64), nullable=True)
     interface = db.Column(db.String(64), nullable=False)
     bytes_sent = db.Column(db.Integer, nullable=False)
     bytes_recv = db.Column(db.Integer, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
     def to_dict(self):
         """将流量对象转换为字典"""
         return {
             'id': self.id,
+            'host_id': self.host_id,
             'interface': self.interface,
             'bytes_sent': self.bytes_sent,
             'bytes_recv': self.bytes_recv,
@@ -0,0 +1,52 @@
+"""
+流量汇总模型模块
+定义按时间桶(1分钟/1小时/1天)汇总的流量数据模型以及增量汇总进度。
+"""
+# pylint: disable=too-few-public-methods
+from extensions import db
+
+class TrafficRollup(db.Model):
+    """流量汇总模型"""
+    __tablename__ = 'traffic_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('resolution', 'interface', 'bucket_start', name='uq_traffic_rollup_bucket'),
+        db.Index('ix_traffic_rollups_resolution_bucket', 'resolution', 'bucket_start'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    resolution = db.Column(db.Integer, nullable=False)  # 时间桶长度(秒): 60, 3600, 86400
+    interface = db.Column(db.String(64), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+    bytes_sent_min = db.Column(db.BigInteger, nullable=False)
+    bytes_sent_max = db.Column(db.BigInteger, nullable=False)
+    bytes_sent_sum = db.Column(db.BigInteger, nullable=False)
+    bytes_recv_min = db.Column(db.BigInteger, nullable=False)
+    bytes_recv_max = db.Column(db.BigInteger, nullable=False)
+    bytes_recv_sum = db.Column(db.BigInteger, nullable=False)
+
+    def to_dict(self):
+        """将汇总对象转换为字典"""
+        samples = self.samples or 1
+        return {
+            'interface': self.interface,
+            'resolution': self.resolution,
+            'bucket_start': self.bucket_start.strftime('%Y-%m-%d %H:%M:%S'),
+            'samples': self.samples,
+            'bytes_sent_min': self.bytes_sent_min,
+            'bytes_sent_max': self.bytes_sent_max,
+            'bytes_sent_avg': round(self.bytes_sent_sum / samples, 2),
+            'bytes_sent_sum': self.bytes_sent_sum,
+            'bytes_recv_min': self.bytes_recv_min,
+            'bytes_recv_max': self.bytes_recv_max,
+            'bytes_recv_avg': round(self.bytes_recv_sum / samples, 2),
+            'bytes_recv_sum': self.bytes_recv_sum
+        }
+
+
+class RollupWatermark(db.Model):
+    """增量汇总进度: 记录已汇总的最后一条原始流量记录ID"""
+    __tablename__ = 'rollup_watermarks'
+
+    name = db.Column(db.String(64), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
@@ -2,26 +2,69 @@
 告警路由模块
 处理告警的获取、标记已读等操作。
 """
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Alert, User
+from extensions import db
+from models import Alert
+from services.alert_counters import get_unread_counter
+from utils.pagination import paginate_by_cursor
 
 alerts_bp = Blueprint('alerts', __name__)
 
+ALERT_LEVELS = ('info', 'warning', 'error')
+
 @alerts_bp.route('', methods=['GET'], strict_slashes=False)
 @jwt_required()
 def get_alerts():
     """
-    获取当前登录用户的所有告警。
+    分页获取当前登录用户的告警，按最近一次出现时间(last_seen_at)倒序:
+    合并后再次触发(重新变为未读)的告警排在最前面，而不是停留在首次出现时的位置。
+    翻页期间再次触发的告警会移到第一页，之后的页面不会重复返回它。
+
+    查询参数:
+    - per_page: 每页数量 (1-200，默认 50)
+    - cursor: 上一页返回的 next_cursor
+    - level: 告警级别过滤，可用逗号分隔多个，例如 warning,error
+    - is_read: true / false
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({"msg": "用户未找到"}), 404
+    user_id = int(get_jwt_identity())
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 200)
+
+    query = Alert.query.filter(Alert.user_id == user_id)
+
+    levels = [level for level in request.args.get('level', '').split(',') if level]
+    if levels:
+        if any(level not in ALERT_LEVELS for level in levels):
+            return jsonify({"msg": f"level 必须为 {', '.join(ALERT_LEVELS)}"}), 400
+        query = query.filter(Alert.level.in_(levels))
+
+    is_read = request.args.get('is_read')
+    if is_read is not None:
+        if is_read.lower() not in ('true', 'false'):
+            return jsonify({"msg": "is_read 必须为 true 或 false"}), 400
+        query = query.filter(Alert.is_read.is_(is_read.lower() == 'true'))
 
-    alerts = Alert.query.filter_by(user_id=user.id).order_by(Alert.created_at.desc()).all()
+    try:
+        alerts, has_next, next_cursor = paginate_by_cursor(
+            query, Alert, request.args.get('cursor'), per_page, column='last_seen_at'
+        )
+    except ValueError:
+        return jsonify({"msg": "游标格式无效"}), 400
+
+    return jsonify({
+        "alerts": [alert.to_dict() for alert in alerts],
+        "per_page": per_page,
+        "has_next": has_next,
+        "next_cursor": next_cursor
+    }), 200
 
-    return jsonify([alert.to_dict() for alert in alerts]), 200
+@alerts_bp.route('/unread-count', methods=['GET'])
+@jwt_required()
+def get_unread_count():
+    """
+    获取未读告警数(带缓存)。变化时也会通过 Socket.IO 'unread_count' 事件推送。
+    """
+    return jsonify({"unread_count": get_unread_counter().get(get_jwt_identity())}), 200
 
 @alerts_bp.route('/<int:alert_id>/mark-read', methods=['POST'])
 @jwt_required()
@@ -37,10 +80,9 @@ def mark_alert_as_read(alert_id):
 
     alert.is_read = True
 
-    # pylint: disable=import-outside-toplevel
-    from extensions import db
     try:
         db.session.commit()
+        get_unread_counter().push([user_id])
         return jsonify(alert.to_dict()), 200
     except Exception as e: # pylint: disable=broad-exception-caught
         db.session.rollback()
@@ -50,19 +92,17 @@ def mark_alert_as_read(alert_id):
 @jwt_required()
 def mark_all_alerts_as_read():
     """
-    标记用户的所有未读告警为已读。
+    标记用户的所有未读告警为已读 (单条 UPDATE 语句，不加载告警记录)。
     """
     user_id = get_jwt_identity()
 
     try:
-        unread_alerts = Alert.query.filter_by(user_id=user_id, is_read=False).all()
-        for alert in unread_alerts:
-            alert.is_read = True
-
-        # pylint: disable=import-outside-toplevel
-        from extensions import db
+        updated = Alert.query.filter_by(user_id=user_id, is_read=False).update(
+            {Alert.is_read: True}, synchronize_session=False
+        )
         db.session.commit()
-        return jsonify({"msg": f"已标记 {len(unread_alerts)} 条告警为已读。"}), 200
+        get_unread_counter().push([user_id])
+        return jsonify({"msg": f"已标记 {updated} 条告警为已读。"}), 200
     except Exception as e: # pylint: disable=broad-exception-caught
         db.session.rollback()
         return jsonify({"msg": "更新告警失败", "error": str(e)}), 500
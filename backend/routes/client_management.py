@@ -1,4 +1,5 @@
 from flask import Blueprint, jsonify, request
+from services.agent_ingest import get_agent_ingest
 from utils.xml_manager import XMLManager
 
 client_bp = Blueprint('client', __name__)
@@ -11,6 +12,28 @@ def get_clients():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@client_bp.route('/status', methods=['GET'])
+def get_clients_status():
+    """
+    Latest state of every registered client and every host that reported metrics,
+    answered from the in-memory host table (no database access).
+    """
+    try:
+        hosts = {host['host_id']: host for host in get_agent_ingest().snapshot()}
+        statuses = []
+        for client in XMLManager.get_clients():
+            host = hosts.pop(client['id'], None) or {'host_id': client['id'], 'status': 'unknown'}
+            statuses.append({**host, 'registered': True, 'name': client['name'], 'ip': client['ip']})
+        for host in hosts.values():
+            statuses.append({**host, 'registered': False, 'name': host['host_name'], 'ip': None})
+
+        summary = {'total': len(statuses), 'up': 0, 'down': 0, 'unknown': 0}
+        for status in statuses:
+            summary[status['status']] += 1
+        return jsonify({'clients': statuses, 'summary': summary}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @client_bp.route('', methods=['POST'])
 def add_client():
     try:
@@ -20,6 +43,8 @@ def add_client():
         
         new_id = XMLManager.add_client(data)
         return jsonify({'message': 'Client added successfully', 'id': new_id}), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(e)
         return jsonify({'error': str(e)}), 500
@@ -31,6 +56,8 @@ def update_client(client_id):
         if XMLManager.update_client(client_id, data):
              return jsonify({'message': 'Client updated successfully'}), 200
         return jsonify({'error': 'Client not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -4,6 +4,8 @@
 """
 import psutil
 from flask import Blueprint, jsonify
+from services.counter_snapshot import COUNTER_FIELDS
+from services.counter_sources import get_counter_source
 
 devices_bp = Blueprint('devices', __name__)
 
@@ -65,25 +67,14 @@ def get_device_detail(device_id):
 def get_device_stats(device_id):
     """获取设备统计信息"""
     try:
-        io_counters = psutil.net_io_counters(pernic=True)
+        io_counters = get_counter_source().read()
 
         if device_id not in io_counters:
             return jsonify({"error": "未找到设备"}), 404
 
-        counters = io_counters[device_id]
-
         return jsonify({
             "device_id": device_id,
-            "stats": {
-                "bytes_sent": counters.bytes_sent,
-                "bytes_recv": counters.bytes_recv,
-                "packets_sent": counters.packets_sent,
-                "packets_recv": counters.packets_recv,
-                "errin": counters.errin,
-                "errout": counters.errout,
-                "dropin": counters.dropin,
-                "dropout": counters.dropout
-            }
+            "stats": dict(zip(COUNTER_FIELDS, io_counters[device_id]))
         })
     except Exception as e: # pylint: disable=broad-exception-caught
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,24 @@
+"""
+流路由模块
+提供按五元组聚合的 Top Talkers 查询接口。
+"""
+from flask import Blueprint, jsonify, request
+from services.flow_table import get_active_flow_count, get_top_flows
+
+flows_bp = Blueprint('flows', __name__)
+
+@flows_bp.route('/top', methods=['GET'])
+def get_top_talkers():
+    """获取流量最大的流"""
+    limit = request.args.get('n', 10, type=int)
+    by = request.args.get('by', 'bytes')
+
+    if by not in ('bytes', 'packets'):
+        return jsonify({"message": "排序指标必须为 bytes 或 packets"}), 400
+    limit = max(1, min(limit, 1000))
+
+    return jsonify({
+        "flows": get_top_flows(limit, by),
+        "active_flows": get_active_flow_count(),
+        "by": by
+    })
@@ -2,36 +2,69 @@
 历史记录路由模块
 提供查询历史流量数据的接口。
 """
-from datetime import datetime
-from flask import Blueprint, jsonify, request
-from models import Traffic
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import distinct, func
+from extensions import db
+from models import Traffic, TrafficRollup
+from services.traffic_export import ENCODERS, EXPORT_FORMATS, iter_traffic_batches
+from services.traffic_rollup import ROLLUP_TIERS, choose_resolution
+from services.traffic_writer import get_writer
+from services.hires_sampler import get_sampler
+from utils.pagination import paginate_by_cursor
 
 history_bp = Blueprint('history', __name__)
 
 @history_bp.route('/traffic', methods=['GET'], strict_slashes=False)
 def get_historical_traffic():
-    """获取历史流量数据接口"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
+    """
+    获取历史流量数据接口。
+
+    - 默认使用游标(keyset)分页: 传入上一页返回的 next_cursor 获取下一页，
+      include_total=true 时才计算总数
+    - 传入 page 参数时使用传统的页码分页
+    - 传入 max_points 参数时返回按汇总层级降采样后的数据，max_points 为返回点数的总上限(多个接口时平分)
+    - 默认只返回本机流量，传入 host_id 时返回该 Agent 主机上报的流量
+    """
+    page = request.args.get('page', type=int)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 1000)
+    max_points = request.args.get('max_points', type=int)
+    interface = request.args.get('interface')
+    host_id = request.args.get('host_id')
     start_time_str = request.args.get('start_time')
     end_time_str = request.args.get('end_time')
-
-    query = Traffic.query
+    start_time = end_time = None
 
     if start_time_str:
         try:
             start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-            query = query.filter(Traffic.created_at >= start_time)
         except ValueError:
             return jsonify({"message": "起始时间格式无效"}), 400
 
     if end_time_str:
         try:
             end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00'))
-            query = query.filter(Traffic.created_at <= end_time)
         except ValueError:
             return jsonify({"message": "结束时间格式无效"}), 400
 
+    if max_points is not None:
+        if max_points <= 0:
+            return jsonify({"message": "max_points 必须为正整数"}), 400
+        if host_id:
+            return jsonify({"message": "降采样数据只包含本机流量，不支持 host_id"}), 400
+        return get_downsampled_traffic(start_time, end_time, max_points, interface)
+
+    query = Traffic.query.filter(Traffic.host_id == host_id if host_id else Traffic.host_id.is_(None))
+    if interface:
+        query = query.filter(Traffic.interface == interface)
+    if start_time:
+        query = query.filter(Traffic.created_at >= _to_naive_utc(start_time))
+    if end_time:
+        query = query.filter(Traffic.created_at <= _to_naive_utc(end_time))
+
+    if page is None:
+        return get_traffic_page_by_cursor(query, per_page)
+
     pagination = query.order_by(Traffic.created_at.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
@@ -47,3 +80,182 @@ def get_historical_traffic():
         "has_next": pagination.has_next,
         "has_prev": pagination.has_prev
     })
+
+def get_traffic_page_by_cursor(query, per_page):
+    """
+    游标分页: 按 (created_at, id) 降序，使用 WHERE 条件定位下一页，
+    无论翻到多深都只扫描 per_page + 1 行，不需要 COUNT(*) 和 OFFSET。
+    """
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
+    total_items = query.order_by(None).count() if include_total else None
+
+    try:
+        items, has_next, next_cursor = paginate_by_cursor(
+            query, Traffic, request.args.get('cursor'), per_page
+        )
+    except ValueError:
+        return jsonify({"message": "游标格式无效"}), 400
+
+    response = {
+        "traffic": [item.to_dict() for item in items],
+        "per_page": per_page,
+        "has_next": has_next,
+        "next_cursor": next_cursor
+    }
+    if include_total:
+        response["total_items"] = total_items
+    return jsonify(response)
+
+def _to_naive_utc(value):
+    """数据库中的时间按不含时区的 UTC 存储"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _count_interfaces(start_time, end_time):
+    """
+    估算时间范围内本机流量的接口数。
+    优先使用按天汇总的记录(数据量小且永久保留)，尚未汇总时退回原始记录。
+    """
+    day_start = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
+    count = db.session.query(func.count(distinct(TrafficRollup.interface))).filter(
+        TrafficRollup.resolution == 86400,
+        TrafficRollup.bucket_start >= day_start,
+        TrafficRollup.bucket_start <= end_time
+    ).scalar()
+    if not count:
+        count = db.session.query(func.count(distinct(Traffic.interface))).filter(
+            Traffic.host_id.is_(None), Traffic.created_at >= start_time, Traffic.created_at <= end_time
+        ).scalar()
+    return count or 1
+
+def get_downsampled_traffic(start_time, end_time, max_points, interface=None):
+    """
+    按 max_points 选择合适的汇总层级返回历史流量。
+    未指定时间范围时默认返回最近24小时。
+
+    max_points 是返回点数的总上限: 未指定 interface 时按接口数平分，
+    选择层级时使用每个接口的点数预算；查询结果最多 max_points 条，
+    超出时保留最新的数据并设置 truncated。
+    """
+    end_time = _to_naive_utc(end_time or datetime.now(timezone.utc))
+    start_time = _to_naive_utc(start_time or end_time - timedelta(hours=24))
+    if start_time >= end_time:
+        return jsonify({"message": "起始时间必须早于结束时间"}), 400
+
+    interface_count = 1 if interface else _count_interfaces(start_time, end_time)
+    points_per_interface = max(max_points // interface_count, 1)
+    resolution = choose_resolution(
+        start_time, end_time, points_per_interface,
+        raw_interval=current_app.config.get('TRAFFIC_UPDATE_INTERVAL', 3),
+        retention=current_app.config.get('TRAFFIC_RETENTION_DAYS')
+    )
+
+    if resolution is None:
+        query = Traffic.query.filter(
+            Traffic.host_id.is_(None), Traffic.created_at >= start_time, Traffic.created_at <= end_time
+        )
+        if interface:
+            query = query.filter(Traffic.interface == interface)
+        rows = query.order_by(Traffic.created_at.desc(), Traffic.id.desc()).limit(max_points + 1).all()
+        truncated = len(rows) > max_points
+        points = [{
+            'interface': row.interface,
+            'resolution': None,
+            'bucket_start': row.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'samples': 1,
+            'bytes_sent_min': row.bytes_sent,
+            'bytes_sent_max': row.bytes_sent,
+            'bytes_sent_avg': row.bytes_sent,
+            'bytes_sent_sum': row.bytes_sent,
+            'bytes_recv_min': row.bytes_recv,
+            'bytes_recv_max': row.bytes_recv,
+            'bytes_recv_avg': row.bytes_recv,
+            'bytes_recv_sum': row.bytes_recv
+        } for row in reversed(rows[:max_points])]
+    else:
+        query = TrafficRollup.query.filter(
+            TrafficRollup.resolution == resolution,
+            TrafficRollup.bucket_start >= start_time,
+            TrafficRollup.bucket_start <= end_time
+        )
+        if interface:
+            query = query.filter(TrafficRollup.interface == interface)
+        rows = query.order_by(
+            TrafficRollup.bucket_start.desc(), TrafficRollup.id.desc()
+        ).limit(max_points + 1).all()
+        truncated = len(rows) > max_points
+        points = [row.to_dict() for row in reversed(rows[:max_points])]
+
+    return jsonify({
+        "tier": ROLLUP_TIERS.get(resolution, 'raw'),
+        "resolution": resolution,
+        "start_time": start_time.strftime('%Y-%m-%d %H:%M:%S'),
+        "end_time": end_time.strftime('%Y-%m-%d %H:%M:%S'),
+        "max_points": max_points,
+        "points_per_interface": points_per_interface,
+        "truncated": truncated,
+        "points": points
+    })
+
+@history_bp.route('/traffic/export', methods=['GET'])
+def export_historical_traffic():
+    """
+    流式导出历史流量数据。
+
+    查询参数:
+        format: ndjson(默认) / csv / columnar
+        start_time, end_time: ISO 8601 时间，可选
+        interface: 网络接口名，可选
+        host_id: Agent 主机 ID，可选；默认只导出本机流量
+    """
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ENCODERS:
+        return jsonify({"message": f"不支持的导出格式: {export_format}"}), 400
+
+    start_time = end_time = None
+    try:
+        if request.args.get('start_time'):
+            start_time = _to_naive_utc(datetime.fromisoformat(
+                request.args['start_time'].replace('Z', '+00:00')))
+        if request.args.get('end_time'):
+            end_time = _to_naive_utc(datetime.fromisoformat(
+                request.args['end_time'].replace('Z', '+00:00')))
+    except ValueError:
+        return jsonify({"message": "时间格式无效"}), 400
+
+    batches = iter_traffic_batches(
+        start_time, end_time,
+        interface=request.args.get('interface'),
+        chunk_size=current_app.config.get('TRAFFIC_EXPORT_CHUNK_SIZE', 2000),
+        host_id=request.args.get('host_id')
+    )
+    extension = 'bin' if export_format == 'columnar' else export_format
+    return Response(
+        stream_with_context(ENCODERS[export_format](batches)),
+        content_type=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename=traffic.{extension}'}
+    )
+
+@history_bp.route('/traffic/ingest-stats', methods=['GET'])
+def get_traffic_ingest_stats():
+    """获取流量写缓冲区指标(积压数量、写入延迟等)"""
+    return jsonify(get_writer().get_metrics())
+
+@history_bp.route('/traffic/recent', methods=['GET'])
+def get_recent_hires_traffic():
+    """获取高精度采样模式下内存中最近的细粒度采样"""
+    sampler = get_sampler()
+    if sampler is None:
+        return jsonify({"message": "未启用高精度采样模式"}), 404
+
+    interface = request.args.get('interface')
+    if not interface:
+        return jsonify({"message": "缺少 interface 参数"}), 400
+    seconds = min(max(request.args.get('seconds', 10, type=float), 0), 3600)
+
+    return jsonify({
+        "interface": interface,
+        "sampler": sampler.controller.get_metrics(),
+        "samples": sampler.recent(interface, seconds)
+    })
@@ -2,14 +2,18 @@
 监控路由模块
 处理WebSocket连接和流量/数据包监控任务的启动。
 """
-from flask import Blueprint, current_app, jsonify
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import decode_token, jwt_required
 from flask_socketio import join_room
 from extensions import socketio
-import extensions as ext
 
-from services.packet_sniffer import monitor_packets_task
-from services.traffic_monitor import monitor_traffic_task
+from services.agent_ingest import (
+    agent_session, authenticate_agent, close_agent_session, ensure_ingest_task, get_agent_ingest,
+    ingest_message, open_agent_session
+)
+from services.leader_election import ensure_monitoring_tasks
+from services.packet_sniffer import get_packet_detail
+from services.traffic_stream import get_traffic_stream
 
 monitoring_bp = Blueprint('monitoring', __name__)
 
@@ -32,13 +36,35 @@ def handle_client_event(data):
     # 转发主机状态更新 (用于 Dashboard 实时更新)
     socketio.emit('host_status', data)
 
+@socketio.on('agent_metrics')
+def handle_agent_metrics(data):
+    """
+    接收 Agent (agent.py --headless) 推送的指标批次，结果通过确认回调返回。
+    Agent 收到 {'ok': True} 后才会从本地缓冲中删除该批次。
+    只接受连接时已认证的 Agent，且只能上报自己的 host_id。
+    """
+    host_id = agent_session(request.sid)
+    if host_id is None:
+        get_agent_ingest().metrics['rejected'] += 1
+        return {'ok': False, 'error': '未认证的 Agent 连接'}
+    # pylint: disable=protected-access
+    ensure_ingest_task(current_app._get_current_object())
+    return ingest_message(data, host_id=host_id)
+
 @socketio.on('connect')
 def handle_connect(auth=None):
     """
     当客户端连接时，验证用户身份并将其加入私有房间，然后启动监控任务。
+    携带 host_id 的连接是 Agent，认证失败时拒绝连接。
     """
     user_id = None
-    if auth and 'token' in auth:
+    if auth and 'host_id' in auth:
+        host_id = authenticate_agent(auth, request.remote_addr, current_app.config)
+        if host_id is None:
+            print(f"Agent 认证失败: {auth.get('host_id')} ({request.remote_addr})")
+            return False
+        open_agent_session(request.sid, host_id)
+    elif auth and 'token' in auth:
         try:
             # 验证JWT令牌并获取用户ID
             token = auth['token'].split(' ')[1] if ' ' in auth['token'] else auth['token']
@@ -54,19 +80,11 @@ def handle_connect(auth=None):
     else:
         print("客户端连接未携带认证信息。")
 
-    # 启动后台监控任务（如果尚未启动）
+    # 启动后台监控任务（如果尚未启动；多进程部署时只由主进程启动）
     # pylint: disable=protected-access
-    if not ext._traffic_monitoring_task:
-        print("正在启动流量监控任务。")
-        socketio.start_background_task(
-            target=monitor_traffic_task,
-            app=current_app._get_current_object()
-        )
-        ext._traffic_monitoring_task = True
-    if not ext._packet_monitoring_task:
-        print("正在启动数据包嗅探任务。")
-        socketio.start_background_task(target=monitor_packets_task)
-        ext._packet_monitoring_task = True
+    ensure_monitoring_tasks(current_app._get_current_object())
+    # Agent 可能连接到任意进程，每个进程都运行接收任务
+    ensure_ingest_task(current_app._get_current_object())
 
 
 @monitoring_bp.route('/data')
@@ -75,25 +93,56 @@ def get_data():
     """获取初始数据"""
     # 确保任务正在运行
     # pylint: disable=protected-access
-    if not ext._traffic_monitoring_task:
-        print("正在启动流量监控任务。")
-        socketio.start_background_task(
-            target=monitor_traffic_task,
-            app=current_app._get_current_object()
-        )
-        ext._traffic_monitoring_task = True
-    if not ext._packet_monitoring_task:
-        print("正在启动数据包嗅探任务。")
-        socketio.start_background_task(target=monitor_packets_task)
-        ext._packet_monitoring_task = True
+    ensure_monitoring_tasks(current_app._get_current_object())
 
     return jsonify({"status": "monitoring_active"})
 
+@socketio.on('packet_detail')
+def handle_packet_detail(data):
+    """
+    前端请求某个数据包的详情时才进行完整的 Scapy 解析，结果通过确认回调返回。
+    """
+    packet_id = (data or {}).get('id')
+    detail = get_packet_detail(packet_id)
+    if detail is None:
+        return {'id': packet_id, 'error': '数据包已过期或不存在'}
+    return {'id': packet_id, 'detail': detail}
+
+@socketio.on('subscribe_traffic')
+def handle_subscribe_traffic(data):
+    """
+    订阅实时流量增量帧 ('traffic_delta')。
+
+    data: {'interfaces': [...], 'metrics': [...], 'min_interval_ms': 1000}，均可省略。
+    客户端需在 traffic_delta 的确认回调中应答，服务端收到确认后才会发送下一帧。
+    """
+    data = data or {}
+    interfaces = data.get('interfaces')
+    metrics = data.get('metrics')
+    for value in (interfaces, metrics):
+        if value is not None and (not isinstance(value, list)
+                                  or not all(isinstance(item, str) for item in value)):
+            return {'ok': False, 'error': 'interfaces/metrics 必须为字符串列表'}
+    try:
+        subscription = get_traffic_stream().subscribe(
+            request.sid, interfaces, metrics, data.get('min_interval_ms')
+        )
+    except (TypeError, ValueError):
+        return {'ok': False, 'error': 'min_interval_ms 无效'}
+    return {'ok': True, **subscription.to_dict()}
+
+@socketio.on('unsubscribe_traffic')
+def handle_unsubscribe_traffic():
+    """取消实时流量订阅"""
+    return {'ok': get_traffic_stream().unsubscribe(request.sid)}
+
 @socketio.on('disconnect')
 def handle_disconnect():
     """
     当客户端断开连接时触发。
     """
+    get_traffic_stream().unsubscribe(request.sid)
+    close_agent_session(request.sid)
     # 'leave_room' 在断开连接时不是必须的，因为房间会自动清理，
     # 但如果需要可以显式调用。
     print("日志: 客户端已断开WebSocket连接")
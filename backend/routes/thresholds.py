@@ -6,6 +6,31 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import Threshold
 from extensions import db
+from services.threshold_index import notify_threshold_changed
+from services.window_stats import AGGREGATIONS
+
+# 单个阈值的窗口长度上限(秒)
+MAX_WINDOW_SECONDS = 3600
+
+def _parse_window_options(data, threshold):
+    """
+    解析并校验聚合方式和窗口长度，写入阈值对象。
+
+    Raises:
+        ValueError: 参数无效
+    """
+    if 'aggregation' in data:
+        aggregation = data['aggregation'] or 'avg'
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"不支持的聚合方式: {aggregation}")
+        threshold.aggregation = aggregation
+    if 'window_seconds' in data:
+        window_seconds = data['window_seconds']
+        if window_seconds is not None:
+            window_seconds = int(window_seconds)
+            if not 1 <= window_seconds <= MAX_WINDOW_SECONDS:
+                raise ValueError("窗口长度超出范围")
+        threshold.window_seconds = window_seconds
 
 thresholds_bp = Blueprint('thresholds_bp', __name__)
 
@@ -18,6 +43,7 @@ def create_threshold():
 
     metric = data.get('metric')
     value = data.get('value')
+    interface = data.get('interface') or None
 
     if not all([metric, value]):
         return jsonify({"msg": "缺少指标或值"}), 400
@@ -26,10 +52,14 @@ def create_threshold():
         new_threshold = Threshold(
             user_id=user_id,
             metric=metric,
-            value=float(value)
+            value=float(value),
+            interface=interface,
+            aggregation='avg'
         )
+        _parse_window_options(data, new_threshold)
         db.session.add(new_threshold)
         db.session.commit()
+        notify_threshold_changed(new_threshold.id, new_threshold, reset_cooldown=False)
         return jsonify({"msg": "阈值创建成功", "id": new_threshold.id}), 201
     except (ValueError, TypeError):
         return jsonify({"msg": "提供的值无效"}), 400
@@ -49,6 +79,9 @@ def get_thresholds():
             "id": t.id,
             "metric": t.metric,
             "value": t.value,
+            "interface": t.interface,
+            "aggregation": t.aggregation,
+            "window_seconds": t.window_seconds,
             "is_enabled": t.is_enabled
         } for t in thresholds
     ])
@@ -67,8 +100,13 @@ def update_threshold(id):
             threshold.value = float(data['value'])
         if 'is_enabled' in data:
             threshold.is_enabled = bool(data['is_enabled'])
+        if 'interface' in data:
+            threshold.interface = data['interface'] or None
+        _parse_window_options(data, threshold)
 
         db.session.commit()
+        # 阈值条件已改变，重新开始冷却计算
+        notify_threshold_changed(threshold.id, threshold)
         return jsonify({"msg": "阈值更新成功"})
     except (ValueError, TypeError):
         return jsonify({"msg": "提供的值无效"}), 400
@@ -84,8 +122,10 @@ def delete_threshold(id):
     threshold = Threshold.query.filter_by(id=id, user_id=user_id).first_or_404()
 
     try:
+        threshold_id = threshold.id
         db.session.delete(threshold)
         db.session.commit()
+        notify_threshold_changed(threshold_id)
         return jsonify({"msg": "阈值删除成功"})
     except Exception as e: # pylint: disable=broad-exception-caught
         db.session.rollback()
@@ -0,0 +1,47 @@
+"""
+生产环境入口模块
+以协作式异步模式(eventlet/gevent)运行 Socket.IO 服务器，单进程即可承载数千个 WebSocket 连接。
+开发调试仍使用 app.py (线程模式 + Werkzeug)。
+
+用法:
+    SOCKETIO_ASYNC_MODE=eventlet python serve.py
+    SOCKETIO_ASYNC_MODE=gevent HOST=0.0.0.0 PORT=5001 python serve.py
+    SOCKETIO_MESSAGE_QUEUE=redis://localhost:6379/0 PORT=5002 python serve.py  # 多进程，需负载均衡开启会话保持
+"""
+import os
+
+ASYNC_MODE = os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'eventlet')
+
+# 必须在导入其他模块之前打补丁，使 socket/select/threading 变为协作式实现
+if ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+# pylint: disable=wrong-import-position
+from app import create_app
+from extensions import socketio
+from services.leader_election import ensure_monitoring_tasks
+
+
+def main():
+    """创建应用、启动后台任务并运行服务器"""
+    app = create_app(os.environ.get('APP_CONFIG', 'production'))
+
+    # 协作式模式下抓包默认放到独立进程，避免抓包循环占用事件循环
+    if ASYNC_MODE in ('eventlet', 'gevent') and 'CAPTURE_MODE' not in os.environ:
+        app.config['CAPTURE_MODE'] = 'process'
+
+    # 配置了消息队列时可以启动多个 serve.py 进程，只有选举出的主进程运行监控和抓包任务
+    ensure_monitoring_tasks(app)
+
+    host = os.environ.get('HOST', '127.0.0.1')
+    port = int(os.environ.get('PORT', 5001))
+    print(f"🚀 启动网络监控服务器 ({ASYNC_MODE}): http://{host}:{port}/")
+    socketio.run(app, host=host, port=port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,476 @@
+"""
+Agent 指标接收模块
+接收 agent.py --headless 推送的 'agent_metrics' 批次，维护每台主机的最新状态。
+
+- 批次为 zlib 压缩的 JSON，解压前后都有大小上限；结构和数值在入库前校验
+- 按 (host_id, seq) 去重: Agent 至少投递一次，断线重放的批次会被确认但不重复入库；
+  序号跳跃计入 gaps(Agent 磁盘缓冲溢出丢弃的批次)
+- 内存中的主机状态表保存最后上报时间、各接口当前速率和在线状态，
+  /api/clients/status 直接读取该表
+- 每个接口的平均速率通过流量写缓冲区批量写入 traffic 表，并标记 host_id
+- 离线检测使用时间轮: 每次上报把主机重新挂到 stale_after 秒之后的槽位，
+  推进时只检查到期槽位中的主机，代价与主机总数无关
+- 多进程部署时接收批次的进程通过内部事件把主机状态同步给其他 Web 进程，
+  只有最后接收该主机批次的进程负责推送上下线事件
+- Agent 在 Socket.IO 连接时认证(auth 中的 host_id 和 agent_token，或已注册主机的来源 IP)，
+  之后该连接只能上报自己的 host_id，未认证连接的批次在解码前拒绝
+"""
+import hmac
+import json
+import math
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from extensions import socketio
+from services.message_queue import on_worker_event, publish_worker_event
+from services.traffic_writer import get_writer
+from utils.xml_manager import get_registry
+
+PROTOCOL_VERSION = 1
+AGENT_STATE_EVENT = 'agent_state'
+COUNTER_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+                  'errin', 'errout', 'dropin', 'dropout')
+PEAK_FIELDS = ('peak_sent_rate', 'peak_recv_rate')
+MAX_INTERFACES = 256
+
+
+class BatchError(ValueError):
+    """批次格式无效"""
+
+
+def decode_batch(message, max_bytes=1 << 20):
+    """
+    解码并校验一条 'agent_metrics' 消息。
+
+    Args:
+        message (dict): {'v', 'host_id', 'seq', 'encoding': 'zlib+json', 'payload': bytes}
+        max_bytes (int): 压缩前后的大小上限
+
+    Returns:
+        dict: 校验后的批次
+
+    Raises:
+        BatchError: 格式无效
+    """
+    if not isinstance(message, dict):
+        raise BatchError('消息必须为对象')
+    if message.get('v') != PROTOCOL_VERSION:
+        raise BatchError(f"不支持的协议版本: {message.get('v')}")
+    if message.get('encoding') != 'zlib+json':
+        raise BatchError(f"不支持的编码: {message.get('encoding')}")
+    payload = message.get('payload')
+    if not isinstance(payload, (bytes, bytearray)) or len(payload) > max_bytes:
+        raise BatchError('payload 缺失或过大')
+
+    decompressor = zlib.decompressobj()
+    try:
+        raw = decompressor.decompress(payload, max_bytes)
+    except zlib.error as e:
+        raise BatchError(f'payload 解压失败: {e}') from e
+    if decompressor.unconsumed_tail:
+        raise BatchError('payload 解压后过大')
+    try:
+        batch = json.loads(raw.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise BatchError(f'payload 不是有效的 JSON: {e}') from e
+    if not isinstance(batch, dict):
+        raise BatchError('批次必须为对象')
+
+    host_id = batch.get('host_id')
+    if not isinstance(host_id, str) or not 0 < len(host_id) <= 64 or host_id != message.get('host_id'):
+        raise BatchError('host_id 无效或与消息头不一致')
+    seq = batch.get('seq')
+    if isinstance(seq, bool) or not isinstance(seq, int) or seq < 1 or seq != message.get('seq'):
+        raise BatchError('seq 无效或与消息头不一致')
+    start, end = batch.get('start'), batch.get('end')
+    if not all(_is_number(value) for value in (start, end)) or end < start:
+        raise BatchError('start/end 无效')
+
+    interfaces = batch.get('interfaces')
+    if not isinstance(interfaces, dict) or len(interfaces) > MAX_INTERFACES:
+        raise BatchError('interfaces 无效')
+    for name, values in interfaces.items():
+        if not 0 < len(name) <= 64 or not isinstance(values, dict):
+            raise BatchError(f'接口 {name!r} 无效')
+        for field in COUNTER_FIELDS + PEAK_FIELDS:
+            value = values.get(field, 0)
+            if not _is_number(value) or value < 0:
+                raise BatchError(f'接口 {name} 的 {field} 无效')
+    host_name = batch.get('host_name')
+    batch['host_name'] = host_name[:128] if isinstance(host_name, str) else host_id
+    return batch
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+class TimerWheel:
+    """
+    哈希时间轮。
+
+    每个键挂在截止时间所在的槽位上，重新调度时从旧槽位移除；
+    advance() 只遍历上次推进以来经过的槽位。截止时间超过一圈的键留在槽位中，
+    下一圈再检查。
+    """
+
+    def __init__(self, tick=1.0, slots=256):
+        self.tick = tick
+        self._slots = [set() for _ in range(max(1, int(slots)))]
+        self._deadlines = {}
+        self._cursor = None
+
+    def schedule(self, key, deadline):
+        """设置(或更新)键的截止时间"""
+        tick_no = math.ceil(deadline / self.tick)
+        if self._cursor is not None:
+            # 已经过去的槽位不会再被遍历
+            tick_no = max(tick_no, self._cursor + 1)
+        slot = tick_no % len(self._slots)
+        previous = self._deadlines.get(key)
+        if previous is not None and previous[1] != slot:
+            self._slots[previous[1]].discard(key)
+        self._slots[slot].add(key)
+        self._deadlines[key] = (deadline, slot)
+
+    def cancel(self, key):
+        """移除键"""
+        previous = self._deadlines.pop(key, None)
+        if previous is not None:
+            self._slots[previous[1]].discard(key)
+
+    def advance(self, now):
+        """
+        推进到 now，返回已到期的键。
+
+        Returns:
+            list: 到期的键(已从时间轮移除)
+        """
+        current = math.floor(now / self.tick)
+        if self._cursor is None:
+            self._cursor = current - len(self._slots)
+        ticks = range(max(self._cursor + 1, current - len(self._slots) + 1), current + 1)
+        self._cursor = max(self._cursor, current)
+        expired = []
+        for tick_no in ticks:
+            slot = self._slots[tick_no % len(self._slots)]
+            for key in [key for key in slot if self._deadlines[key][0] <= now]:
+                slot.discard(key)
+                del self._deadlines[key]
+                expired.append(key)
+        return expired
+
+    def __len__(self):
+        return len(self._deadlines)
+
+
+class HostState:
+    """单台主机的最新状态"""
+    __slots__ = ('host_id', 'host_name', 'status', 'last_seen', 'last_seq', 'last_end',
+                 'batches', 'gaps', 'duplicates', 'resets', 'rates', 'local')
+
+    def __init__(self, host_id, host_name):
+        self.host_id = host_id
+        self.host_name = host_name
+        self.status = 'up'
+        self.last_seen = None
+        self.last_seq = 0
+        self.last_end = 0
+        self.batches = 0
+        self.gaps = 0
+        self.duplicates = 0
+        self.resets = 0
+        self.rates = {}
+        # 是否由本进程接收该主机的最新批次(决定由谁推送上下线事件)
+        self.local = True
+
+    def to_dict(self):
+        """转换为可 JSON 序列化的字典"""
+        return {
+            'host_id': self.host_id,
+            'host_name': self.host_name,
+            'status': self.status,
+            'last_seen': self.last_seen,
+            'last_seq': self.last_seq,
+            'last_end': self.last_end,
+            'batches': self.batches,
+            'gaps': self.gaps,
+            'duplicates': self.duplicates,
+            'resets': self.resets,
+            'rates': self.rates
+        }
+
+
+class AgentIngest:
+    """
+    Agent 批次接收与主机状态表。
+
+    accept()/apply_remote()/expire() 由 Socket.IO 处理函数、内部事件监听任务
+    和接收任务并发调用，状态表由一把锁保护。
+    """
+
+    def __init__(self, stale_after=45, tick=1.0, max_hosts=10000):
+        self.stale_after = stale_after
+        self.max_hosts = max(1, int(max_hosts))
+        self._hosts = {}
+        self._wheel = TimerWheel(tick, slots=max(64, math.ceil(stale_after / tick) * 2))
+        self._lock = threading.Lock()
+        self.metrics = {'accepted': 0, 'duplicates': 0, 'rejected': 0, 'gaps': 0, 'went_down': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """根据应用配置创建"""
+        return cls(
+            stale_after=config.get('AGENT_STALE_SECONDS', 45),
+            tick=config.get('AGENT_WHEEL_TICK', 1),
+            max_hosts=config.get('AGENT_MAX_HOSTS', 10000)
+        )
+
+    def accept(self, batch, now=None):
+        """
+        更新主机状态。
+
+        Args:
+            batch (dict): decode_batch() 校验后的批次
+            now (float | None): 单调时钟时间
+
+        Returns:
+            tuple: (状态: 'accepted' / 'duplicate', 主机状态字典, 是否由离线/未知变为在线)
+
+        Raises:
+            BatchError: 主机数量已达上限
+        """
+        now = time.monotonic() if now is None else now
+        host_id, seq, end = batch['host_id'], batch['seq'], batch['end']
+        with self._lock:
+            host = self._hosts.get(host_id)
+            if host is None:
+                if len(self._hosts) >= self.max_hosts:
+                    raise BatchError('主机数量已达上限')
+                host = self._hosts[host_id] = HostState(host_id, batch['host_name'])
+                came_up = True
+            else:
+                came_up = host.status != 'up'
+
+            if seq <= host.last_seq:
+                if end <= host.last_end:
+                    # 断线重放的旧批次
+                    host.duplicates += 1
+                    self.metrics['duplicates'] += 1
+                    return 'duplicate', host.to_dict(), False
+                # Agent 丢失了本地序号(例如删除了缓冲目录)，从新序号重新开始
+                host.resets += 1
+            elif host.last_seq and seq > host.last_seq + 1:
+                host.gaps += seq - host.last_seq - 1
+                self.metrics['gaps'] += seq - host.last_seq - 1
+
+            elapsed = end - batch['start']
+            host.rates = {
+                name: {
+                    'bytes_sent_sec': round(values.get('bytes_sent', 0) / elapsed, 2) if elapsed else 0.0,
+                    'bytes_recv_sec': round(values.get('bytes_recv', 0) / elapsed, 2) if elapsed else 0.0,
+                    'peak_sent_rate': values.get('peak_sent_rate', 0),
+                    'peak_recv_rate': values.get('peak_recv_rate', 0)
+                }
+                for name, values in batch['interfaces'].items()
+            }
+            host.host_name = batch['host_name']
+            host.status = 'up'
+            host.last_seen = time.time()
+            host.last_seq, host.last_end = seq, end
+            host.batches += 1
+            host.local = True
+            self._wheel.schedule(host_id, now + self.stale_after)
+            self.metrics['accepted'] += 1
+            return 'accepted', host.to_dict(), came_up
+
+    def apply_remote(self, state, now=None):
+        """应用其他 Web 进程同步过来的主机状态"""
+        now = time.monotonic() if now is None else now
+        host_id = state['host_id']
+        with self._lock:
+            host = self._hosts.get(host_id)
+            if host is None:
+                if len(self._hosts) >= self.max_hosts:
+                    return
+                host = self._hosts[host_id] = HostState(host_id, state['host_name'])
+            for field in ('host_name', 'last_seen', 'last_seq', 'last_end', 'batches',
+                          'gaps', 'duplicates', 'resets', 'rates'):
+                setattr(host, field, state[field])
+            host.status = 'up'
+            host.local = False
+            self._wheel.schedule(host_id, now + self.stale_after)
+
+    def expire(self, now=None):
+        """
+        推进时间轮，把超时未上报的主机标记为离线。
+
+        Returns:
+            list: 本进程负责推送的、刚变为离线的主机状态字典
+        """
+        now = time.monotonic() if now is None else now
+        went_down = []
+        with self._lock:
+            for host_id in self._wheel.advance(now):
+                host = self._hosts.get(host_id)
+                if host is None or host.status == 'down':
+                    continue
+                host.status = 'down'
+                self.metrics['went_down'] += 1
+                if host.local:
+                    went_down.append(host.to_dict())
+        return went_down
+
+    def get_host(self, host_id):
+        """单台主机的状态字典，未上报过时返回 None"""
+        with self._lock:
+            host = self._hosts.get(str(host_id))
+            return host.to_dict() if host else None
+
+    def snapshot(self):
+        """全部主机的状态字典"""
+        with self._lock:
+            return [host.to_dict() for host in self._hosts.values()]
+
+    def get_metrics(self):
+        """接收指标"""
+        with self._lock:
+            up = sum(1 for host in self._hosts.values() if host.status == 'up')
+            return dict(self.metrics, hosts=len(self._hosts), up=up, scheduled=len(self._wheel))
+
+
+_ingest = AgentIngest()
+_task_started = False
+# Socket.IO 会话 ID -> 已认证的 host_id
+_agent_sessions = {}
+
+
+def configure_ingest(config):
+    """根据应用配置重建主机状态表"""
+    global _ingest # pylint: disable=global-statement
+    _ingest = AgentIngest.from_config(config)
+    return _ingest
+
+
+def get_agent_ingest():
+    """获取主机状态表"""
+    return _ingest
+
+
+def authenticate_agent(auth, remote_addr, config):
+    """
+    认证 Agent 连接。
+
+    配置了 AGENT_TOKENS 时 agent_token 必须与 host_id 对应的令牌一致；
+    否则 AGENT_REQUIRE_REGISTERED 为 True 时 host_id 必须已在 clients.xml 中注册，
+    且连接来源 IP 与注册的 IP 一致。
+
+    Args:
+        auth (dict): 连接时的 auth 数据 {'host_id', 'agent_token'}
+        remote_addr (str): 连接来源 IP
+        config: 应用配置
+
+    Returns:
+        str | None: 认证通过的 host_id
+    """
+    host_id = str(auth.get('host_id') or '')
+    if not host_id:
+        return None
+    tokens = config.get('AGENT_TOKENS') or {}
+    if tokens:
+        expected = tokens.get(host_id)
+        token = auth.get('agent_token')
+        if expected and isinstance(token, str) and hmac.compare_digest(expected.encode(), token.encode()):
+            return host_id
+        return None
+    if config.get('AGENT_REQUIRE_REGISTERED', True):
+        client = get_registry().get_client(host_id)
+        if client is None or client['ip'] != remote_addr:
+            return None
+    return host_id
+
+
+def open_agent_session(sid, host_id):
+    """记录已认证的 Agent 连接"""
+    _agent_sessions[sid] = host_id
+
+
+def close_agent_session(sid):
+    """Agent 连接断开"""
+    _agent_sessions.pop(sid, None)
+
+
+def agent_session(sid):
+    """连接认证的 host_id，未认证时为 None"""
+    return _agent_sessions.get(sid)
+
+
+def ingest_message(message, host_id=None):
+    """
+    处理一条 'agent_metrics' 消息(需在应用上下文中调用)。
+
+    Args:
+        message (dict): 'agent_metrics' 消息
+        host_id (str | None): 连接认证的 host_id，消息必须属于该主机
+
+    Returns:
+        dict: 发送给 Agent 的确认 {'ok': True, 'seq', 'duplicate'} 或 {'ok': False, 'error'}
+    """
+    config = current_app.config
+    try:
+        if host_id is not None and (not isinstance(message, dict) or str(message.get('host_id')) != host_id):
+            raise BatchError(f"连接只能上报主机 {host_id} 的批次")
+        batch = decode_batch(message, config.get('AGENT_MAX_BATCH_BYTES', 1 << 20))
+        verdict, state, came_up = _ingest.accept(batch)
+    except BatchError as e:
+        _ingest.metrics['rejected'] += 1
+        return {'ok': False, 'error': str(e)}
+
+    if verdict == 'duplicate':
+        return {'ok': True, 'seq': batch['seq'], 'duplicate': True}
+
+    created_at = datetime.fromtimestamp(batch['end'], timezone.utc)
+    writer = get_writer()
+    for interface, rate in state['rates'].items():
+        writer.add(interface, rate['bytes_sent_sec'], rate['bytes_recv_sec'], created_at,
+                   host_id=batch['host_id'])
+
+    publish_worker_event(AGENT_STATE_EVENT, state)
+    if came_up:
+        socketio.emit('agent_status', _status_event(state))
+    return {'ok': True, 'seq': batch['seq'], 'duplicate': False}
+
+
+def _status_event(state):
+    return {key: state[key] for key in ('host_id', 'host_name', 'status', 'last_seen')}
+
+
+@on_worker_event(AGENT_STATE_EVENT)
+def _apply_remote_state(state):
+    _ingest.apply_remote(state)
+
+
+def agent_ingest_task(app):
+    """后台任务: 推进离线检测时间轮，并写入积压的 Agent 流量数据"""
+    with app.app_context():
+        while True:
+            for state in _ingest.expire():
+                socketio.emit('agent_status', _status_event(state))
+            writer = get_writer()
+            if writer.should_flush():
+                writer.flush()
+            socketio.sleep(app.config.get('AGENT_WHEEL_TICK', 1))
+
+
+def ensure_ingest_task(app):
+    """每个 Web 进程启动一次接收任务(每个进程都可能有 Agent 连接)"""
+    global _task_started # pylint: disable=global-statement
+    if _task_started:
+        return
+    _task_started = True
+    configure_ingest(app.config)
+    socketio.start_background_task(agent_ingest_task, app)
@@ -0,0 +1,65 @@
+"""
+未读告警计数模块
+缓存每个用户的未读告警数，告警新增/合并或被标记已读时失效并通过 Socket.IO 推送
+'unread_count' 事件，前端无需轮询整个告警列表来计算角标。
+"""
+import threading
+import time
+
+from sqlalchemy import func
+
+from extensions import db, socketio
+from models import Alert
+
+
+class UnreadCounter:
+    """
+    未读告警计数缓存。
+
+    缓存条目在 ttl 秒后过期，多进程部署时其他进程的修改最迟在 ttl 后可见。
+    """
+
+    def __init__(self, ttl=30, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id, now=None):
+        """获取用户的未读告警数(需在应用上下文中调用)"""
+        user_id = int(user_id)
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            cached = self._cache.get(user_id)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        count = db.session.query(func.count(Alert.id)).filter(
+            Alert.user_id == user_id, Alert.is_read.is_(False)
+        ).scalar()
+        with self._lock:
+            if len(self._cache) >= self.max_entries:
+                self._cache = {key: value for key, value in self._cache.items() if value[1] > now}
+                if len(self._cache) >= self.max_entries:
+                    self._cache.clear()
+            self._cache[user_id] = (count, now + self.ttl)
+        return count
+
+    def invalidate(self, user_id):
+        """使缓存失效"""
+        with self._lock:
+            self._cache.pop(int(user_id), None)
+
+    def push(self, user_ids):
+        """重新计算并向用户房间推送未读数"""
+        for user_id in set(user_ids):
+            self.invalidate(user_id)
+            socketio.emit('unread_count', {'unread_count': self.get(user_id)}, room=str(user_id))
+
+
+_counter = UnreadCounter()
+
+
+def get_unread_counter():
+    """获取未读告警计数缓存"""
+    return _counter
@@ -0,0 +1,313 @@
+"""
+告警队列模块
+AlertManager.send_alert 只把告警放入内存队列，不访问数据库也不推送，
+采样循环的耗时不受数据库或通知渠道速度影响。独立的告警工作任务批量处理队列:
+
+1. 合并: 同一阈值/接口在合并窗口内的告警合并为一条记录并累加 count
+2. 批量写入: 新记录一次批量 INSERT，已有记录一次按主键批量 UPDATE
+3. 分发: 提交成功后把通知交给各通知渠道，失败的投递按退避重试。
+   Webhook/邮件等网络渠道放入投递队列，由独立的投递任务发送，
+   不可达的渠道不会推迟下一批告警写库
+"""
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import insert, update
+
+from extensions import db, socketio
+from models import Alert
+from services.alert_counters import get_unread_counter
+from services.alert_sinks import DeliveryQueue, SinkDispatcher, create_sinks
+
+AlertEvent = namedtuple(
+    'AlertEvent', ['user_id', 'message', 'level', 'threshold_id', 'interface', 'created_at']
+)
+
+# 合并时保留最高的级别
+LEVEL_ORDER = {'info': 0, 'warning': 1, 'error': 2}
+
+
+def _higher_level(a, b):
+    return a if LEVEL_ORDER.get(a, 1) >= LEVEL_ORDER.get(b, 1) else b
+
+
+def _as_utc(value):
+    # SQLite 读出的时间不带时区
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class _OpenAlert:
+    """合并窗口内仍可累加的告警记录"""
+    # pylint: disable=too-few-public-methods
+    __slots__ = ('id', 'first_seen', 'count', 'level')
+
+    def __init__(self, alert_id, first_seen, count, level):
+        self.id = alert_id
+        self.first_seen = first_seen
+        self.count = count
+        self.level = level
+
+
+class AlertQueue:
+    """
+    告警队列。
+
+    - put(): 入队，队列有界，积压超过 max_backlog 时丢弃最旧的告警
+    - process(): 取出最多 batch_size 条告警合并写库，返回待分发的通知
+    """
+
+    def __init__(self, coalesce_window=600, batch_size=200, max_backlog=10000):
+        self.coalesce_window = timedelta(seconds=coalesce_window)
+        self.batch_size = max(1, int(batch_size))
+        self.max_backlog = max(self.batch_size, int(max_backlog))
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._open = {}
+        self.metrics = {
+            'enqueued': 0,
+            'dropped': 0,
+            'coalesced': 0,
+            'inserted': 0,
+            'updated': 0,
+            'failed_batches': 0,
+            'last_batch_ms': 0.0
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        """根据应用配置创建告警队列"""
+        return cls(
+            coalesce_window=config.get('ALERT_COALESCE_WINDOW', 600),
+            batch_size=config.get('ALERT_BATCH_SIZE', 200),
+            max_backlog=config.get('ALERT_MAX_BACKLOG', 10000)
+        )
+
+    def put(self, user_id, message, level='warning', threshold_id=None, interface=None,
+            created_at=None):
+        """告警入队(O(1)，可在采样循环中调用)"""
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        event = AlertEvent(user_id, message, level, threshold_id, interface,
+                           created_at or datetime.now(timezone.utc))
+        with self._lock:
+            if len(self._queue) >= self.max_backlog:
+                self._queue.popleft()
+                self.metrics['dropped'] += 1
+            self._queue.append(event)
+            self.metrics['enqueued'] += 1
+
+    def backlog(self):
+        """待处理的告警数"""
+        return len(self._queue)
+
+    @staticmethod
+    def coalesce_key(event):
+        """合并键: 阈值告警按 (阈值, 接口)，其他告警按 (用户, 消息)"""
+        if event.threshold_id is not None:
+            return ('threshold', event.threshold_id, event.interface)
+        return ('message', event.user_id, event.message)
+
+    def process(self):
+        """
+        处理一批告警(需在应用上下文中调用)。
+
+        Returns:
+            list[dict]: 写入成功的告警通知，写入失败时为空列表(告警放回队列等待重试)
+        """
+        with self._lock:
+            events = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        if not events:
+            return []
+
+        started = time.perf_counter()
+        groups = {}
+        for event in events:
+            group = groups.get(self.coalesce_key(event))
+            if group is None:
+                groups[self.coalesce_key(event)] = {
+                    'event': event, 'count': 1, 'level': event.level
+                }
+            else:
+                group['event'] = event
+                group['count'] += 1
+                group['level'] = _higher_level(group['level'], event.level)
+        self.metrics['coalesced'] += len(events) - len(groups)
+
+        try:
+            notifications = self._write(groups)
+            db.session.commit()
+        except Exception as e: # pylint: disable=broad-exception-caught
+            db.session.rollback()
+            self.metrics['failed_batches'] += 1
+            current_app.logger.error(f"批量写入告警失败: {e}")
+            # 写入失败后合并状态不可信，丢弃后由数据库重新加载
+            self._open.clear()
+            with self._lock:
+                self._queue.extendleft(reversed(events))
+                while len(self._queue) > self.max_backlog:
+                    self._queue.popleft()
+                    self.metrics['dropped'] += 1
+            return []
+
+        self.metrics['last_batch_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return notifications
+
+    def _write(self, groups):
+        latest = max(group['event'].created_at for group in groups.values())
+        self._expire(latest)
+        self._load_open([key for key in groups if key[0] == 'threshold' and key not in self._open],
+                        latest)
+
+        inserts, updates, notifications = [], [], []
+        for key, group in groups.items():
+            event = group['event']
+            record = self._open.get(key)
+            if record is not None and event.created_at - record.first_seen < self.coalesce_window:
+                record.count += group['count']
+                record.level = _higher_level(record.level, group['level'])
+                updates.append({
+                    'id': record.id, 'count': record.count, 'level': record.level,
+                    'message': event.message, 'last_seen_at': event.created_at, 'is_read': False
+                })
+                notifications.append((key, group, record))
+            else:
+                inserts.append({
+                    'user_id': event.user_id, 'message': event.message, 'level': group['level'],
+                    'threshold_id': event.threshold_id, 'interface': event.interface,
+                    'count': group['count'], 'created_at': event.created_at,
+                    'last_seen_at': event.created_at
+                })
+                notifications.append((key, group, None))
+
+        if updates:
+            db.session.execute(update(Alert), updates)
+        ids = iter([])
+        if inserts:
+            ids = iter(db.session.scalars(
+                insert(Alert).returning(Alert.id, sort_by_parameter_order=True), inserts
+            ).all())
+        self.metrics['inserted'] += len(inserts)
+        self.metrics['updated'] += len(updates)
+
+        result = []
+        for key, group, record in notifications:
+            event = group['event']
+            if record is None:
+                record = _OpenAlert(next(ids), event.created_at, group['count'], group['level'])
+                self._open[key] = record
+            result.append({
+                'id': record.id,
+                'user_id': event.user_id,
+                'message': event.message,
+                'level': record.level,
+                'count': record.count,
+                'threshold_id': event.threshold_id,
+                'interface': event.interface,
+                'timestamp': event.created_at.isoformat()
+            })
+        return result
+
+    def _expire(self, now):
+        expired = [key for key, record in self._open.items()
+                   if now - record.first_seen >= self.coalesce_window]
+        for key in expired:
+            del self._open[key]
+
+    def _load_open(self, keys, now):
+        """从数据库加载合并窗口内的已有记录(进程重启后继续累加)"""
+        if not keys:
+            return
+        wanted = set(keys)
+        rows = db.session.query(
+            Alert.id, Alert.threshold_id, Alert.interface, Alert.count, Alert.level, Alert.created_at
+        ).filter(
+            Alert.threshold_id.in_({key[1] for key in keys}),
+            Alert.created_at >= (now - self.coalesce_window).replace(tzinfo=None)
+        ).order_by(Alert.created_at)
+        for row in rows:
+            key = ('threshold', row.threshold_id, row.interface)
+            if key in wanted:
+                self._open[key] = _OpenAlert(row.id, _as_utc(row.created_at), row.count or 1,
+                                             row.level)
+
+    def get_metrics(self):
+        """队列指标(含当前积压)"""
+        return dict(self.metrics, backlog=self.backlog())
+
+
+_queue = AlertQueue()
+_dispatcher = None
+_delivery = None
+
+
+def get_alert_queue():
+    """获取告警队列"""
+    return _queue
+
+
+def configure_alert_queue(config):
+    """根据应用配置重建告警队列和通知渠道，保留尚未处理的告警"""
+    global _queue, _dispatcher, _delivery # pylint: disable=global-statement
+    pending = list(_queue._queue) # pylint: disable=protected-access
+    _queue = AlertQueue.from_config(config)
+    _queue._queue.extend(pending) # pylint: disable=protected-access
+
+    retry_options = {
+        'max_attempts': config.get('ALERT_RETRY_MAX_ATTEMPTS', 5),
+        'backoff_initial': config.get('ALERT_RETRY_BACKOFF_INITIAL', 1),
+        'backoff_max': config.get('ALERT_RETRY_BACKOFF_MAX', 60)
+    }
+    sinks = create_sinks(config)
+    _dispatcher = SinkDispatcher([sink for sink in sinks if not sink.blocking], **retry_options)
+    network_sinks = [sink for sink in sinks if sink.blocking]
+    _delivery = DeliveryQueue(
+        SinkDispatcher(network_sinks, **retry_options),
+        max_backlog=config.get('ALERT_DELIVERY_MAX_BACKLOG', 1000)
+    ) if network_sinks else None
+    return _queue
+
+
+def get_alert_dispatcher():
+    """获取进程内通知渠道(socketio/log/stub)的分发器，告警工作任务启动前为 None"""
+    return _dispatcher
+
+
+def get_alert_delivery():
+    """获取网络通知渠道的投递队列，未配置网络渠道时为 None"""
+    return _delivery
+
+
+def alert_worker_task(app):
+    """告警工作任务: 定期合并写入队列中的告警并分发通知"""
+    configure_alert_queue(app.config)
+    interval = app.config.get('ALERT_FLUSH_INTERVAL', 1)
+    if _delivery is not None:
+        socketio.start_background_task(alert_delivery_task, app, _delivery)
+    with app.app_context():
+        while True:
+            while _queue.backlog():
+                failures = _queue.metrics['failed_batches']
+                notifications = _queue.process()
+                if _queue.metrics['failed_batches'] != failures:
+                    # 数据库暂不可用，告警已放回队列，下个周期重试
+                    break
+                for notification in notifications:
+                    _dispatcher.dispatch(notification)
+                    if _delivery is not None:
+                        _delivery.put(notification)
+                get_unread_counter().push(notification['user_id'] for notification in notifications)
+                socketio.sleep(0)
+            _dispatcher.retry_due()
+            db.session.remove()
+            socketio.sleep(interval)
+
+
+def alert_delivery_task(app, delivery):
+    """投递任务: 发送投递队列中的通知(可能因网络超时阻塞数秒)"""
+    interval = app.config.get('ALERT_FLUSH_INTERVAL', 1)
+    with app.app_context():
+        while True:
+            delivery.run_once()
+            socketio.sleep(interval)
@@ -0,0 +1,257 @@
+"""
+告警通知渠道模块
+告警写入数据库后由告警工作任务分发到各通知渠道:
+
+- socketio: 推送到用户房间(前端实时提示)
+- log: 写入应用日志(默认只记录 error 级别)
+- webhook: POST JSON 到配置的 URL
+- email: 通过 SMTP 发送邮件
+- stub: 只保存在内存中并打印，用于本地开发和测试
+
+发送失败的通知按指数退避重试，超过最大次数后丢弃并计数。
+webhook 和 email 是可能阻塞数秒的网络渠道(blocking)，由 DeliveryQueue 在独立的投递任务中发送，
+不会推迟告警写库和 Socket.IO 推送。
+"""
+import heapq
+import itertools
+import json
+import smtplib
+import threading
+import time
+import urllib.request
+from collections import deque
+from email.message import EmailMessage
+
+from flask import current_app
+
+from extensions import socketio
+
+
+class AlertSink:
+    """通知渠道基类"""
+    name = 'base'
+    # 发送时是否可能因网络 I/O 阻塞(这类渠道在独立的投递任务中发送)
+    blocking = False
+
+    def __init__(self, levels=None):
+        # 只处理这些级别的告警，None 表示全部
+        self.levels = frozenset(levels) if levels else None
+
+    def accepts(self, notification):
+        """是否处理该告警"""
+        return self.levels is None or notification['level'] in self.levels
+
+    def send(self, notification):
+        """发送通知，失败时抛出异常"""
+        raise NotImplementedError
+
+
+class SocketIOSink(AlertSink):
+    """推送到用户的 Socket.IO 房间"""
+    name = 'socketio'
+
+    def send(self, notification):
+        # 客户端以 JWT 中的字符串用户 ID 加入房间
+        socketio.emit('alert', notification, room=str(notification['user_id']))
+
+
+class LogSink(AlertSink):
+    """记录到应用日志"""
+    name = 'log'
+
+    def send(self, notification):
+        current_app.logger.critical(
+            f"用户 {notification['user_id']} 的严重告警: {notification['message']}"
+            f" (累计 {notification['count']} 次)"
+        )
+
+
+class WebhookSink(AlertSink):
+    """以 JSON POST 到 Webhook"""
+    name = 'webhook'
+    blocking = True
+
+    def __init__(self, url, timeout=5, levels=None):
+        super().__init__(levels)
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, notification):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(notification, ensure_ascii=False).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class EmailSink(AlertSink):
+    """通过 SMTP 发送邮件"""
+    name = 'email'
+    blocking = True
+
+    def __init__(self, host, port, sender, recipients, timeout=10, levels=None):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        super().__init__(levels)
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = list(recipients)
+        self.timeout = timeout
+
+    def send(self, notification):
+        message = EmailMessage()
+        message['Subject'] = f"[网络监控][{notification['level']}] {notification['message'][:80]}"
+        message['From'] = self.sender
+        message['To'] = ', '.join(self.recipients)
+        message.set_content(json.dumps(notification, ensure_ascii=False, indent=2))
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            smtp.send_message(message)
+
+
+class StubSink(AlertSink):
+    """本地替身: 保存最近的通知并打印"""
+    name = 'stub'
+
+    def __init__(self, levels=None, capacity=100):
+        super().__init__(levels)
+        self.capacity = capacity
+        self.sent = []
+
+    def send(self, notification):
+        self.sent.append(notification)
+        del self.sent[:-self.capacity]
+        print(f"📣 [stub] {notification['level']}: {notification['message']} x{notification['count']}")
+
+
+class SinkDispatcher:
+    """
+    把通知分发到各渠道，失败的投递按指数退避进入重试堆。
+    """
+
+    def __init__(self, sinks, max_attempts=5, backoff_initial=1, backoff_max=60):
+        self.sinks = list(sinks)
+        self.max_attempts = max_attempts
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self._retries = []
+        self._counter = itertools.count()
+        self.metrics = {'sent': 0, 'failed': 0, 'retried': 0, 'dropped': 0}
+
+    def dispatch(self, notification, now=None):
+        """分发一条通知到所有接受它的渠道"""
+        now = time.monotonic() if now is None else now
+        for sink in self.sinks:
+            if sink.accepts(notification):
+                self._attempt(sink, notification, 1, now)
+
+    def retry_due(self, now=None):
+        """
+        重试到期的投递。
+
+        Returns:
+            int: 本次重试的投递数
+        """
+        now = time.monotonic() if now is None else now
+        retried = 0
+        while self._retries and self._retries[0][0] <= now:
+            _, _, sink, notification, attempt = heapq.heappop(self._retries)
+            self.metrics['retried'] += 1
+            self._attempt(sink, notification, attempt, now)
+            retried += 1
+        return retried
+
+    def pending_retries(self):
+        """等待重试的投递数"""
+        return len(self._retries)
+
+    def _attempt(self, sink, notification, attempt, now):
+        try:
+            sink.send(notification)
+        except Exception as e: # pylint: disable=broad-exception-caught
+            self.metrics['failed'] += 1
+            if attempt >= self.max_attempts:
+                self.metrics['dropped'] += 1
+                current_app.logger.error(f"告警通知渠道 {sink.name} 投递失败，已放弃: {e}")
+                return
+            delay = min(self.backoff_initial * 2 ** (attempt - 1), self.backoff_max)
+            heapq.heappush(self._retries,
+                           (now + delay, next(self._counter), sink, notification, attempt + 1))
+            return
+        self.metrics['sent'] += 1
+
+
+class DeliveryQueue:
+    """
+    网络通知渠道的投递队列。
+
+    告警工作任务只调用 put() 入队；投递任务调用 run_once() 发送积压的通知和到期的重试。
+    队列有界，积压超过 max_backlog 时丢弃最旧的通知。
+    """
+
+    def __init__(self, dispatcher, max_backlog=1000):
+        self.dispatcher = dispatcher
+        self.max_backlog = max(1, int(max_backlog))
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self.metrics = {'queued': 0, 'dropped': 0}
+
+    def put(self, notification):
+        """通知入队(不发送)"""
+        with self._lock:
+            if len(self._queue) >= self.max_backlog:
+                self._queue.popleft()
+                self.metrics['dropped'] += 1
+            self._queue.append(notification)
+            self.metrics['queued'] += 1
+
+    def backlog(self):
+        """等待投递的通知数"""
+        return len(self._queue)
+
+    def run_once(self, now=None):
+        """
+        发送当前积压的通知并重试到期的投递。
+
+        Returns:
+            int: 本次处理的通知数(不含重试)
+        """
+        with self._lock:
+            pending = list(self._queue)
+            self._queue.clear()
+        for notification in pending:
+            self.dispatcher.dispatch(notification, now)
+        self.dispatcher.retry_due(now)
+        return len(pending)
+
+    def get_metrics(self):
+        """投递队列指标"""
+        return dict(self.dispatcher.metrics, **self.metrics, backlog=self.backlog(),
+                    pending_retries=self.dispatcher.pending_retries())
+
+
+def create_sinks(config):
+    """
+    根据应用配置创建通知渠道。
+
+    socketio 和 log 渠道始终启用，ALERT_SINKS 列出额外渠道(webhook/email/stub)；
+    ALERT_SINK_LEVELS 可按渠道限制告警级别，例如 {'email': ['error']}。
+    """
+    levels = config.get('ALERT_SINK_LEVELS') or {}
+    sinks = [SocketIOSink(), LogSink(levels.get('log', ['error']))]
+    for name in config.get('ALERT_SINKS') or []:
+        if name == 'webhook' and config.get('ALERT_WEBHOOK_URL'):
+            sinks.append(WebhookSink(config['ALERT_WEBHOOK_URL'], levels=levels.get(name)))
+        elif name == 'email' and config.get('ALERT_SMTP_HOST') and config.get('ALERT_EMAIL_TO'):
+            sinks.append(EmailSink(
+                config['ALERT_SMTP_HOST'], config.get('ALERT_SMTP_PORT', 25),
+                config.get('ALERT_EMAIL_FROM', 'network-monitor@localhost'),
+                config['ALERT_EMAIL_TO'], levels=levels.get(name)
+            ))
+        elif name == 'stub':
+            sinks.append(StubSink(levels.get(name)))
+        else:
+            raise ValueError(f"告警通知渠道 {name} 未知或缺少配置")
+    return sinks
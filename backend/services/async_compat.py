@@ -0,0 +1,78 @@
+"""
+异步模式兼容模块
+Socket.IO 运行在 eventlet/gevent 协作式模式时，阻塞的系统调用会卡住所有连接。
+这里提供在线程模式和协作式模式下都不会阻塞事件循环的等待原语。
+"""
+import select
+
+from extensions import socketio
+
+COOPERATIVE_MODES = ('eventlet', 'gevent')
+
+
+def get_async_mode():
+    """当前 Socket.IO 异步模式，未初始化(例如抓包工作进程中)时为 None"""
+    return getattr(socketio, 'async_mode', None)
+
+
+def is_cooperative():
+    """是否运行在协作式(绿色线程)模式"""
+    return get_async_mode() in COOPERATIVE_MODES
+
+
+class _WaitTimeout(Exception):
+    """eventlet trampoline 超时"""
+
+
+def readable_waiter(fd):
+    """
+    返回等待文件描述符可读的函数 wait(timeout) -> bool。
+
+    协作式模式下让出当前绿色线程直到可读，线程模式下使用 poll 阻塞当前线程。
+
+    Args:
+        fd (int): 文件描述符
+    """
+    mode = get_async_mode()
+    if mode == 'eventlet':
+        # pylint: disable=import-outside-toplevel
+        from eventlet.hubs import trampoline
+
+        def wait(timeout):
+            try:
+                trampoline(fd, read=True, timeout=timeout, timeout_exc=_WaitTimeout)
+            except _WaitTimeout:
+                return False
+            return True
+        return wait
+
+    if mode == 'gevent':
+        # pylint: disable=import-outside-toplevel
+        from gevent.socket import wait_read
+
+        def wait(timeout):
+            try:
+                wait_read(fd, timeout)
+            except OSError:
+                return False
+            return True
+        return wait
+
+    poller = select.poll()
+    poller.register(fd, select.POLLIN | select.POLLERR)
+
+    def wait(timeout):
+        return bool(poller.poll(None if timeout is None else timeout * 1000))
+    return wait
+
+
+def cooperative_yield():
+    """
+    返回主动让出事件循环的函数。
+
+    协作式模式下长时间不阻塞的循环(例如持续有包到达的抓包循环)需要定期调用，
+    线程模式下为空操作。
+    """
+    if is_cooperative():
+        return lambda: socketio.sleep(0)
+    return lambda: None
@@ -0,0 +1,344 @@
+"""
+抓包后端模块
+提供可插拔的抓包实现:
+- ScapyBackend: 使用 scapy.sniff，每个数据包都会被完整解析为 Scapy 分层对象
+- AFPacketBackend: 直接读取 AF_PACKET 原始套接字(可选 TPACKET_V3 mmap 环形缓冲区)，
+  在内核中执行编译后的 BPF 过滤器，只用 struct 解析 L2/L3/L4 头部
+- PcapReplayBackend(services.pcap_replay): 离线回放 pcap 文件，用于测试和基准测试
+
+yields_frames 为 True 的后端以 (frame, timestamp) 回调原始帧，否则回调 Scapy 数据包对象。
+"""
+import mmap
+import socket
+import struct
+import time
+from collections import namedtuple
+
+import scapy.all as scapy
+
+from services.async_compat import cooperative_yield, readable_waiter
+
+# 协作式异步模式下每处理多少帧让出一次事件循环
+_YIELD_EVERY_FRAMES = 256
+
+# pylint: disable=no-member
+
+ETH_P_ALL = 0x0003
+ETH_P_IP = 0x0800
+ETH_P_ARP = 0x0806
+ETH_P_8021Q = 0x8100
+ETH_P_8021AD = 0x88A8
+ETH_P_IPV6 = 0x86DD
+
+# linux/if_packet.h
+SOL_PACKET = 263
+PACKET_RX_RING = 5
+PACKET_VERSION = 10
+TPACKET_V3 = 2
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+TP_FT_REQ_FILL_RXHASH = 1
+
+_ETH_HEADER = struct.Struct('!6s6sH')
+_VLAN_TAG = struct.Struct('!HH')
+_IPV4_HEADER = struct.Struct('!BBHHHBBH4s4s')
+_IPV6_HEADER = struct.Struct('!IHBB16s16s')
+_PORTS = struct.Struct('!HH')
+_ARP_ADDRS = struct.Struct('!14x4s6x4s')
+# tpacket_block_desc: version, offset_to_priv, block_status, num_pkts, offset_to_first_pkt
+_BLOCK_DESC = struct.Struct('=IIIII')
+# tpacket3_hdr: tp_next_offset, tp_sec, tp_nsec, tp_snaplen, tp_len, tp_status, tp_mac, tp_net
+_TPACKET3_HDR = struct.Struct('=IIIIIIHH')
+_TPACKET_REQ3 = struct.Struct('=IIIIIII')
+
+FrameHeaders = namedtuple(
+    'FrameHeaders',
+    ['ethertype', 'ip_proto', 'src', 'dst', 'sport', 'dport', 'length']
+)
+
+_IP_PROTO_NAMES = {1: 'ICMP', 6: 'TCP', 17: 'UDP', 58: 'ICMPv6'}
+# IPv6 扩展头部: 逐跳选项、路由、分片、认证、目的选项
+_IPV6_EXT_HEADERS = frozenset((0, 43, 44, 51, 60))
+
+
+def parse_headers(frame):
+    """
+    只解析以太网/IP/传输层头部。
+
+    Args:
+        frame (bytes | memoryview): 以太网帧原始字节
+
+    Returns:
+        FrameHeaders | None: 解析结果；帧过短时返回 None。
+        src/dst 为原始地址字节，非 TCP/UDP 时端口为 0。
+    """
+    length = len(frame)
+    if length < 14:
+        return None
+
+    _, _, ethertype = _ETH_HEADER.unpack_from(frame, 0)
+    offset = 14
+    # 跳过 802.1Q / 802.1ad 标签
+    while ethertype in (ETH_P_8021Q, ETH_P_8021AD) and length >= offset + 4:
+        _, ethertype = _VLAN_TAG.unpack_from(frame, offset)
+        offset += 4
+
+    ip_proto = 0
+    src = dst = b''
+    sport = dport = 0
+
+    if ethertype == ETH_P_IP and length >= offset + 20:
+        ver_ihl, _, _, _, frag, _, ip_proto, _, src, dst = _IPV4_HEADER.unpack_from(frame, offset)
+        offset += (ver_ihl & 0x0F) * 4
+        if frag & 0x1FFF:
+            # 非首个分片不含传输层头部
+            return FrameHeaders(ethertype, ip_proto, src, dst, 0, 0, length)
+    elif ethertype == ETH_P_IPV6 and length >= offset + 40:
+        _, _, ip_proto, _, src, dst = _IPV6_HEADER.unpack_from(frame, offset)
+        offset += 40
+        # 跳过扩展头部，找到真正的上层协议
+        while ip_proto in _IPV6_EXT_HEADERS and length >= offset + 8:
+            next_proto, ext_len = frame[offset], frame[offset + 1]
+            if ip_proto == 44:
+                if (frame[offset + 2] << 8 | frame[offset + 3]) & 0xFFF8:
+                    return FrameHeaders(ethertype, next_proto, src, dst, 0, 0, length)
+                offset += 8
+            elif ip_proto == 51:
+                offset += (ext_len + 2) * 4
+            else:
+                offset += (ext_len + 1) * 8
+            ip_proto = next_proto
+    elif ethertype == ETH_P_ARP and length >= offset + 28:
+        src, dst = _ARP_ADDRS.unpack_from(frame, offset)
+        return FrameHeaders(ethertype, 0, src, dst, 0, 0, length)
+    else:
+        return FrameHeaders(ethertype, 0, src, dst, 0, 0, length)
+
+    if ip_proto in (6, 17) and length >= offset + 4:
+        sport, dport = _PORTS.unpack_from(frame, offset)
+
+    return FrameHeaders(ethertype, ip_proto, src, dst, sport, dport, length)
+
+
+def _format_address(addr):
+    if len(addr) == 4:
+        return socket.inet_ntoa(addr)
+    if len(addr) == 16:
+        return socket.inet_ntop(socket.AF_INET6, addr)
+    return addr.hex()
+
+
+def format_summary(headers):
+    """根据头部解析结果生成与 Scapy summary() 风格相近的简短摘要"""
+    if headers.ethertype == ETH_P_ARP:
+        return f"Ether / ARP {_format_address(headers.src)} > {_format_address(headers.dst)}"
+
+    if not headers.src:
+        return f"Ether / type 0x{headers.ethertype:04x} / {headers.length} bytes"
+
+    layer3 = 'IP' if headers.ethertype == ETH_P_IP else 'IPv6'
+    proto = _IP_PROTO_NAMES.get(headers.ip_proto, f"proto {headers.ip_proto}")
+    src = _format_address(headers.src)
+    dst = _format_address(headers.dst)
+    if headers.sport or headers.dport:
+        return f"Ether / {layer3} / {proto} {src}:{headers.sport} > {dst}:{headers.dport}"
+    return f"Ether / {layer3} / {proto} {src} > {dst}"
+
+
+def dissect(frame):
+    """需要数据包详情时才使用 Scapy 做完整解析"""
+    return scapy.Ether(bytes(frame))
+
+
+class ScapyBackend:
+    """基于 scapy.sniff 的抓包后端(兼容原实现)"""
+
+    name = 'scapy'
+    yields_frames = False
+
+    def __init__(self, iface=None, bpf_filter=None):
+        self.iface = iface
+        self.bpf_filter = bpf_filter
+
+    def run(self, packet_handler):
+        """
+        开始抓包。
+
+        Args:
+            packet_handler (callable): 接收 Scapy 数据包对象的回调
+        """
+        kwargs = {'prn': packet_handler, 'store': False}
+        if self.iface:
+            kwargs['iface'] = self.iface
+        if self.bpf_filter:
+            kwargs['filter'] = self.bpf_filter
+        scapy.sniff(**kwargs)
+
+
+class AFPacketBackend:
+    """
+    基于 AF_PACKET 原始套接字的快速抓包后端(仅限 Linux)。
+
+    BPF 过滤器在内核中执行，不匹配的数据包不会复制到用户态。
+    启用 use_mmap 时使用 TPACKET_V3 环形缓冲区，按块批量读取数据包，
+    避免每个数据包一次 recv 系统调用。
+    """
+
+    name = 'afpacket'
+    yields_frames = True
+
+    def __init__(self, iface=None, bpf_filter=None, use_mmap=True,
+                 block_size=1 << 20, block_count=64, frame_size=2048, block_timeout_ms=100):
+        self.iface = iface
+        self.bpf_filter = bpf_filter
+        self.use_mmap = use_mmap
+        self.block_size = block_size
+        self.block_count = block_count
+        self.frame_size = frame_size
+        self.block_timeout_ms = block_timeout_ms
+        self._sock = None
+        self._ring = None
+
+    def open(self):
+        """创建原始套接字，绑定接口，附加 BPF 过滤器并按需建立环形缓冲区"""
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            if self.iface:
+                sock.bind((self.iface, 0))
+            if self.bpf_filter:
+                # pylint: disable=import-outside-toplevel
+                from scapy.arch.linux import attach_filter
+                attach_filter(sock, self.bpf_filter, self.iface)
+            if self.use_mmap:
+                self._setup_ring(sock)
+        except Exception:
+            sock.close()
+            raise
+        self._sock = sock
+        return self
+
+    def _setup_ring(self, sock):
+        sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+        frame_nr = (self.block_size // self.frame_size) * self.block_count
+        req = _TPACKET_REQ3.pack(
+            self.block_size, self.block_count, self.frame_size, frame_nr,
+            self.block_timeout_ms, 0, TP_FT_REQ_FILL_RXHASH
+        )
+        sock.setsockopt(SOL_PACKET, PACKET_RX_RING, req)
+        self._ring = mmap.mmap(
+            sock.fileno(), self.block_size * self.block_count,
+            mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE
+        )
+
+    def close(self):
+        """释放环形缓冲区和套接字"""
+        if self._ring is not None:
+            try:
+                self._ring.close()
+            except BufferError:
+                # 回调异常的 traceback 仍引用环形缓冲区中的帧，交由垃圾回收释放
+                pass
+            self._ring = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def run(self, frame_handler):
+        """
+        开始抓包。
+
+        Args:
+            frame_handler (callable): 接收 (frame, timestamp) 的回调；
+                frame 为 memoryview，仅在回调期间有效，需要保留时应复制为 bytes
+        """
+        if self._sock is None:
+            self.open()
+        try:
+            if self._ring is not None:
+                self._run_ring(frame_handler)
+            else:
+                self._run_recv(frame_handler)
+        finally:
+            self.close()
+
+    def _run_recv(self, frame_handler):
+        buf = bytearray(65536)
+        view = memoryview(buf)
+        recv_into = self._sock.recv_into
+        yield_now = cooperative_yield()
+        received = 0
+        while True:
+            size = recv_into(buf)
+            frame_handler(view[:size], time.time())
+            received += 1
+            if received % _YIELD_EVERY_FRAMES == 0:
+                yield_now()
+
+    def _run_ring(self, frame_handler):
+        ring = self._ring
+        view = memoryview(ring)
+        # 协作式异步模式下等待期间让出事件循环
+        wait = readable_waiter(self._sock.fileno())
+        block = 0
+        try:
+            self._poll_ring(ring, view, wait, block, frame_handler)
+        finally:
+            view.release()
+
+    def _poll_ring(self, ring, view, wait, block, frame_handler):
+        timeout = self.block_timeout_ms / 1000
+        yield_now = cooperative_yield()
+        while True:
+            block_offset = block * self.block_size
+            _, _, status, num_pkts, first = _BLOCK_DESC.unpack_from(ring, block_offset)
+            if not status & TP_STATUS_USER:
+                wait(timeout)
+                continue
+
+            offset = block_offset + first
+            for _ in range(num_pkts):
+                next_offset, sec, nsec, snaplen, _, _, mac, _ = _TPACKET3_HDR.unpack_from(ring, offset)
+                start = offset + mac
+                frame_handler(view[start:start + snaplen], sec + nsec / 1e9)
+                offset += next_offset
+
+            # 将块归还给内核
+            struct.pack_into('=I', ring, block_offset + 8, TP_STATUS_KERNEL)
+            block = (block + 1) % self.block_count
+            yield_now()
+
+
+def create_backend(config):
+    """
+    根据配置创建抓包后端。
+
+    Args:
+        config (dict): 应用配置
+
+    Returns:
+        ScapyBackend | AFPacketBackend | PcapReplayBackend: 抓包后端实例
+    """
+    backend = config.get('CAPTURE_BACKEND', 'scapy')
+    iface = config.get('CAPTURE_INTERFACE')
+    bpf_filter = config.get('CAPTURE_BPF_FILTER')
+
+    if backend == 'afpacket':
+        return AFPacketBackend(
+            iface=iface,
+            bpf_filter=bpf_filter,
+            use_mmap=config.get('CAPTURE_USE_MMAP_RING', True),
+            block_size=config.get('CAPTURE_RING_BLOCK_SIZE', 1 << 20),
+            block_count=config.get('CAPTURE_RING_BLOCK_COUNT', 64),
+            frame_size=config.get('CAPTURE_RING_FRAME_SIZE', 2048)
+        )
+    if backend == 'scapy':
+        return ScapyBackend(iface=iface, bpf_filter=bpf_filter)
+    if backend == 'pcap':
+        # pylint: disable=import-outside-toplevel
+        from services.pcap_replay import PcapReplayBackend
+        return PcapReplayBackend(
+            path=config.get('CAPTURE_PCAP_FILE'),
+            loops=config.get('CAPTURE_REPLAY_LOOPS', 1),
+            as_packets=config.get('CAPTURE_REPLAY_AS_PACKETS', False)
+        )
+    raise ValueError(f"未知的抓包后端: {backend}")
@@ -0,0 +1,187 @@
+"""
+抓包进程监管模块
+在 Web 进程中启动每个接口一个的抓包工作进程，接收它们发送的聚合结果并负责广播，
+工作进程崩溃时按指数退避自动重启；以退出码 0 退出(例如 pcap 回放结束)的工作进程不再重启。
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+from multiprocessing.connection import Listener
+
+from extensions import socketio
+import extensions as ext
+from services.async_compat import readable_waiter
+from services.capture_worker import capture_worker_main
+from services.packet_sniffer import (
+    configure_pipeline, report_sniffer_error, send_protocol_counts_task, start_top_talkers_task
+)
+
+# pylint: disable=protected-access
+
+RESTART_BACKOFF_INITIAL = 1
+RESTART_BACKOFF_MAX = 30
+# 工作进程持续运行超过该时间后重置退避时间
+STABLE_RUN_SECONDS = 60
+
+
+class CaptureSupervisor:
+    """抓包工作进程监管器"""
+
+    def __init__(self, app):
+        config = app.config
+        interfaces = config.get('CAPTURE_INTERFACES') or [config.get('CAPTURE_INTERFACE')]
+        # 标识 -> 接口名 (None 表示所有接口)
+        self.interfaces = {iface or 'all': iface for iface in interfaces}
+        self.affinity = config.get('CAPTURE_CPU_AFFINITY') or {}
+        self.worker_config = {
+            key: value for key, value in config.items()
+            if key.startswith(('CAPTURE_', 'PACKET_', 'FLOW_', 'TOP_TALKERS_'))
+        }
+        self.address = config.get('CAPTURE_SOCKET_PATH') or os.path.join(
+            tempfile.gettempdir(), f"netmon-capture-{os.getpid()}.sock"
+        )
+        self.authkey = os.urandom(16)
+        self.pipeline = configure_pipeline(config, track_flows=False)
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._workers = {}
+        self._last_counts = {}
+        self._listener = None
+        self._running = False
+
+    def start(self):
+        """启动监听、全部工作进程以及广播和监管任务"""
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        self._running = True
+
+        socketio.start_background_task(self._accept_loop)
+        for label in self.interfaces:
+            self._spawn(label)
+
+        ext._packet_monitoring_task = True
+        socketio.start_background_task(send_protocol_counts_task)
+        socketio.start_background_task(self.pipeline.emitter.run)
+        start_top_talkers_task(self.worker_config)
+        socketio.start_background_task(self.supervise)
+
+    def stop(self):
+        """终止所有工作进程并清理套接字"""
+        self._running = False
+        for worker in self._workers.values():
+            process = worker['process']
+            if process is not None and process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def _spawn(self, label):
+        worker = self._workers.setdefault(label, {
+            'process': None, 'started_at': 0, 'restarts': 0,
+            'backoff': RESTART_BACKOFF_INITIAL, 'next_start': 0, 'finished': False
+        })
+        process = self._ctx.Process(
+            target=capture_worker_main,
+            args=(
+                label, self.interfaces[label], self.address, self.authkey,
+                self.worker_config, self.affinity.get(label)
+            ),
+            name=f"capture-{label}",
+            daemon=True
+        )
+        process.start()
+        worker['process'] = process
+        worker['started_at'] = time.time()
+        print(f"抓包工作进程已启动: {label} (pid={process.pid})")
+
+    def supervise(self):
+        """检查工作进程状态，崩溃时按指数退避重启"""
+        while self._running:
+            self.check_workers(time.time())
+            socketio.sleep(1)
+
+    def check_workers(self, now):
+        """检查一次全部工作进程"""
+        for label, worker in self._workers.items():
+            if worker['finished']:
+                continue
+            process = worker['process']
+            if process is not None and process.is_alive():
+                if now - worker['started_at'] > STABLE_RUN_SECONDS:
+                    worker['backoff'] = RESTART_BACKOFF_INITIAL
+                continue
+
+            if process is not None and process.exitcode == 0:
+                print(f"抓包工作进程 {label} 已结束")
+                process.join(timeout=0)
+                worker['process'] = None
+                worker['finished'] = True
+            elif process is not None:
+                print(f"抓包工作进程 {label} 已退出 (exitcode={process.exitcode})，"
+                      f"{worker['backoff']} 秒后重启")
+                process.join(timeout=0)
+                worker['process'] = None
+                worker['next_start'] = now + worker['backoff']
+                worker['backoff'] = min(worker['backoff'] * 2, RESTART_BACKOFF_MAX)
+            elif now >= worker['next_start']:
+                worker['restarts'] += 1
+                self._spawn(label)
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if not self._running:
+                    return
+                continue
+            socketio.start_background_task(self._receive_loop, conn)
+
+    def _receive_loop(self, conn):
+        # Connection.recv 直接读取文件描述符，先等待可读以免阻塞协作式事件循环
+        wait = readable_waiter(conn.fileno())
+        with conn:
+            while self._running:
+                try:
+                    if not wait(1.0):
+                        continue
+                    message = conn.recv()
+                except (OSError, EOFError):
+                    return
+                if message.get('type') == 'error':
+                    report_sniffer_error(f"[{message['iface']}] {message['error']}")
+                else:
+                    self._apply(message)
+
+    def _apply(self, message):
+        """合并工作进程发送的聚合结果"""
+        label = message['iface']
+        pid = message['pid']
+
+        prev_pid, prev_counts = self._last_counts.get(label, (None, {}))
+        if prev_pid != pid:
+            # 工作进程已重启，累计计数从零开始
+            prev_counts = {}
+        for protocol, count in message['counts'].items():
+            delta = count - prev_counts.get(protocol, 0)
+            if delta:
+                ext._protocol_counts[protocol] += delta
+        self._last_counts[label] = (pid, message['counts'])
+
+        for packet_id, summary, raw in message['packets']:
+            self.pipeline.ingest_summary(packet_id, summary, raw)
+
+        if message.get('flows') is not None:
+            ext._worker_top_flows[label] = message['flows']['top']
+            ext._worker_flow_counts[label] = message['flows']['active']
+
+        worker = self._workers.get(label, {})
+        ext._capture_worker_stats[label] = dict(
+            message['stats'], pid=pid, restarts=worker.get('restarts', 0)
+        )
@@ -0,0 +1,126 @@
+"""
+抓包工作进程模块
+在独立进程中完成抓包、协议分类和聚合，只把紧凑的聚合结果通过本地 Unix 套接字
+发送给 Web 进程，避免抓包与 Flask/Socket.IO 处理线程争用同一个 GIL。
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from multiprocessing.connection import Client
+
+from services.capture_backends import create_backend
+from services.flow_table import FlowTable
+from services.packet_sniffer import PacketBatchEmitter, PacketPipeline
+
+
+def _ship_aggregates(conn, pipeline, label, interval, flow_interval, flow_count, finished=None, errors=None):
+    """
+    定期发送聚合结果，finished 被设置后再发送一次(含流表)，
+    errors 中有抓包错误时随后发送 error 消息，然后返回。
+    连接只由本线程写入(Connection 不是线程安全的)。聚合结果包含:
+    - counts: 本进程启动以来的累计协议计数(累计值便于 Web 进程在重启后正确合并)
+    - stats: 缓冲/采样/丢弃计数
+    - packets: 本周期保留下来的 (packet_id, summary, raw) 列表
+    - flows: 每 flow_interval 秒附带一次本地流表的 Top 流和活跃流数量
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    pid = os.getpid()
+    emitter = pipeline.emitter
+    flow_table = pipeline.flow_table
+    next_flow_report = time.time() + flow_interval
+    finished = finished or threading.Event()
+    errors = errors if errors is not None else []
+    while True:
+        done = finished.wait(interval)
+
+        flows = None
+        if done or time.time() >= next_flow_report:
+            flow_table.expire()
+            flows = {'top': flow_table.top(flow_count), 'active': len(flow_table)}
+            next_flow_report = time.time() + flow_interval
+
+        packets = []
+        batch = emitter.drain()
+        while batch:
+            for packet_id, summary in batch:
+                packets.append((packet_id, summary, pipeline.recent_frames.pop(packet_id, None)))
+            batch = emitter.drain()
+
+        try:
+            conn.send({
+                'type': 'aggregate',
+                'iface': label,
+                'pid': pid,
+                'counts': dict(pipeline.protocol_counts),
+                'stats': dict(emitter.stats),
+                'packets': packets,
+                'flows': flows
+            })
+            if done:
+                for error in errors:
+                    conn.send({'type': 'error', 'iface': label, 'pid': pid, 'error': error})
+        except (OSError, EOFError):
+            # Web 进程已退出，工作进程随之退出
+            os._exit(0)  # pylint: disable=protected-access
+        if done:
+            return
+
+
+def capture_worker_main(label, iface, address, authkey, config, cpu=None):
+    """
+    抓包工作进程入口。
+
+    Args:
+        label (str): 工作进程标识(通常为接口名)
+        iface (str | None): 抓包接口，None 表示所有接口
+        address (str): Web 进程监听的 Unix 套接字路径
+        authkey (bytes): 连接认证密钥
+        config (dict): 抓包相关配置(CAPTURE_* / PACKET_* / FLOW_* / TOP_TALKERS_*)
+        cpu (int | None): 绑定到的 CPU 编号
+    """
+    if cpu is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cpu})
+
+    config = dict(config)
+    config['CAPTURE_INTERFACE'] = iface
+
+    pipeline = PacketPipeline(
+        PacketBatchEmitter.from_config(config),
+        defaultdict(int),
+        print_interval=config.get('PACKET_PRINT_INTERVAL', 100),
+        id_prefix=f"{label}-",
+        flow_table=FlowTable.from_config(config)
+    )
+    interval = config.get('PACKET_BATCH_INTERVAL_MS', 500) / 1000.0
+
+    conn = Client(address, family='AF_UNIX', authkey=authkey)
+    finished = threading.Event()
+    errors = []
+    shipper = threading.Thread(
+        target=_ship_aggregates,
+        args=(
+            conn, pipeline, label, interval,
+            config.get('TOP_TALKERS_INTERVAL', 5), config.get('TOP_TALKERS_COUNT', 10), finished, errors
+        ),
+        daemon=True
+    )
+    shipper.start()
+
+    try:
+        backend = create_backend(config)
+        pipeline.run(backend)
+        if not getattr(backend, 'finite', False):
+            raise RuntimeError("抓包意外结束")
+    except Exception as e: # pylint: disable=broad-exception-caught
+        # 错误消息交给发送线程在最后一次聚合结果之后发送，避免两个线程同时写连接
+        errors.append(str(e))
+        finished.set()
+        shipper.join()
+        conn.close()
+        raise SystemExit(1) from e
+
+    # 有限的回放已结束: 发送最后一次聚合结果后以退出码 0 退出，监管器不会重启
+    finished.set()
+    shipper.join()
+    conn.close()
@@ -0,0 +1,170 @@
+"""
+告警冷却存储模块
+记录每个 (阈值, 接口) 最近一次告警后的冷却截止时间，冷却期内的重复突破不再告警。
+
+- 持久化在独立的 SQLite 文件中(WAL 模式，WITHOUT ROWID 表只保存键和截止时间)，
+  进程重启后冷却状态仍然有效，不会在启动时集中重发告警
+- 多个进程共享同一文件: 占用冷却期是一条带条件的 UPSERT，只有一个进程能成功
+- 进程内缓存仍在冷却期的键，冷却期内的重复突破不访问数据库；
+  缓存有条目上限，超出时先淘汰已过期的键，再淘汰最早到期的键
+"""
+import heapq
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cooldowns (
+    threshold_id INTEGER NOT NULL,
+    interface TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (threshold_id, interface)
+) WITHOUT ROWID
+"""
+# 只有已过期(或不存在)的键才会被更新，rowcount 表示是否占用成功
+_ACQUIRE = """
+INSERT INTO cooldowns (threshold_id, interface, expires_at) VALUES (?, ?, ?)
+ON CONFLICT (threshold_id, interface) DO UPDATE SET expires_at = excluded.expires_at
+WHERE cooldowns.expires_at <= ?
+"""
+
+
+class CooldownStore:
+    """
+    告警冷却存储。
+
+    path 为 None 时只保存在内存中(单进程、不持久化)。
+    """
+
+    def __init__(self, path=None, ttl=300, max_entries=100000, purge_interval=600):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max(1, int(max_entries))
+        self.purge_interval = purge_interval
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False,
+                                         isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(_SCHEMA)
+        self.metrics = {'suppressed': 0, 'acquired': 0, 'evicted': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """根据应用配置创建冷却存储"""
+        return cls(
+            path=config.get('ALERT_COOLDOWN_DB'),
+            ttl=config.get('ALERT_COOLDOWN_SECONDS', 300),
+            max_entries=config.get('ALERT_COOLDOWN_MAX_ENTRIES', 100000)
+        )
+
+    def try_acquire(self, threshold_id, interface, now=None, ttl=None):
+        """
+        如果 (阈值, 接口) 不在冷却期，则开始新的冷却期。
+
+        Args:
+            threshold_id (int): 阈值 ID
+            interface (str | None): 网卡名
+            ttl (float | None): 冷却时长(秒)，默认使用存储的配置
+
+        Returns:
+            bool: True 表示可以发送告警
+        """
+        now = time.time() if now is None else now
+        key = (threshold_id, interface or '')
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached > now:
+                self.metrics['suppressed'] += 1
+                return False
+
+            if self._conn is not None:
+                if self._conn.execute(_ACQUIRE, (*key, expires_at, now)).rowcount != 1:
+                    # 其他进程(或重启前的本进程)设置的冷却期
+                    row = self._conn.execute(
+                        'SELECT expires_at FROM cooldowns WHERE threshold_id = ? AND interface = ?',
+                        key
+                    ).fetchone()
+                    self._remember(key, row[0] if row else now + 1, now)
+                    self.metrics['suppressed'] += 1
+                    return False
+                if now - self._last_purge >= self.purge_interval:
+                    self._purge(now)
+
+            self._remember(key, expires_at, now)
+            self.metrics['acquired'] += 1
+            return True
+
+    def clear(self, threshold_id):
+        """
+        清除某个阈值的全部冷却状态(阈值修改或删除时调用)。
+        只影响本进程的缓存，其他进程的缓存由 threshold_index 通过 worker event 通知清除。
+        """
+        with self._lock:
+            self._forget_locked(threshold_id)
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM cooldowns WHERE threshold_id = ?', (threshold_id,))
+
+    def forget(self, threshold_id):
+        """只丢弃本进程缓存的该阈值冷却键(数据库中的记录已由其他进程清除)"""
+        with self._lock:
+            self._forget_locked(threshold_id)
+
+    def _forget_locked(self, threshold_id):
+        for key in [key for key in self._cache if key[0] == threshold_id]:
+            del self._cache[key]
+
+    def __len__(self):
+        return len(self._cache)
+
+    def _remember(self, key, expires_at, now):
+        self._cache[key] = expires_at
+        if len(self._cache) <= self.max_entries:
+            return
+        expired = [cached for cached, deadline in self._cache.items() if deadline <= now]
+        for cached in expired:
+            del self._cache[cached]
+        overflow = len(self._cache) - self.max_entries
+        if overflow > 0:
+            # 淘汰最早到期的键，之后命中时会回到数据库查询
+            for cached in heapq.nsmallest(overflow, self._cache, key=self._cache.get):
+                del self._cache[cached]
+        self.metrics['evicted'] += len(expired) + max(overflow, 0)
+
+    def _purge(self, now):
+        self._conn.execute('DELETE FROM cooldowns WHERE expires_at <= ?', (now,))
+        self._last_purge = now
+
+    def close(self):
+        """关闭数据库连接"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get_metrics(self):
+        """冷却存储指标"""
+        return dict(self.metrics, cached=len(self))
+
+
+_store = None
+
+
+def get_cooldown_store():
+    """获取告警冷却存储(首次调用需在应用上下文中)"""
+    global _store # pylint: disable=global-statement
+    if _store is None:
+        _store = CooldownStore.from_config(current_app.config)
+    return _store
+
+
+def forget_cooldowns(threshold_id):
+    """丢弃本进程缓存的阈值冷却键，冷却存储尚未创建时为空操作"""
+    if _store is not None:
+        _store.forget(threshold_id)
@@ -0,0 +1,138 @@
+"""
+网卡计数器快照模块
+将各网卡的累计计数器保存在按稳定接口编号索引的 NumPy 数组中，
+一次向量化减法即可得到所有网卡、所有计数器的速率。
+"""
+import numpy as np
+
+# 与 psutil.net_io_counters() 返回的 snetio 字段顺序一致
+COUNTER_FIELDS = (
+    'bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+    'errin', 'errout', 'dropin', 'dropout'
+)
+RATE_FIELDS = tuple(f"{field}_sec" for field in COUNTER_FIELDS)
+
+
+class InterfaceIdMap:
+    """
+    接口名 -> 数组下标 的稳定映射。
+
+    消失的接口释放下标供新接口复用，容量不足时按倍数扩容，
+    避免容器节点上 veth 接口频繁增删时每个周期重新分配数组。
+    """
+
+    def __init__(self):
+        self._slots = {}
+        self._names = []
+        self._free = []
+
+    def __len__(self):
+        return len(self._slots)
+
+    @property
+    def size(self):
+        """已使用过的最大下标 + 1"""
+        return len(self._names)
+
+    def get(self, name):
+        """获取接口下标，新接口分配新下标"""
+        slot = self._slots.get(name)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self._names[slot] = name
+            else:
+                slot = len(self._names)
+                self._names.append(name)
+            self._slots[name] = slot
+        return slot
+
+    def release(self, name):
+        """释放接口下标"""
+        slot = self._slots.pop(name, None)
+        if slot is not None:
+            self._names[slot] = None
+            self._free.append(slot)
+
+    def names(self):
+        """当前所有接口名"""
+        return list(self._slots)
+
+
+class CounterSnapshot:
+    """
+    上一周期的计数器快照及速率计算。
+
+    - 计数器按 int64 保存，计数器回绕或网卡重置导致的负差值按 0 处理
+    - 新出现的接口在第一个周期只记录快照，不输出速率
+    """
+
+    def __init__(self, capacity=64, exclude=('lo0',)):
+        self.ids = InterfaceIdMap()
+        self.exclude = set(exclude)
+        self._counters = np.zeros((capacity, len(COUNTER_FIELDS)), dtype=np.int64)
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._timestamp = None
+
+    @property
+    def capacity(self):
+        """数组容量(行数)"""
+        return self._counters.shape[0]
+
+    def _ensure_capacity(self, size):
+        if size <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < size:
+            capacity *= 2
+        counters = np.zeros((capacity, len(COUNTER_FIELDS)), dtype=np.int64)
+        counters[:self.capacity] = self._counters
+        valid = np.zeros(capacity, dtype=bool)
+        valid[:self.capacity] = self._valid
+        self._counters, self._valid = counters, valid
+
+    def update(self, counters, timestamp):
+        """
+        写入新的计数器并计算速率。
+
+        Args:
+            counters (dict): 接口名 -> snetio(或同顺序的元组)
+            timestamp (float): 采样时间(秒)
+
+        Returns:
+            tuple: (接口名列表, 速率数组 shape=(n, len(COUNTER_FIELDS)))；首次调用时为空
+        """
+        empty = [], np.empty((0, len(COUNTER_FIELDS)))
+        if self._timestamp is not None and timestamp <= self._timestamp:
+            return empty
+
+        names = [name for name in counters if name not in self.exclude]
+        for name in set(self.ids.names()).difference(names):
+            slot = self.ids.get(name)
+            self._valid[slot] = False
+            self.ids.release(name)
+
+        slots = np.fromiter((self.ids.get(name) for name in names), dtype=np.intp, count=len(names))
+        self._ensure_capacity(self.ids.size)
+        current = np.array(
+            [tuple(counters[name])[:len(COUNTER_FIELDS)] for name in names], dtype=np.int64
+        ).reshape(len(names), len(COUNTER_FIELDS))
+
+        previous_timestamp, self._timestamp = self._timestamp, timestamp
+        ready = self._valid[slots]
+        delta = current - self._counters[slots]
+        self._counters[slots] = current
+        self._valid[slots] = True
+
+        if previous_timestamp is None:
+            return empty
+
+        np.maximum(delta, 0, out=delta)
+        rates = delta[ready] / (timestamp - previous_timestamp)
+        return [name for name, ok in zip(names, ready.tolist()) if ok], rates
+
+
+def rates_to_dicts(names, rates, digits=2):
+    """将速率数组转换为推送/存储使用的字典列表"""
+    rounded = np.round(rates, digits).tolist()
+    return [{'interface': name, **dict(zip(RATE_FIELDS, row))} for name, row in zip(names, rounded)]
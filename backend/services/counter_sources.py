@@ -0,0 +1,208 @@
+"""
+网卡计数器来源模块
+除 psutil 外，提供两种 Linux 专用的计数器读取方式:
+
+- procfs: 保持 /proc/net/dev 打开，每次用 pread 读入可复用的缓冲区并单遍解析
+- sysfs: 缓存 /sys/class/net/<iface>/statistics/* 的文件描述符(数量有上限)，逐个 pread
+
+三种来源的 read() 都返回 接口名 -> 按 COUNTER_FIELDS 顺序排列的计数器元组。
+"""
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from operator import itemgetter
+
+import psutil
+from flask import current_app
+
+COUNTER_SOURCES = ('psutil', 'procfs', 'sysfs')
+
+# /proc/net/dev 中各列的下标(接收 8 列 + 发送 8 列)，按 COUNTER_FIELDS 顺序
+_PROC_NET_DEV_COLUMNS = (8, 0, 9, 1, 2, 10, 3, 11)
+_pick_columns = itemgetter(*_PROC_NET_DEV_COLUMNS)
+
+# sysfs 统计文件名，按 COUNTER_FIELDS 顺序
+_SYSFS_STATISTICS = (
+    'tx_bytes', 'rx_bytes', 'tx_packets', 'rx_packets',
+    'rx_errors', 'tx_errors', 'rx_dropped', 'tx_dropped'
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PsutilCounterSource:
+    """通过 psutil 读取计数器(跨平台)"""
+    # pylint: disable=too-few-public-methods
+    name = 'psutil'
+
+    def read(self):
+        """读取所有网卡计数器"""
+        return psutil.net_io_counters(pernic=True)
+
+    def close(self):
+        """无需释放资源"""
+
+
+class ProcNetDevCounterSource:
+    """
+    直接解析 /proc/net/dev。
+
+    文件描述符只打开一次，每次从偏移 0 处 pread 会让内核重新生成内容；
+    缓冲区不足时按倍数扩容，之后一直复用。
+    """
+    name = 'procfs'
+
+    def __init__(self, path='/proc/net/dev', buffer_size=1 << 16):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+        self._buffer = bytearray(buffer_size)
+        self._lock = threading.Lock()
+
+    def _read_raw(self):
+        while True:
+            size = os.preadv(self._fd, [self._buffer], 0)
+            if size < len(self._buffer):
+                return bytes(memoryview(self._buffer)[:size])
+            self._buffer = bytearray(len(self._buffer) * 2)
+
+    def read(self):
+        """读取并解析所有网卡计数器"""
+        with self._lock:
+            data = self._read_raw()
+        pick = _pick_columns
+        counters = {}
+        # 前两行为表头
+        for line in data.split(b'\n')[2:]:
+            name, sep, values = line.rpartition(b':')
+            if sep:
+                counters[name.strip().decode()] = tuple(map(int, pick(values.split())))
+        return counters
+
+    def close(self):
+        """关闭文件描述符"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class SysfsCounterSource:
+    """
+    读取 /sys/class/net/<iface>/statistics 下的计数器文件。
+
+    每个接口需要 8 个文件描述符，因此只缓存最近读取的 max_cached_interfaces 个接口
+    (LRU，接口消失时关闭)；超出部分每次读取时打开、pread、关闭，
+    接口很多时也不会耗尽进程的文件描述符。
+    """
+    name = 'sysfs'
+
+    def __init__(self, root='/sys/class/net', max_cached_interfaces=64):
+        self.root = root
+        self.max_cached_interfaces = max(0, int(max_cached_interfaces))
+        self._fds = OrderedDict()
+        self._skipped = set()
+        self._lock = threading.Lock()
+
+    def _open_interface(self, name):
+        statistics = os.path.join(self.root, name, 'statistics')
+        fds = []
+        try:
+            for filename in _SYSFS_STATISTICS:
+                fds.append(os.open(os.path.join(statistics, filename), os.O_RDONLY))
+        except OSError as e:
+            _close_all(fds)
+            if name not in self._skipped:
+                self._skipped.add(name)
+                logger.warning("无法读取网卡 %s 的 sysfs 计数器，已跳过: %s", name, e)
+            return None
+        self._skipped.discard(name)
+        return fds
+
+    def _read_interface(self, name):
+        """读取一个接口的计数器，接口不可读时返回 None"""
+        fds = self._fds.get(name)
+        if fds is not None:
+            self._fds.move_to_end(name)
+            try:
+                return tuple([int(os.pread(fd, 32, 0)) for fd in fds])
+            except (OSError, ValueError):
+                # 接口在读取过程中被删除
+                _close_all(self._fds.pop(name))
+                return None
+
+        fds = self._open_interface(name)
+        if fds is None:
+            return None
+        try:
+            values = tuple([int(os.pread(fd, 32, 0)) for fd in fds])
+        except (OSError, ValueError):
+            _close_all(fds)
+            return None
+        if self.max_cached_interfaces:
+            if len(self._fds) >= self.max_cached_interfaces:
+                _close_all(self._fds.popitem(last=False)[1])
+            self._fds[name] = fds
+        else:
+            _close_all(fds)
+        return values
+
+    def read(self):
+        """读取所有网卡计数器"""
+        counters = {}
+        with self._lock:
+            names = os.listdir(self.root)
+            for name in set(self._fds).difference(names):
+                _close_all(self._fds.pop(name))
+            self._skipped.intersection_update(names)
+            for name in names:
+                values = self._read_interface(name)
+                if values is not None:
+                    counters[name] = values
+        return counters
+
+    def close(self):
+        """关闭所有缓存的文件描述符"""
+        with self._lock:
+            for fds in self._fds.values():
+                _close_all(fds)
+            self._fds.clear()
+
+
+def _close_all(fds):
+    for fd in fds:
+        os.close(fd)
+
+
+def create_counter_source(name, sysfs_cached_interfaces=64):
+    """
+    创建计数器来源，非 Linux 系统或文件不可用时回退到 psutil。
+
+    Args:
+        name (str): 'psutil' / 'procfs' / 'sysfs'
+        sysfs_cached_interfaces (int): sysfs 来源最多缓存文件描述符的接口数
+    """
+    if name not in COUNTER_SOURCES:
+        raise ValueError(f"未知的计数器来源: {name}")
+    if name == 'psutil' or not sys.platform.startswith('linux'):
+        return PsutilCounterSource()
+    try:
+        if name == 'procfs':
+            return ProcNetDevCounterSource()
+        source = SysfsCounterSource(max_cached_interfaces=sysfs_cached_interfaces)
+        source.read()
+        return source
+    except OSError:
+        return PsutilCounterSource()
+
+
+_source = None
+
+
+def get_counter_source():
+    """获取应用配置的计数器来源(需在应用上下文中首次调用)"""
+    global _source # pylint: disable=global-statement
+    if _source is None:
+        _source = create_counter_source(current_app.config.get('COUNTER_SOURCE', 'psutil'),
+                                        current_app.config.get('SYSFS_CACHED_INTERFACES', 64))
+    return _source
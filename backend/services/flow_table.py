@@ -0,0 +1,192 @@
+"""
+流表模块
+按五元组 (src, dst, sport, dport, proto) 聚合数据包/字节计数，提供 Top Talkers 查询。
+
+为了支撑数十万并发流，计数器保存在预分配的 array 列中，以槽位下标访问；
+键为紧凑的打包字节串，索引字典的大小受容量上限约束，不会无限增长。
+"""
+import heapq
+import socket
+import struct
+import threading
+import time
+from array import array
+
+from extensions import socketio
+import extensions as ext
+
+# pylint: disable=protected-access
+
+_KEY_PREFIX = struct.Struct('!BHH')
+
+
+def flow_key(headers):
+    """
+    根据头部解析结果生成紧凑的流键。
+
+    Returns:
+        bytes | None: proto(1) + sport(2) + dport(2) + src + dst；非 IP 数据包返回 None
+    """
+    if headers is None or not headers.ip_proto:
+        return None
+    return _KEY_PREFIX.pack(headers.ip_proto, headers.sport, headers.dport) + headers.src + headers.dst
+
+
+def decode_flow_key(key):
+    """将流键还原为可读字段"""
+    proto, sport, dport = _KEY_PREFIX.unpack_from(key, 0)
+    addrs = key[_KEY_PREFIX.size:]
+    half = len(addrs) // 2
+    family = socket.AF_INET if half == 4 else socket.AF_INET6
+    return {
+        'src': socket.inet_ntop(family, addrs[:half]),
+        'dst': socket.inet_ntop(family, addrs[half:]),
+        'sport': sport,
+        'dport': dport,
+        'proto': proto
+    }
+
+
+class FlowTable:
+    """
+    定长、基于数组的流表。
+
+    - 每个流占用一个槽位，计数器存放在 array 列中
+    - 空闲超过 idle_timeout 秒的流由 expire() 淘汰
+    - 流表满时先淘汰空闲流，仍不足则批量淘汰最久未活跃的 1/16 槽位
+    """
+
+    def __init__(self, capacity=262144, idle_timeout=120):
+        self.capacity = max(16, int(capacity))
+        self.idle_timeout = idle_timeout
+        self._index = {}
+        self._keys = [None] * self.capacity
+        self._packets = array('Q', bytes(8 * self.capacity))
+        self._bytes = array('Q', bytes(8 * self.capacity))
+        self._first_seen = array('d', bytes(8 * self.capacity))
+        self._last_seen = array('d', bytes(8 * self.capacity))
+        self._free = list(range(self.capacity - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.stats = {'created': 0, 'expired': 0, 'evicted': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """根据应用配置创建流表"""
+        return cls(
+            capacity=config.get('FLOW_TABLE_CAPACITY', 262144),
+            idle_timeout=config.get('FLOW_IDLE_TIMEOUT', 120)
+        )
+
+    def __len__(self):
+        return len(self._index)
+
+    def update(self, key, length, timestamp):
+        """累加一个数据包到对应的流"""
+        with self._lock:
+            slot = self._index.get(key)
+            if slot is None:
+                if not self._free:
+                    self._make_room(timestamp)
+                slot = self._free.pop()
+                self._index[key] = slot
+                self._keys[slot] = key
+                self._packets[slot] = 0
+                self._bytes[slot] = 0
+                self._first_seen[slot] = timestamp
+                self.stats['created'] += 1
+            self._packets[slot] += 1
+            self._bytes[slot] += length
+            self._last_seen[slot] = timestamp
+
+    def _release(self, slot):
+        del self._index[self._keys[slot]]
+        self._keys[slot] = None
+        self._free.append(slot)
+
+    def _expire_locked(self, now):
+        deadline = now - self.idle_timeout
+        last_seen = self._last_seen
+        stale = [slot for slot in self._index.values() if last_seen[slot] < deadline]
+        for slot in stale:
+            self._release(slot)
+        self.stats['expired'] += len(stale)
+        return len(stale)
+
+    def _make_room(self, now):
+        if self._expire_locked(now):
+            return
+        last_seen = self._last_seen
+        victims = heapq.nsmallest(
+            max(1, self.capacity // 16), self._index.values(), key=last_seen.__getitem__
+        )
+        for slot in victims:
+            self._release(slot)
+        self.stats['evicted'] += len(victims)
+
+    def expire(self, now=None):
+        """淘汰空闲超时的流，返回淘汰数量"""
+        with self._lock:
+            return self._expire_locked(time.time() if now is None else now)
+
+    def top(self, n=10, by='bytes'):
+        """
+        获取流量最大的 n 个流。
+
+        Args:
+            n (int): 返回数量
+            by (str): 'bytes' 或 'packets'
+
+        Returns:
+            list[dict]: 流信息列表，按指标降序
+        """
+        column = self._packets if by == 'packets' else self._bytes
+        with self._lock:
+            slots = heapq.nlargest(n, self._index.values(), key=column.__getitem__)
+            rows = [
+                (self._keys[slot], self._packets[slot], self._bytes[slot],
+                 self._first_seen[slot], self._last_seen[slot])
+                for slot in slots
+            ]
+        flows = []
+        for key, packets, byte_count, first_seen, last_seen in rows:
+            flow = decode_flow_key(key)
+            flow.update({
+                'packets': packets,
+                'bytes': byte_count,
+                'first_seen': first_seen,
+                'last_seen': last_seen
+            })
+            flows.append(flow)
+        return flows
+
+
+def get_top_flows(n=10, by='bytes'):
+    """
+    获取全局 Top Talkers。
+    进程内抓包时直接查询本地流表；多进程抓包时合并各工作进程上报的 Top 流。
+    """
+    flows = ext._flow_table.top(n, by) if ext._flow_table is not None else []
+    for worker_flows in list(ext._worker_top_flows.values()):
+        flows.extend(worker_flows)
+    metric = 'packets' if by == 'packets' else 'bytes'
+    return heapq.nlargest(n, flows, key=lambda flow: flow[metric])
+
+
+def get_active_flow_count():
+    """当前活跃流数量"""
+    count = len(ext._flow_table) if ext._flow_table is not None else 0
+    return count + sum(ext._worker_flow_counts.values())
+
+
+def top_talkers_task(interval=5, count=10):
+    """定期淘汰空闲流并推送 Top Talkers"""
+    while True:
+        socketio.sleep(interval)
+        if ext._flow_table is not None:
+            ext._flow_table.expire()
+        flows = get_top_flows(count)
+        if flows:
+            socketio.emit('top_talkers', {
+                'flows': flows,
+                'active_flows': get_active_flow_count()
+            })
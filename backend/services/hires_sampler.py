@@ -0,0 +1,219 @@
+"""
+高精度流量采样模块
+以亚秒级间隔采样网卡计数器，细粒度采样只保存在内存环形缓冲区中；
+按原有推送周期聚合为 平均/峰值 帧推送给前端并写入数据库。
+采样间隔根据流量波动自适应调整，并受 CPU 开销预算约束。
+"""
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from services.counter_snapshot import COUNTER_FIELDS, RATE_FIELDS, CounterSnapshot
+
+# 聚合帧中额外输出峰值的字段
+PEAK_FIELDS = ('bytes_sent_sec', 'bytes_recv_sec')
+_PEAK_COLUMNS = [RATE_FIELDS.index(field) for field in PEAK_FIELDS]
+_BYTES_COLUMNS = [COUNTER_FIELDS.index('bytes_sent'), COUNTER_FIELDS.index('bytes_recv')]
+
+
+class AdaptiveInterval:
+    """
+    自适应采样间隔控制器。
+
+    - 总速率相对 EWMA 均值的偏离超过 burst_zscore 个标准差时立即降到最小间隔
+    - 链路空闲(总速率低于 idle_bps)时间隔逐步加倍，直到最大间隔
+    - 平稳时间隔缓慢放大
+    - 间隔不小于 采样耗时 / cpu_budget，保证采样开销不超过预算
+    """
+
+    def __init__(self, min_interval=0.1, max_interval=1.0, cpu_budget=0.02,
+                 idle_bps=1024, burst_zscore=3.0, alpha=0.2):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.cpu_budget = cpu_budget
+        self.idle_bps = idle_bps
+        self.burst_zscore = burst_zscore
+        self.alpha = alpha
+        self.interval = self.max_interval
+        self._mean = None
+        self._var = 0.0
+        self._cost = 0.0
+
+    def observe(self, total_rate, cost):
+        """
+        根据一次采样的总速率和耗时计算下一次采样间隔。
+
+        Args:
+            total_rate (float): 所有网卡的总字节速率
+            cost (float): 本次采样耗时(秒)
+
+        Returns:
+            float: 下一次采样间隔(秒)
+        """
+        self._cost = cost if not self._cost else self._cost + self.alpha * (cost - self._cost)
+
+        if self._mean is None:
+            self._mean = total_rate
+            zscore = 0.0
+        else:
+            deviation = total_rate - self._mean
+            std = math.sqrt(self._var)
+            zscore = abs(deviation) / std if std > 0 else (math.inf if deviation else 0.0)
+            self._mean += self.alpha * deviation
+            self._var = (1 - self.alpha) * (self._var + self.alpha * deviation * deviation)
+
+        if zscore >= self.burst_zscore and total_rate >= self.idle_bps:
+            interval = self.min_interval
+        elif total_rate < self.idle_bps:
+            interval = self.interval * 2
+        else:
+            interval = self.interval * 1.25
+
+        floor = self._cost / self.cpu_budget if self.cpu_budget > 0 else 0.0
+        self.interval = min(max(interval, self.min_interval, floor), self.max_interval)
+        return self.interval
+
+    def get_metrics(self):
+        """控制器状态"""
+        return {
+            'interval_ms': round(self.interval * 1000, 1),
+            'sample_cost_us': round(self._cost * 1e6, 1),
+            'cpu_share': round(self._cost / self.interval, 4) if self.interval else 0.0
+        }
+
+
+class HiResSampler:
+    """
+    高精度采样器。
+
+    - sample(): 读取一次计数器，速率写入环形缓冲区并累加到当前聚合帧
+    - drain(): 取出自上次以来的聚合帧(每个接口的平均速率和峰值)
+    - recent(): 查询环形缓冲区中最近的细粒度采样
+    """
+
+    def __init__(self, read_counters, controller, ring_seconds=60):
+        self.read_counters = read_counters
+        self.controller = controller
+        self.snapshot = CounterSnapshot()
+        capacity = max(1, int(ring_seconds / controller.min_interval))
+        self.ring = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._reset_frame(self.snapshot.capacity)
+
+    @classmethod
+    def from_config(cls, config, read_counters):
+        """根据应用配置创建采样器"""
+        controller = AdaptiveInterval(
+            min_interval=config.get('HIRES_MIN_INTERVAL_MS', 100) / 1000,
+            max_interval=config.get('HIRES_MAX_INTERVAL_MS', 1000) / 1000,
+            cpu_budget=config.get('HIRES_CPU_BUDGET', 0.02),
+            idle_bps=config.get('HIRES_IDLE_BPS', 1024),
+            burst_zscore=config.get('HIRES_BURST_ZSCORE', 3.0)
+        )
+        return cls(read_counters, controller, config.get('HIRES_RING_SECONDS', 60))
+
+    def _reset_frame(self, capacity):
+        self._sum = np.zeros((capacity, len(RATE_FIELDS)))
+        self._peak = np.zeros((capacity, len(PEAK_FIELDS)))
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._names = {}
+
+    def sample(self, now=None):
+        """
+        采样一次。
+
+        Returns:
+            float: 下一次采样前应等待的秒数
+        """
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        names, rates = self.snapshot.update(self.read_counters(), now)
+        if names:
+            slots = np.fromiter((self.snapshot.ids.get(name) for name in names),
+                                dtype=np.intp, count=len(names))
+            with self._lock:
+                if self.snapshot.capacity > self._count.shape[0]:
+                    self._grow(self.snapshot.capacity)
+                # 消失的接口释放的下标可能在同一帧内被新接口复用，先清空旧接口的累计值
+                reused = [slot for name, slot in zip(names, slots.tolist())
+                          if self._names.setdefault(slot, name) != name]
+                if reused:
+                    self._sum[reused] = 0
+                    self._peak[reused] = 0
+                    self._count[reused] = 0
+                self._sum[slots] += rates
+                self._peak[slots] = np.maximum(self._peak[slots], rates[:, _PEAK_COLUMNS])
+                self._count[slots] += 1
+                for name, slot in zip(names, slots.tolist()):
+                    self._names[slot] = name
+                self.ring.append((now, names, rates))
+            total_rate = float(rates[:, _BYTES_COLUMNS].sum())
+        else:
+            total_rate = 0.0
+        return self.controller.observe(total_rate, time.perf_counter() - started)
+
+    def _grow(self, capacity):
+        old = self._count.shape[0]
+        total, peak, count = self._sum, self._peak, self._count
+        self._reset_frame(capacity)
+        self._sum[:old], self._peak[:old], self._count[:old] = total, peak, count
+
+    def drain(self, digits=2):
+        """
+        取出当前聚合帧并开始新的一帧。
+
+        Returns:
+            list[dict]: 每个接口的平均速率(字段同 get_traffic_rates)、峰值及采样数
+        """
+        with self._lock:
+            total, peak, count, names = self._sum, self._peak, self._count, self._names
+            self._reset_frame(count.shape[0])
+
+        slots = np.flatnonzero(count)
+        if not slots.size:
+            return []
+        average = np.round(total[slots] / count[slots, None], digits).tolist()
+        peaks = np.round(peak[slots], digits).tolist()
+        frames = []
+        for slot, avg_row, peak_row, samples in zip(slots.tolist(), average, peaks,
+                                                     count[slots].tolist()):
+            frame = {'interface': names[slot], **dict(zip(RATE_FIELDS, avg_row))}
+            frame.update({f"peak_{field}": value for field, value in zip(PEAK_FIELDS, peak_row)})
+            frame['samples'] = samples
+            frames.append(frame)
+        return frames
+
+    def recent(self, interface, seconds):
+        """
+        查询最近 seconds 秒内某个接口的细粒度采样。
+
+        Returns:
+            list[dict]: {'timestamp', 各速率字段}
+        """
+        cutoff = time.time() - seconds
+        with self._lock:
+            frames = [frame for frame in self.ring if frame[0] >= cutoff]
+        samples = []
+        for timestamp, names, rates in frames:
+            if interface in names:
+                row = rates[names.index(interface)].tolist()
+                samples.append({'timestamp': timestamp, **dict(zip(RATE_FIELDS, row))})
+        return samples
+
+
+_sampler = None
+
+
+def get_sampler():
+    """获取当前运行的高精度采样器，未启用时为 None"""
+    return _sampler
+
+
+def configure_sampler(config, read_counters):
+    """根据应用配置创建高精度采样器"""
+    global _sampler # pylint: disable=global-statement
+    _sampler = HiResSampler.from_config(config, read_counters)
+    return _sampler
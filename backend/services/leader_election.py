@@ -0,0 +1,231 @@
+"""
+主进程选举模块
+多个 Web 进程共享消息队列时，流量监控和抓包任务只能由一个进程运行，
+否则每个进程都会采样、写库并重复推送。
+
+- FileLease: 基于 flock 的文件锁，适用于同一台机器上的多个进程；持有者退出时内核自动释放
+- RedisLease: 基于 Redis SET NX PX 的租约，适用于多台机器，需要定期续约
+"""
+import atexit
+import fcntl
+import os
+import signal
+import tempfile
+import time
+import uuid
+
+from extensions import socketio
+import extensions as ext
+from services.capture_supervisor import CaptureSupervisor
+from services.packet_sniffer import monitor_packets_task
+from services.traffic_monitor import monitor_traffic_task
+
+# pylint: disable=protected-access
+
+# 只有租约值仍为自己的令牌时才续约/释放
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class FileLease:
+    """文件锁租约"""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self):
+        """尝试获取锁，不阻塞"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def renew(self):
+        """文件锁在文件描述符关闭前一直有效"""
+        return self._fd is not None
+
+    def release(self):
+        """释放锁"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class RedisLease:
+    """Redis 租约"""
+
+    def __init__(self, url, key, ttl=15):
+        try:
+            import redis # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise RuntimeError("使用 Redis 选举需要安装 redis 包 (pip install redis)") from e
+        self.redis = redis.Redis.from_url(url)
+        self.key = key
+        self.ttl = ttl
+        self.token = uuid.uuid4().hex
+        self._renewed = None
+
+    def acquire(self):
+        """尝试获取租约"""
+        try:
+            acquired = self.redis.set(self.key, self.token, nx=True, px=int(self.ttl * 1000))
+        except Exception: # pylint: disable=broad-exception-caught
+            return False
+        if acquired:
+            self._renewed = time.monotonic()
+        return bool(acquired)
+
+    def renew(self):
+        """续约；Redis 暂时不可用时，在租约到期前仍认为自己是主进程"""
+        try:
+            renewed = self.redis.eval(_RENEW_SCRIPT, 1, self.key, self.token, int(self.ttl * 1000))
+        except Exception: # pylint: disable=broad-exception-caught
+            return time.monotonic() - self._renewed < self.ttl
+        if renewed:
+            self._renewed = time.monotonic()
+        return bool(renewed)
+
+    def release(self):
+        """释放租约"""
+        try:
+            self.redis.eval(_RELEASE_SCRIPT, 1, self.key, self.token)
+        except Exception: # pylint: disable=broad-exception-caught
+            pass
+
+
+def create_lease(config):
+    """
+    根据配置创建租约。
+
+    LEADER_LOCK 为 redis:// 地址时使用 Redis 租约，为路径时使用该文件锁。
+    未配置时按消息队列推断: Redis 消息队列使用同一 Redis 上的租约(各进程可能在不同机器上)，
+    Unix 套接字消息队列(只能在单机使用)使用临时目录下以通道命名的文件锁；
+    其他消息队列可能跨机器部署，文件锁无法保证只有一个主进程，因此要求显式配置。
+
+    Raises:
+        RuntimeError: 无法确定适用于多机部署的租约
+    """
+    target = config.get('LEADER_LOCK')
+    queue = config.get('SOCKETIO_MESSAGE_QUEUE') or ''
+    channel = config.get('SOCKETIO_CHANNEL', 'network-monitor')
+    if not target:
+        if queue.startswith(('redis://', 'rediss://')):
+            target = queue
+        elif queue and not queue.startswith('unix://'):
+            raise RuntimeError(
+                f"消息队列 {queue} 可能跨机器部署，请通过 LEADER_LOCK 配置 Redis 地址或共享的锁文件"
+            )
+    if target and target.startswith(('redis://', 'rediss://')):
+        return RedisLease(target, f"{channel}:leader", config.get('LEADER_LEASE_TTL', 15))
+    return FileLease(target or os.path.join(tempfile.gettempdir(), f"{channel}.leader.lock"))
+
+
+def _terminate_on_lost_leadership():
+    # 后台任务无法安全地中途停止，退出进程由进程管理器重启，避免出现两个主进程
+    print("⚠️  已失去主进程租约，退出当前进程")
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+class LeaderElector:
+    """
+    周期性地竞选/续约，当选时调用 on_elected 一次，失去租约时调用 on_lost。
+    """
+
+    def __init__(self, lease, on_elected, renew_interval=5, on_lost=_terminate_on_lost_leadership):
+        self.lease = lease
+        self.on_elected = on_elected
+        self.on_lost = on_lost
+        self.renew_interval = renew_interval
+        self.is_leader = False
+        self._started = False
+
+    def step(self):
+        """
+        执行一次竞选或续约。
+
+        Returns:
+            bool: 当前是否为主进程
+        """
+        if not self.is_leader:
+            if self.lease.acquire():
+                self.is_leader = True
+                atexit.register(self.lease.release)
+                self.on_elected()
+        elif not self.lease.renew():
+            self.is_leader = False
+            self.on_lost()
+        return self.is_leader
+
+    def start(self):
+        """启动后台竞选任务(重复调用无效)"""
+        if not self._started:
+            self._started = True
+            socketio.start_background_task(self.run)
+
+    def run(self):
+        """竞选循环"""
+        while True:
+            self.step()
+            socketio.sleep(self.renew_interval)
+
+
+def start_monitoring_tasks(app):
+    """启动流量监控和抓包任务(每个进程只启动一次)"""
+    if not ext._traffic_monitoring_task:
+        print("正在启动流量监控任务。")
+        socketio.start_background_task(target=monitor_traffic_task, app=app)
+        ext._traffic_monitoring_task = True
+    if not ext._packet_monitoring_task:
+        if app.config.get('CAPTURE_MODE') == 'process':
+            capture_supervisor = CaptureSupervisor(app)
+            capture_supervisor.start()
+            atexit.register(capture_supervisor.stop)
+        else:
+            print("正在启动数据包嗅探任务。")
+            socketio.start_background_task(target=monitor_packets_task, app=app)
+            ext._packet_monitoring_task = True
+
+
+_elector = None
+
+
+def ensure_monitoring_tasks(app):
+    """
+    确保后台监控任务在运行。
+
+    未配置消息队列(单进程部署)时直接在本进程启动；
+    配置了消息队列时参与选举，只有主进程启动任务，其他进程的客户端通过消息队列接收推送。
+    """
+    global _elector # pylint: disable=global-statement
+    if not app.config.get('SOCKETIO_MESSAGE_QUEUE'):
+        start_monitoring_tasks(app)
+        return
+    if _elector is None:
+        _elector = LeaderElector(
+            create_lease(app.config),
+            lambda: start_monitoring_tasks(app),
+            renew_interval=app.config.get('LEADER_RENEW_INTERVAL', 5)
+        )
+    _elector.start()
+
+
+def get_elector():
+    """获取选举器，单进程部署时为 None"""
+    return _elector
@@ -0,0 +1,280 @@
+"""
+Socket.IO 消息队列模块
+多个 Web 进程部署在负载均衡之后时，通过消息队列共享房间并转发推送:
+
+- redis:// / rediss://  使用 Redis 发布订阅
+- unix:///path/to.sock  使用本模块的 Unix 套接字扇出代理(单机多进程或测试)
+
+另外在同一通道上提供 Web 进程之间的内部事件(worker event)，
+例如由主进程把流量速率转发给其他进程，供各进程的订阅客户端计算增量帧。
+
+单独运行 Unix 套接字代理:
+    python -m services.message_queue /tmp/netmon-socketio.sock
+"""
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import socketio as python_socketio
+
+from extensions import socketio
+
+WORKER_EVENT = 'worker_event'
+_FRAME_HEADER = struct.Struct('!I')
+# 单帧大小上限，防止损坏的长度前缀导致分配超大内存
+MAX_FRAME_SIZE = 64 << 20
+
+_worker_handlers = {}
+
+
+def on_worker_event(name):
+    """
+    注册 Web 进程内部事件的处理函数(装饰器)。
+
+    处理函数只会收到其他进程发布的事件，在消息队列的监听任务中执行。
+    """
+    def decorator(handler):
+        _worker_handlers[name] = handler
+        return handler
+    return decorator
+
+
+def publish_worker_event(name, payload):
+    """
+    向其他 Web 进程发布内部事件，未配置消息队列时为空操作。
+
+    Args:
+        name (str): 事件名
+        payload: 可 JSON 序列化的数据
+    """
+    server = socketio.server
+    manager = getattr(server, 'manager', None)
+    if isinstance(manager, WorkerEventsMixin):
+        manager.publish_worker_event(name, payload)
+
+
+def _dispatch_worker_event(name, payload):
+    handler = _worker_handlers.get(name)
+    if handler is not None:
+        handler(payload)
+
+
+class WorkerEventsMixin:
+    """为 PubSubManager 增加 Web 进程之间的内部事件，这些消息不会转发给浏览器客户端"""
+
+    def publish_worker_event(self, name, payload):
+        """发布内部事件"""
+        self._publish({
+            'method': WORKER_EVENT, 'name': name, 'payload': payload, 'host_id': self.host_id
+        })
+
+    def _listen(self):
+        for message in super()._listen():
+            data = message
+            if not isinstance(data, dict):
+                try:
+                    data = self.json.loads(message)
+                except ValueError:
+                    continue
+            if isinstance(data, dict) and data.get('method') == WORKER_EVENT:
+                if data.get('host_id') != self.host_id:
+                    try:
+                        _dispatch_worker_event(data.get('name'), data.get('payload'))
+                    except Exception: # pylint: disable=broad-exception-caught
+                        self._get_logger().exception('worker event 处理出错')
+                continue
+            yield data
+
+
+def _read_frame(stream):
+    header = stream.read(_FRAME_HEADER.size)
+    if len(header) < _FRAME_HEADER.size:
+        return None
+    (size,) = _FRAME_HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f"消息帧过大: {size}")
+    payload = stream.read(size)
+    return payload if len(payload) == size else None
+
+
+class UnixSocketPubSubManager(python_socketio.PubSubManager):
+    """
+    基于 Unix 套接字代理的 PubSubManager。
+
+    发布和监听各使用一条连接；代理把每一帧转发给所有连接(包括发送者)，
+    自己发布的消息由 PubSubManager 按 host_id 忽略。断线后自动重连。
+    """
+    name = 'unix'
+
+    def __init__(self, url='unix:///tmp/netmon-socketio.sock', channel='socketio',
+                 write_only=False, logger=None, json=None):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.path = urlparse(url).path
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _encode(self, data):
+        message = self.json.dumps({'channel': self.channel, 'data': data}).encode()
+        return _FRAME_HEADER.pack(len(message)) + message
+
+    def _publish(self, data):
+        frame = self._encode(data)
+        with self._publish_lock:
+            for retries_left in (1, 0):
+                try:
+                    if self._publisher is None:
+                        self._publisher = self._connect()
+                    self._publisher.sendall(frame)
+                    return
+                except OSError:
+                    if self._publisher is not None:
+                        self._publisher.close()
+                        self._publisher = None
+                    if not retries_left:
+                        self._get_logger().error('无法发布到消息代理 %s，已放弃', self.path)
+
+    def _listen(self):
+        retry_sleep = 1
+        while True:
+            try:
+                with self._connect() as sock, sock.makefile('rb') as stream:
+                    retry_sleep = 1
+                    while True:
+                        frame = _read_frame(stream)
+                        if frame is None:
+                            break
+                        message = self.json.loads(frame)
+                        if message.get('channel') == self.channel:
+                            yield message.get('data')
+            except (OSError, ValueError) as e:
+                self._get_logger().error('无法从消息代理 %s 接收: %s，%s 秒后重试',
+                                         self.path, e, retry_sleep)
+            time.sleep(retry_sleep)
+            retry_sleep = min(retry_sleep * 2, 60)
+
+
+class UnixSocketManager(WorkerEventsMixin, UnixSocketPubSubManager):
+    """Unix 套接字消息队列(支持内部事件)"""
+
+
+class RedisManager(WorkerEventsMixin, python_socketio.RedisManager):
+    """Redis 消息队列(支持内部事件)"""
+
+
+def message_queue_options(config):
+    """
+    根据应用配置返回 socketio.init_app 的消息队列参数。
+
+    Returns:
+        dict: 未配置 SOCKETIO_MESSAGE_QUEUE 时为空字典
+    """
+    url = config.get('SOCKETIO_MESSAGE_QUEUE')
+    if not url:
+        return {}
+    channel = config.get('SOCKETIO_CHANNEL', 'network-monitor')
+    if url.startswith('unix://'):
+        return {'client_manager': UnixSocketManager(url, channel=channel)}
+    if url.startswith(('redis://', 'rediss://')):
+        return {'client_manager': RedisManager(url, channel=channel)}
+    # 其他 Flask-SocketIO 支持的队列(kombu/kafka/zmq)，不支持内部事件
+    return {'message_queue': url, 'channel': channel}
+
+
+class UnixSocketBroker:
+    """
+    Unix 套接字扇出代理。
+
+    协议: 每帧为 4 字节大端长度 + 内容；任一连接发来的帧原样转发给所有连接。
+    慢连接会阻塞转发，只适用于单机部署和测试，生产多机部署请使用 Redis。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._server = None
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self):
+        """开始监听并在后台线程中接受连接"""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        self._server.listen(128)
+        self._running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        """关闭所有连接并删除套接字文件"""
+        self._running = False
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for conn in clients:
+            conn.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._clients[conn] = threading.Lock()
+            threading.Thread(target=self._client_loop, args=(conn,), daemon=True).start()
+
+    def _client_loop(self, conn):
+        try:
+            with conn.makefile('rb') as stream:
+                while True:
+                    payload = _read_frame(stream)
+                    if payload is None:
+                        break
+                    self._fan_out(_FRAME_HEADER.pack(len(payload)) + payload)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._drop(conn)
+
+    def _fan_out(self, frame):
+        with self._lock:
+            clients = list(self._clients.items())
+        for conn, send_lock in clients:
+            try:
+                with send_lock:
+                    conn.sendall(frame)
+            except OSError:
+                self._drop(conn)
+
+    def _drop(self, conn):
+        with self._lock:
+            self._clients.pop(conn, None)
+        conn.close()
+
+
+if __name__ == '__main__':
+    broker_path = sys.argv[1] if len(sys.argv) > 1 else '/tmp/netmon-socketio.sock'
+    UnixSocketBroker(broker_path).start()
+    print(f"📨 Socket.IO 消息代理: unix://{broker_path}")
+    while True:
+        time.sleep(3600)
@@ -2,10 +2,13 @@
 数据包嗅探服务模块
 负责捕获网络数据包，分析协议，并通过WebSocket实时推送数据。
 """
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
 import scapy.all as scapy
 from extensions import socketio
 import extensions as ext
+from services.capture_backends import create_backend, dissect, format_summary, parse_headers
+from services.protocol_classifier import classify_headers
+from services.flow_table import FlowTable, flow_key, top_talkers_task
 
 # pylint: disable=no-member
 # pylint: disable=protected-access
@@ -13,8 +16,188 @@ import extensions as ext
 # 在 ext 中初始化 _protocol_counts
 ext._protocol_counts = defaultdict(int)
 
+
+class PacketBatchEmitter:
+    """
+    数据包摘要批量推送器。
+
+    嗅探线程只负责把摘要放入有界环形缓冲区，由独立的后台任务每隔
+    interval_ms 毫秒（或缓冲达到 batch_size 个时）将其合并为一帧
+    'new_packets' 推送，避免每个数据包都进行一次序列化和广播。
+    缓冲区溢出时按 sample_rate 进行采样，其余数据包直接丢弃且不再生成摘要。
+    """
+
+    def __init__(self, interval_ms=500, batch_size=50, capacity=1000, sample_rate=10):
+        self.interval = interval_ms / 1000.0
+        self.batch_size = max(1, int(batch_size))
+        self.capacity = max(self.batch_size, int(capacity))
+        self.sample_rate = max(1, int(sample_rate))
+        self._buffer = deque(maxlen=self.capacity)
+        self._overflow_seq = 0
+        self.stats = {'captured': 0, 'emitted': 0, 'sampled': 0, 'dropped': 0, 'frames': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """根据应用配置创建推送器"""
+        return cls(
+            interval_ms=config.get('PACKET_BATCH_INTERVAL_MS', 500),
+            batch_size=config.get('PACKET_BATCH_MAX_SIZE', 50),
+            capacity=config.get('PACKET_BUFFER_CAPACITY', 1000),
+            sample_rate=config.get('PACKET_SAMPLE_RATE', 10)
+        )
+
+    def offer(self, summary_factory, packet_id=None):
+        """
+        提交一个数据包。summary_factory 为惰性生成摘要的可调用对象，
+        只有数据包被保留时才会调用，以节省溢出时的序列化开销。
+        packet_id 随摘要一起推送，前端可凭此请求数据包详情。
+
+        Returns:
+            bool: 数据包摘要是否进入缓冲区
+        """
+        self.stats['captured'] += 1
+
+        if len(self._buffer) >= self.capacity:
+            # 溢出: 每 sample_rate 个数据包保留 1 个，挤出最旧的摘要
+            self._overflow_seq += 1
+            if self._overflow_seq % self.sample_rate:
+                self.stats['dropped'] += 1
+                return False
+            self.stats['sampled'] += 1
+            self.stats['dropped'] += 1  # 被挤出的最旧摘要
+
+        summary = summary_factory()
+        if not summary:
+            return False
+        self._buffer.append((packet_id, summary))
+        return True
+
+    def pending(self):
+        """缓冲区中待推送的摘要数"""
+        return len(self._buffer)
+
+    def drain(self):
+        """取出最多 batch_size 个摘要"""
+        batch = []
+        buffer = self._buffer
+        while buffer and len(batch) < self.batch_size:
+            try:
+                batch.append(buffer.popleft())
+            except IndexError:
+                break
+        return batch
+
+    def flush(self):
+        """推送一帧 new_packets，返回本帧包含的摘要数"""
+        batch = self.drain()
+        if batch:
+            socketio.emit('new_packets', {
+                'ids': [packet_id for packet_id, _ in batch],
+                'summaries': [summary for _, summary in batch]
+            })
+            self.stats['emitted'] += len(batch)
+            self.stats['frames'] += 1
+        return len(batch)
+
+    def run(self):
+        """后台推送循环: 积压达到 batch_size 时立即推送，否则按时间间隔推送"""
+        while True:
+            self.flush()
+            if self.pending() >= self.batch_size:
+                socketio.sleep(0)
+            else:
+                socketio.sleep(self.interval)
+
+
+class PacketPipeline:
+    """
+    数据包处理流水线: 协议分类 -> 计数 -> 放入批量推送缓冲区。
+    进程内嗅探和独立的抓包工作进程共用同一套处理逻辑。
+    """
+
+    def __init__(self, emitter, protocol_counts, print_interval=100, id_prefix=None, flow_table=None):
+        self.emitter = emitter
+        self.protocol_counts = protocol_counts
+        self.flow_table = flow_table
+        self.print_interval = max(1, int(print_interval))
+        self.id_prefix = id_prefix
+        self.packet_count = 0
+        # 最近推送过摘要的数据包原始字节: packet_id -> bytes，仅在前端请求详情时才完整解析
+        self.recent_frames = OrderedDict()
+
+    def _next_id(self):
+        self.packet_count += 1
+        if self.id_prefix is None:
+            return self.packet_count
+        return f"{self.id_prefix}{self.packet_count}"
+
+    def remember_frame(self, packet_id, raw):
+        """缓存数据包原始字节，超出容量时淘汰最旧的数据包"""
+        self.recent_frames[packet_id] = raw
+        if len(self.recent_frames) > self.emitter.capacity:
+            self.recent_frames.popitem(last=False)
+
+    def ingest_summary(self, packet_id, summary, raw=None):
+        """放入一个已在别处(如抓包工作进程)完成分类和摘要的数据包"""
+        if self.emitter.offer(lambda: summary, packet_id) and raw is not None:
+            self.remember_frame(packet_id, raw)
+
+    def handle_packet(self, packet):
+        """Scapy 数据包回调 - 更新协议计数并放入批量推送缓冲区"""
+        packet_id = self._next_id()
+        if isinstance(packet, scapy.Ether):
+            # 以太网帧直接对原始字节查表分类
+            raw = getattr(packet, 'original', None) or bytes(packet)
+            headers = parse_headers(raw)
+            self.protocol_counts[classify_headers(headers)] += 1
+            self._track_flow(headers, float(packet.time))
+        else:
+            self.protocol_counts[get_protocol_name(packet)] += 1
+
+        try:
+            if self.packet_count % self.print_interval == 0:
+                print(f"📦 已捕获 {self.packet_count} 个数据包 (最新: {packet.summary()[:50]}...)")
+            if self.emitter.offer(packet.summary, packet_id):
+                self.remember_frame(packet_id, getattr(packet, 'original', None) or bytes(packet))
+        except Exception: # pylint: disable=broad-exception-caught
+            # 减少不必要的日志
+            pass
+
+    def handle_frame(self, frame, timestamp):
+        """原始帧回调 - 仅解析头部，供 AF_PACKET 快速抓包后端使用"""
+        packet_id = self._next_id()
+        headers = parse_headers(frame)
+        self.protocol_counts[classify_headers(headers)] += 1
+        self._track_flow(headers, timestamp)
+
+        if headers is None:
+            return
+        try:
+            if self.emitter.offer(lambda: format_summary(headers), packet_id):
+                self.remember_frame(packet_id, bytes(frame))
+        except Exception: # pylint: disable=broad-exception-caught
+            pass
+
+    def _track_flow(self, headers, timestamp):
+        if self.flow_table is None:
+            return
+        key = flow_key(headers)
+        if key is not None:
+            self.flow_table.update(key, headers.length, timestamp)
+
+    def run(self, backend):
+        """使用给定的抓包后端开始抓包(阻塞)"""
+        if backend.yields_frames:
+            backend.run(self.handle_frame)
+        else:
+            backend.run(self.handle_packet)
+
+
 def get_protocol_name(packet):
-    """从数据包中提取协议名称"""
+    """
+    从非以太网数据包(如 macOS 的 lo0)中提取协议名称。
+    以太网帧由 PacketPipeline 直接对原始字节查表分类。
+    """
     if packet.haslayer(scapy.TCP):
         return "TCP"
     if packet.haslayer(scapy.UDP):
@@ -25,21 +208,53 @@ def get_protocol_name(packet):
         return "ARP"
     return "Other"
 
+
+_pipeline = PacketPipeline(PacketBatchEmitter(), ext._protocol_counts)
+ext._packet_stats = _pipeline.emitter.stats
+
+
+def configure_pipeline(config, track_flows=True):
+    """
+    根据应用配置重建进程内的数据包处理流水线。
+    track_flows 为 False 时不创建本地流表(多进程抓包时流表位于工作进程中)。
+    """
+    global _pipeline # pylint: disable=global-statement
+    if track_flows and ext._flow_table is None:
+        ext._flow_table = FlowTable.from_config(config)
+    _pipeline = PacketPipeline(
+        PacketBatchEmitter.from_config(config),
+        ext._protocol_counts,
+        print_interval=config.get('PACKET_PRINT_INTERVAL', 100),
+        flow_table=ext._flow_table if track_flows else None
+    )
+    ext._packet_stats = _pipeline.emitter.stats
+    return _pipeline
+
+
+def get_pipeline():
+    """获取进程内的数据包处理流水线"""
+    return _pipeline
+
+
+def get_packet_detail(packet_id):
+    """
+    使用 Scapy 完整解析最近捕获的数据包。
+
+    Returns:
+        str | None: Scapy show() 的文本输出；数据包已过期时返回 None
+    """
+    raw = _pipeline.recent_frames.get(packet_id)
+    if raw is None:
+        return None
+    return dissect(raw).show(dump=True)
+
 def packet_callback(packet):
-    """数据包回调函数 - 更新协议计数"""
-    ext._packet_count += 1
-    protocol = get_protocol_name(packet)
-    ext._protocol_counts[protocol] += 1
+    """数据包回调函数 - 更新协议计数并放入批量推送缓冲区"""
+    _pipeline.handle_packet(packet)
 
-    try:
-        summary = packet.summary()
-        if summary:
-            if ext._packet_count % ext._packet_print_interval == 0:
-                print(f"📦 已捕获 {ext._packet_count} 个数据包 (最新: {summary[:50]}...)")
-            socketio.emit('new_packet', {'summary': summary})
-    except Exception: # pylint: disable=broad-exception-caught
-        # 减少不必要的日志
-        pass
+def frame_callback(frame, timestamp):
+    """原始帧回调函数 - 仅解析头部，供 AF_PACKET 快速抓包后端使用"""
+    _pipeline.handle_frame(frame, timestamp)
 
 def send_protocol_counts_task():
     """定期发送协议计数到前端"""
@@ -54,23 +269,42 @@ def send_protocol_counts_task():
             socketio.emit('protocol_counts', {
                 'counts': counts_copy,
                 'percentages': percentages,
-                'total': total_packets
+                'total': total_packets,
+                'stats': dict(ext._packet_stats),
+                'workers': dict(ext._capture_worker_stats)
             })
 
         socketio.sleep(3) # 每3秒发送一次
 
-def monitor_packets_task():
+def monitor_packets_task(app=None):
     """
     一个后台任务，用于捕获网络数据包并调用回调函数。
     """
+    config = app.config if app is not None else {}
+    pipeline = configure_pipeline(config) if app is not None else _pipeline
+
     try:
-        # 启动发送协议计数的后台任务
+        # 启动发送协议计数和批量推送数据包的后台任务
         socketio.start_background_task(send_protocol_counts_task)
+        socketio.start_background_task(pipeline.emitter.run)
+        start_top_talkers_task(config)
         # 开始嗅探
-        scapy.sniff(prn=packet_callback, store=False)
+        pipeline.run(create_backend(config))
     except Exception as e: # pylint: disable=broad-exception-caught
-        error_msg = str(e)
-        print(f"数据包嗅探出错: {error_msg}")
-        socketio.emit('sniffer_error', {'error': f"嗅探失败: {error_msg}"})
-        if "Permission denied" in error_msg:
-            socketio.emit('sniffer_error', {'error': "权限被拒绝: 请使用 'sudo' 运行后端"})
+        report_sniffer_error(e)
+
+def start_top_talkers_task(config):
+    """启动定期推送 Top Talkers 的后台任务"""
+    socketio.start_background_task(
+        top_talkers_task,
+        interval=config.get('TOP_TALKERS_INTERVAL', 5),
+        count=config.get('TOP_TALKERS_COUNT', 10)
+    )
+
+def report_sniffer_error(error):
+    """将嗅探错误推送到前端"""
+    error_msg = str(error)
+    print(f"数据包嗅探出错: {error_msg}")
+    socketio.emit('sniffer_error', {'error': f"嗅探失败: {error_msg}"})
+    if "Permission denied" in error_msg or "Operation not permitted" in error_msg:
+        socketio.emit('sniffer_error', {'error': "权限被拒绝: 请使用 'sudo' 运行后端"})
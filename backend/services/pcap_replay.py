@@ -0,0 +1,233 @@
+"""
+离线抓包回放模块
+不需要 root 权限和真实流量，把 pcap 文件或合成的数据包流送入与实时抓包相同的处理流水线，
+用于复现问题和测量每秒处理的数据包数。
+
+- read_pcap()/write_pcap(): 经典 libpcap 格式(微秒/纳秒时间戳，任意字节序，仅以太网链路层)，
+  不支持 pcapng
+- synthetic_frames(): 用 struct 直接构造以太网帧，协议比例由 SYNTHETIC_MIX 决定，结果可复现
+- PcapReplayBackend: 抓包后端接口的实现，预先把数据包读入内存后尽可能快地回放，
+  可以像 AF_PACKET 后端一样回调原始帧，也可以像 Scapy 后端一样回调 Scapy 数据包对象。
+  时间戳默认平移到回放开始时的当前时间，流表按 time.time() 淘汰空闲流时不会把回放的流当作过期
+"""
+import itertools
+import random
+import struct
+import time
+
+import scapy.all as scapy
+
+from services.async_compat import cooperative_yield
+from services.capture_backends import ETH_P_8021Q, ETH_P_ARP, ETH_P_IP, ETH_P_IPV6
+
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+LINKTYPE_ETHERNET = 1
+
+# 协作式异步模式下每回放多少个数据包让出一次事件循环
+_YIELD_EVERY_PACKETS = 256
+
+_ETH = struct.Struct('!6s6sH')
+_VLAN = struct.Struct('!HH')
+_IPV4 = struct.Struct('!BBHHHBBH4s4s')
+_IPV6 = struct.Struct('!IHBB16s16s')
+_TCP = struct.Struct('!HHIIBBHHH')
+_UDP = struct.Struct('!HHHH')
+_ICMP_ECHO = bytes((8, 0, 0, 0, 0, 0, 0, 0))
+_ARP = struct.Struct('!HHBBH6s4s6s4s')
+
+# 合成流量的协议比例: (权重, 网络层, IP 协议号, 目的端口)
+SYNTHETIC_MIX = (
+    (35, 'ipv4', 6, 443),
+    (10, 'ipv4', 6, 80),
+    (10, 'ipv4', 6, 22),
+    (15, 'ipv4', 17, 443),
+    (10, 'ipv4', 17, 53),
+    (5, 'ipv4', 17, 9999),
+    (5, 'ipv4', 1, 0),
+    (5, 'ipv6', 6, 443),
+    (3, 'arp', 0, 0),
+    (2, 'vlan', 6, 80),
+)
+
+
+def read_pcap(path):
+    """
+    读取 pcap 文件中的全部数据包。
+
+    Args:
+        path (str): pcap 文件路径
+
+    Returns:
+        list[tuple[bytes, float]]: (以太网帧, 时间戳)
+
+    Raises:
+        ValueError: 不是经典 pcap 格式或链路层不是以太网
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < 24:
+        raise ValueError(f"{path} 不是 pcap 文件")
+    for endian in ('<', '>'):
+        (magic,) = struct.unpack(endian + 'I', data[:4])
+        if magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            break
+    else:
+        raise ValueError(f"{path} 不是经典 pcap 格式(不支持 pcapng)")
+    linktype = struct.unpack_from(endian + 'I', data, 20)[0] & 0x0FFFFFFF
+    if linktype != LINKTYPE_ETHERNET:
+        raise ValueError(f"不支持的链路层类型: {linktype}")
+
+    record = struct.Struct(endian + 'IIII')
+    divisor = 1e9 if magic == PCAP_MAGIC_NS else 1e6
+    frames = []
+    offset = 24
+    while offset + record.size <= len(data):
+        sec, frac, captured, _ = record.unpack_from(data, offset)
+        offset += record.size
+        frames.append((data[offset:offset + captured], sec + frac / divisor))
+        offset += captured
+    return frames
+
+
+def write_pcap(path, frames, nanosecond=False, snaplen=65535):
+    """
+    把 (以太网帧, 时间戳) 写为 pcap 文件(小端字节序)。
+    """
+    magic = PCAP_MAGIC_NS if nanosecond else PCAP_MAGIC_US
+    scale = 10 ** 9 if nanosecond else 10 ** 6
+    record = struct.Struct('<IIII')
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', magic, 2, 4, 0, 0, snaplen, LINKTYPE_ETHERNET))
+        for frame, timestamp in frames:
+            sec = int(timestamp)
+            frac = min(int(round((timestamp - sec) * scale)), scale - 1)
+            f.write(record.pack(sec, frac, len(frame), len(frame)))
+            f.write(frame)
+
+
+def build_frame(network, ip_proto, dport, flow, payload_length=0):
+    """
+    构造一个以太网帧。
+
+    Args:
+        network (str): 'ipv4' / 'ipv6' / 'vlan'(802.1Q 标签 + IPv4) / 'arp'
+        ip_proto (int): IP 协议号(6/17/1)
+        dport (int): 目的端口
+        flow (int): 流编号，决定源地址和源端口
+        payload_length (int): 传输层之后的填充字节数
+    """
+    src_mac = b'\x02\x00' + (flow & 0xFFFFFFFF).to_bytes(4, 'big')
+    dst_mac = b'\x02\xff\x00\x00\x00\x01'
+    src_ip = bytes((10, (flow >> 16) & 0xFF, (flow >> 8) & 0xFF, flow & 0xFF))
+    dst_ip = bytes((192, 0, 2, 1 + flow % 200))
+    if network == 'arp':
+        return (_ETH.pack(b'\xff' * 6, src_mac, ETH_P_ARP)
+                + _ARP.pack(1, ETH_P_IP, 6, 4, 1, src_mac, src_ip, b'\x00' * 6, dst_ip))
+
+    sport = 1024 + flow % 60000
+    if ip_proto == 6:
+        layer4 = _TCP.pack(sport, dport, flow, 0, 5 << 4, 0x18, 65535, 0, 0)
+    elif ip_proto == 17:
+        layer4 = _UDP.pack(sport, dport, _UDP.size + payload_length, 0)
+    else:
+        layer4 = _ICMP_ECHO
+    body = layer4 + bytes(payload_length)
+
+    if network == 'ipv6':
+        src6 = b'\xfd' + bytes(11) + src_ip
+        dst6 = b'\x20\x01\x0d\xb8' + bytes(8) + dst_ip
+        return _ETH.pack(dst_mac, src_mac, ETH_P_IPV6) + _IPV6.pack(6 << 28, len(body), ip_proto, 64, src6, dst6) + body
+    ipv4 = _IPV4.pack(0x45, 0, _IPV4.size + len(body), flow & 0xFFFF, 0, 64, ip_proto, 0, src_ip, dst_ip) + body
+    if network == 'vlan':
+        return _ETH.pack(dst_mac, src_mac, ETH_P_8021Q) + _VLAN.pack(10, ETH_P_IP) + ipv4
+    return _ETH.pack(dst_mac, src_mac, ETH_P_IP) + ipv4
+
+
+def synthetic_frames(count, flows=1024, seed=1, mix=SYNTHETIC_MIX, max_payload=1400, start=1.7e9, rate=100000):
+    """
+    生成可复现的合成数据包流。
+
+    Args:
+        count (int): 数据包数
+        flows (int): 不同的流数量
+        seed (int): 随机种子
+        mix: (权重, 网络层, IP 协议号, 目的端口) 序列
+        max_payload (int): 最大填充长度
+        rate (float): 时间戳对应的每秒数据包数
+
+    Returns:
+        list[tuple[bytes, float]]: (以太网帧, 时间戳)
+    """
+    rng = random.Random(seed)
+    kinds = rng.choices([kind[1:] for kind in mix], weights=[kind[0] for kind in mix], k=count)
+    return [
+        (build_frame(network, ip_proto, dport, rng.randrange(flows), rng.randrange(max_payload + 1)),
+         start + index / rate)
+        for index, (network, ip_proto, dport) in enumerate(kinds)
+    ]
+
+
+class PcapReplayBackend:
+    """
+    离线回放抓包后端。
+
+    数据包在首次回放前全部读入内存，回放过程不包含磁盘 I/O。
+    as_packets 为 False 时以 (frame, timestamp) 回调(同 AF_PACKET 后端)，
+    为 True 时先用 Scapy 解析为数据包对象再回调(同 Scapy 后端)。
+    loops 小于等于 0 时无限循环回放；rebase_time 为 True 时每轮回放的时间戳
+    平移到该轮开始时的当前时间，保持数据包之间的相对间隔。
+    """
+
+    name = 'pcap'
+
+    def __init__(self, path=None, frames=None, loops=1, as_packets=False, rebase_time=True):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        if path is None and frames is None:
+            raise ValueError("需要指定 pcap 文件或数据包列表")
+        self.path = path
+        self.loops = max(0, int(loops))
+        self.as_packets = as_packets
+        self.rebase_time = rebase_time
+        self.yields_frames = not as_packets
+        self.replayed = 0
+        self._frames = frames
+
+    @property
+    def finite(self):
+        """回放是否会结束(无限循环时为 False)"""
+        return self.loops > 0
+
+    def load(self):
+        """读取(并缓存)待回放的数据包"""
+        if self._frames is None:
+            self._frames = read_pcap(self.path)
+        return self._frames
+
+    def run(self, handler):
+        """
+        回放全部数据包后返回(无限循环时不返回)。
+
+        Args:
+            handler (callable): as_packets 为 False 时接收 (frame, timestamp)，否则接收 Scapy 数据包
+        """
+        frames = self.load()
+        if not frames:
+            return
+        yield_now = cooperative_yield()
+        already_replayed = self.replayed
+        replayed = 0
+        for _ in range(self.loops) if self.loops else itertools.count():
+            offset = time.time() - frames[0][1] if self.rebase_time else 0.0
+            for frame, timestamp in frames:
+                timestamp += offset
+                if self.as_packets:
+                    packet = scapy.Ether(frame)
+                    packet.time = timestamp
+                    handler(packet)
+                else:
+                    handler(frame, timestamp)
+                replayed += 1
+                if replayed % _YIELD_EVERY_PACKETS == 0:
+                    yield_now()
+            self.replayed = already_replayed + replayed
@@ -0,0 +1,90 @@
+"""
+协议分类模块
+直接根据原始帧头部(以太网类型/IP协议号/端口)和预先计算的查找表进行协议分类，
+无需构建 Scapy 分层对象，也不再逐层调用 haslayer()。
+"""
+from services.capture_backends import ETH_P_ARP, ETH_P_IP, ETH_P_IPV6, parse_headers
+
+# 以太网类型 -> 协议名称(非 IP 帧)
+ETHERTYPE_NAMES = {
+    ETH_P_ARP: "ARP",
+    0x8035: "RARP",
+    0x88CC: "LLDP",
+    0x888E: "EAPOL",
+}
+
+# IP 协议号 -> 协议名称
+IP_PROTOCOL_NAMES = {
+    1: "ICMP",
+    2: "IGMP",
+    6: "TCP",
+    17: "UDP",
+    47: "GRE",
+    50: "ESP",
+    58: "ICMPv6",
+    132: "SCTP",
+}
+
+# 知名应用层端口
+TCP_PORT_NAMES = {
+    53: "DNS",
+    80: "HTTP",
+    8080: "HTTP",
+    443: "TLS",
+    853: "TLS",
+    8443: "TLS",
+}
+
+UDP_PORT_NAMES = {
+    53: "DNS",
+    5353: "DNS",
+    443: "QUIC",
+}
+
+
+def _build_port_table(names):
+    table = [None] * 65536
+    for port, name in names.items():
+        table[port] = name
+    return tuple(table)
+
+
+_IP_PROTO_TABLE = tuple(IP_PROTOCOL_NAMES.get(proto, "Other") for proto in range(256))
+_TCP_PORT_TABLE = _build_port_table(TCP_PORT_NAMES)
+_UDP_PORT_TABLE = _build_port_table(UDP_PORT_NAMES)
+
+
+def classify_headers(headers):
+    """
+    根据已解析的头部进行协议分类。
+
+    Args:
+        headers (FrameHeaders | None): capture_backends.parse_headers 的结果
+
+    Returns:
+        str: 协议名称，应用层协议优先于传输层协议
+    """
+    if headers is None:
+        return "Other"
+    if headers.ethertype not in (ETH_P_IP, ETH_P_IPV6):
+        return ETHERTYPE_NAMES.get(headers.ethertype, "Other")
+
+    proto = headers.ip_proto
+    if proto == 6:
+        return _TCP_PORT_TABLE[headers.dport] or _TCP_PORT_TABLE[headers.sport] or "TCP"
+    if proto == 17:
+        return _UDP_PORT_TABLE[headers.dport] or _UDP_PORT_TABLE[headers.sport] or "UDP"
+    return _IP_PROTO_TABLE[proto]
+
+
+def classify_frame(frame):
+    """
+    对以太网帧原始字节进行协议分类。
+
+    Args:
+        frame (bytes | memoryview): 以太网帧原始字节
+
+    Returns:
+        str: 协议名称
+    """
+    return classify_headers(parse_headers(frame))
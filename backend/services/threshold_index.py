@@ -0,0 +1,209 @@
+"""
+阈值索引模块
+在进程内缓存已启用的阈值，按 (指标, 聚合方式, 窗口, 接口) 分组并按阈值排序，
+评估时用二分查找一次取出所有被突破的阈值，不再每个周期查询数据库。
+阈值路由在增删改后调用 notify_threshold_changed() 更新本进程的索引和冷却状态，
+并通过 worker event 通知其他 Web 进程(配置消息队列时只有主进程评估阈值)。
+"""
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+
+from models import Threshold
+from services.cooldown_store import forget_cooldowns, get_cooldown_store
+from services.message_queue import on_worker_event, publish_worker_event
+from services.window_stats import DEFAULT_WINDOW_SECONDS
+
+THRESHOLD_CHANGED_EVENT = 'threshold_changed'
+
+# 与 ORM 对象脱离的阈值快照，可以安全地在后台任务中使用
+ThresholdEntry = namedtuple('ThresholdEntry', [
+    'id', 'user_id', 'metric', 'value', 'interface', 'aggregation', 'window_seconds'
+])
+
+
+class ThresholdIndex:
+    """
+    阈值索引: (metric, aggregation, window_seconds, interface) -> 按 value 升序排列的阈值。
+
+    interface 为 None 的阈值适用于所有接口。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._buckets = {}
+        self._specs = {}
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def make_entry(threshold):
+        """把阈值对象转换为 ThresholdEntry"""
+        return ThresholdEntry(
+            id=threshold.id,
+            user_id=threshold.user_id,
+            metric=threshold.metric,
+            value=float(threshold.value),
+            interface=getattr(threshold, 'interface', None) or None,
+            aggregation=getattr(threshold, 'aggregation', None) or 'avg',
+            window_seconds=getattr(threshold, 'window_seconds', None) or DEFAULT_WINDOW_SECONDS
+        )
+
+    @staticmethod
+    def _key(entry):
+        return (entry.metric, entry.aggregation, entry.window_seconds, entry.interface)
+
+    def _rebuild_specs(self):
+        specs = {}
+        for metric, aggregation, window_seconds, _ in self._buckets:
+            specs.setdefault(metric, set()).add((aggregation, window_seconds))
+        self._specs = {metric: sorted(items) for metric, items in specs.items()}
+
+    def load(self, thresholds):
+        """用给定的阈值集合重建索引(只保留已启用的阈值)"""
+        entries = {}
+        buckets = {}
+        for threshold in thresholds:
+            if not threshold.is_enabled:
+                continue
+            entry = self.make_entry(threshold)
+            entries[entry.id] = entry
+            buckets.setdefault(self._key(entry), []).append(entry)
+
+        for key, items in buckets.items():
+            items.sort(key=lambda item: (item.value, item.id))
+            buckets[key] = ([item.value for item in items], items)
+
+        with self._lock:
+            self._entries = entries
+            self._buckets = buckets
+            self._rebuild_specs()
+            self.loaded = True
+
+    def _remove_locked(self, threshold_id):
+        entry = self._entries.pop(threshold_id, None)
+        if entry is None:
+            return
+        values, items = self._buckets[self._key(entry)]
+        position = items.index(entry)
+        del values[position]
+        del items[position]
+        if not items:
+            del self._buckets[self._key(entry)]
+
+    def upsert(self, threshold):
+        """新增或更新一个阈值；已禁用的阈值会从索引中移除"""
+        self.apply(threshold.id, self.make_entry(threshold) if threshold.is_enabled else None)
+
+    def apply(self, threshold_id, entry):
+        """
+        用 entry 替换索引中的阈值。
+
+        Args:
+            threshold_id (int): 阈值 ID
+            entry (ThresholdEntry | None): None 表示阈值已删除或禁用
+        """
+        with self._lock:
+            self._remove_locked(threshold_id)
+            if entry is not None:
+                self._insert_locked(entry)
+            self._rebuild_specs()
+
+    def _insert_locked(self, entry):
+        values, items = self._buckets.setdefault(self._key(entry), ([], []))
+        position = bisect_left(values, entry.value)
+        while position < len(items) and items[position].value == entry.value \
+                and items[position].id < entry.id:
+            position += 1
+        values.insert(position, entry.value)
+        items.insert(position, entry)
+        self._entries[entry.id] = entry
+
+    def remove(self, threshold_id):
+        """从索引中移除阈值"""
+        with self._lock:
+            self._remove_locked(threshold_id)
+            self._rebuild_specs()
+
+    def specs(self, metric):
+        """该指标的阈值用到的所有 (聚合方式, 窗口长度) 组合"""
+        return self._specs.get(metric, ())
+
+    def breached(self, metric, interface, value, aggregation='avg',
+                 window_seconds=DEFAULT_WINDOW_SECONDS):
+        """
+        查找被 value 突破(value > 阈值)的所有阈值。
+
+        Args:
+            metric (str): 指标名称
+            interface (str): 接口名称，同时匹配不限接口的阈值
+            value (float): 当前窗口统计值
+            aggregation (str): 聚合方式
+            window_seconds (int): 窗口长度(秒)
+
+        Returns:
+            list[ThresholdEntry]: 按阈值升序排列
+        """
+        result = []
+        with self._lock:
+            base = (metric, aggregation, window_seconds)
+            keys = (base + (None,),) if interface is None else (base + (None,), base + (interface,))
+            for key in keys:
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    values, items = bucket
+                    result.extend(items[:bisect_left(values, value)])
+        if len(result) > 1:
+            result.sort(key=lambda item: item.value)
+        return result
+
+
+_index = ThresholdIndex()
+
+
+def get_threshold_index():
+    """获取阈值索引，首次使用或失效后从数据库加载(需在应用上下文中调用)"""
+    if not _index.loaded:
+        _index.load(Threshold.query.filter_by(is_enabled=True).all())
+    return _index
+
+
+def invalidate_threshold_index():
+    """使阈值索引失效，下次使用时重新从数据库加载"""
+    _index.loaded = False
+
+
+def notify_threshold_changed(threshold_id, threshold=None, reset_cooldown=True):
+    """
+    阈值增删改后调用(需在应用上下文中): 更新本进程的索引和冷却状态，并通知其他 Web 进程。
+
+    Args:
+        threshold_id (int): 阈值 ID
+        threshold (Threshold | None): 新增或更新后的阈值，删除时为 None
+        reset_cooldown (bool): 是否清除该阈值的冷却状态(阈值条件改变后重新开始计算)
+    """
+    entry = None
+    if threshold is not None and threshold.is_enabled:
+        entry = ThresholdIndex.make_entry(threshold)
+    get_threshold_index().apply(threshold_id, entry)
+    if reset_cooldown:
+        get_cooldown_store().clear(threshold_id)
+    publish_worker_event(THRESHOLD_CHANGED_EVENT, {
+        'id': threshold_id,
+        'entry': entry._asdict() if entry is not None else None,
+        'reset_cooldown': reset_cooldown
+    })
+
+
+@on_worker_event(THRESHOLD_CHANGED_EVENT)
+def _apply_remote_change(change):
+    """其他进程修改了阈值: 更新本进程的索引(尚未加载时首次使用会从数据库读取)并丢弃冷却缓存"""
+    if _index.loaded:
+        entry = change.get('entry')
+        _index.apply(change['id'], ThresholdEntry(**entry) if entry else None)
+    if change.get('reset_cooldown'):
+        # 数据库中的冷却记录已由发起修改的进程删除
+        forget_cooldowns(change['id'])
@@ -0,0 +1,219 @@
+"""
+流量数据导出模块
+使用服务端游标分批读取历史流量，以生成器方式逐块编码为 NDJSON / CSV / 列式二进制格式，
+内存占用只与批大小有关，与导出的时间范围无关。
+"""
+import csv
+import io
+import json
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from extensions import db
+from models import Traffic
+
+# 列式格式: 文件头 + 若干数据块 + 行数为 0 的结束块
+COLUMNAR_MAGIC = b'NMTC'
+COLUMNAR_VERSION = 2
+COLUMNAR_COLUMNS = ('id', 'interface', 'bytes_sent', 'bytes_recv', 'created_at', 'host_id')
+# 主机列中表示本机流量(host_id 为空)的字典下标
+COLUMNAR_LOCAL_HOST = 0xFFFF
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+    'columnar': 'application/octet-stream'
+}
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NEEDS_BYTESWAP = sys.byteorder != 'little'
+
+
+def iter_traffic_batches(start_time=None, end_time=None, interface=None, chunk_size=1000, host_id=None):
+    """
+    按 (created_at, id) 顺序分批读取原始流量记录(需在应用上下文中调用)。
+    默认只读取本机流量，指定 host_id 时读取该 Agent 主机上报的流量。
+
+    Yields:
+        list[Row]: 每批最多 chunk_size 行 (id, interface, bytes_sent, bytes_recv, created_at, host_id)
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    stmt = select(
+        Traffic.id, Traffic.interface, Traffic.bytes_sent, Traffic.bytes_recv, Traffic.created_at,
+        Traffic.host_id
+    ).where(
+        Traffic.host_id == host_id if host_id else Traffic.host_id.is_(None)
+    ).order_by(Traffic.created_at.asc(), Traffic.id.asc())
+    if interface:
+        stmt = stmt.where(Traffic.interface == interface)
+    if start_time:
+        stmt = stmt.where(Traffic.created_at >= start_time)
+    if end_time:
+        stmt = stmt.where(Traffic.created_at <= end_time)
+
+    result = db.session.execute(stmt.execution_options(yield_per=chunk_size))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def _format_time(value):
+    return value.isoformat(sep=' ') if value is not None else None
+
+
+def encode_ndjson(batches):
+    """每行一个 JSON 对象，每批编码为一个数据块"""
+    dumps = json.dumps
+    for rows in batches:
+        yield ''.join([
+            dumps({
+                'id': row[0],
+                'interface': row[1],
+                'bytes_sent': row[2],
+                'bytes_recv': row[3],
+                'created_at': _format_time(row[4]),
+                'host_id': row[5]
+            }, separators=(',', ':')) + '\n'
+            for row in rows
+        ])
+
+
+def encode_csv(batches):
+    """带表头的 CSV，每批编码为一个数据块"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(COLUMNAR_COLUMNS)
+    yield buffer.getvalue()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows((row[0], row[1], row[2], row[3], _format_time(row[4]), row[5]) for row in rows)
+        yield buffer.getvalue()
+
+
+def _int64_column(values):
+    column = array('q', values)
+    if _NEEDS_BYTESWAP:
+        column.byteswap()
+    return column.tobytes()
+
+
+def _encode_dictionary(dictionary):
+    parts = [struct.pack('<H', len(dictionary))]
+    for name in dictionary:
+        encoded = name.encode('utf-8')
+        parts.append(struct.pack('<H', len(encoded)) + encoded)
+    return b''.join(parts)
+
+
+def _decode_dictionary(data, offset):
+    (entries,) = struct.unpack_from('<H', data, offset)
+    offset += 2
+    dictionary = []
+    for _ in range(entries):
+        (length,) = struct.unpack_from('<H', data, offset)
+        dictionary.append(data[offset + 2:offset + 2 + length].decode('utf-8'))
+        offset += 2 + length
+    return dictionary, offset
+
+
+def _uint16_column(data, offset, count):
+    column = array('H')
+    column.frombytes(data[offset:offset + 2 * count])
+    if _NEEDS_BYTESWAP:
+        column.byteswap()
+    return column, offset + 2 * count
+
+
+def encode_columnar(batches):
+    """
+    紧凑的列式二进制格式(小端序)，每批一个自描述的数据块:
+
+    - 块头: 行数 uint32；行数为 0 表示结束
+    - 接口字典、主机字典: 条目数 uint16，每个条目为 长度 uint16 + UTF-8 字节
+    - id / bytes_sent / bytes_recv / created_at(UTC 微秒时间戳) 各一列 int64
+    - 接口列: 接口字典下标 uint16
+    - 主机列: 主机字典下标 uint16，COLUMNAR_LOCAL_HOST 表示本机流量
+    """
+    yield COLUMNAR_MAGIC + struct.pack('<B', COLUMNAR_VERSION)
+    for rows in batches:
+        if not rows:
+            continue
+        ids, interfaces, sent, recv, created, hosts = zip(*rows)
+        dictionary = {}
+        codes = array('H', [dictionary.setdefault(name, len(dictionary)) for name in interfaces])
+        host_dictionary = {}
+        host_codes = array('H', [
+            COLUMNAR_LOCAL_HOST if host is None else host_dictionary.setdefault(host, len(host_dictionary))
+            for host in hosts
+        ])
+        if _NEEDS_BYTESWAP:
+            codes.byteswap()
+            host_codes.byteswap()
+
+        parts = [struct.pack('<I', len(rows))]
+        parts.append(_encode_dictionary(dictionary))
+        parts.append(_encode_dictionary(host_dictionary))
+        parts.append(_int64_column(ids))
+        parts.append(_int64_column(sent))
+        parts.append(_int64_column(recv))
+        parts.append(_int64_column(
+            (value - _EPOCH) // _MICROSECOND if value is not None else 0 for value in created
+        ))
+        parts.append(codes.tobytes())
+        parts.append(host_codes.tobytes())
+        yield b''.join(parts)
+    yield struct.pack('<I', 0)
+
+
+def read_columnar(data):
+    """
+    解析列式导出数据，供客户端和测试使用。
+
+    Returns:
+        dict: 列名 -> 值列表
+    """
+    if data[:4] != COLUMNAR_MAGIC or data[4] != COLUMNAR_VERSION:
+        raise ValueError("不是有效的列式导出数据")
+    columns = {name: [] for name in COLUMNAR_COLUMNS}
+    offset = 5
+    while True:
+        (count,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        if count == 0:
+            return columns
+        dictionary, offset = _decode_dictionary(data, offset)
+        host_dictionary, offset = _decode_dictionary(data, offset)
+
+        values = {}
+        for name in ('id', 'bytes_sent', 'bytes_recv', 'created_at'):
+            column = array('q')
+            column.frombytes(data[offset:offset + 8 * count])
+            if _NEEDS_BYTESWAP:
+                column.byteswap()
+            values[name] = column
+            offset += 8 * count
+        codes, offset = _uint16_column(data, offset, count)
+        host_codes, offset = _uint16_column(data, offset, count)
+
+        columns['id'].extend(values['id'])
+        columns['bytes_sent'].extend(values['bytes_sent'])
+        columns['bytes_recv'].extend(values['bytes_recv'])
+        columns['interface'].extend(dictionary[code] for code in codes)
+        columns['created_at'].extend(_EPOCH + us * _MICROSECOND for us in values['created_at'])
+        columns['host_id'].extend(
+            None if code == COLUMNAR_LOCAL_HOST else host_dictionary[code] for code in host_codes
+        )
+
+
+ENCODERS = {
+    'ndjson': encode_ndjson,
+    'csv': encode_csv,
+    'columnar': encode_columnar
+}
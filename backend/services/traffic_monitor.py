@@ -2,98 +2,98 @@
 流量监控服务模块
 负责后台监控网络流量，计算速率，检查阈值并在超出阈值时发送告警。
 """
+import atexit
 import time
-from collections import defaultdict, deque
-import psutil
+from collections import defaultdict
+from datetime import datetime, timezone
 from flask import current_app
-from extensions import socketio, db
+from extensions import socketio
 import extensions as ext
-from models import Traffic, Threshold
 from services.alert_manager import AlertManager
-
-# 冷却时间（秒）（例如：5分钟）
-ALERT_COOLDOWN_SECONDS = 300
-WINDOW_SIZE_SECONDS = 30
-
-# 历史记录存储: interface -> metric -> deque([(timestamp, value), ...])
-_rate_history = defaultdict(lambda: defaultdict(deque))
-
-def _check_single_threshold(interface, metric, average_value, threshold):
+from services.alert_queue import alert_worker_task
+from services.cooldown_store import get_cooldown_store
+from services.counter_snapshot import CounterSnapshot, rates_to_dicts
+from services.counter_sources import get_counter_source
+from services.hires_sampler import configure_sampler
+from services.message_queue import publish_worker_event
+from services.traffic_stream import TRAFFIC_RATES_EVENT, get_traffic_stream
+from services.traffic_writer import configure_writer, flush_on_shutdown
+from services.traffic_rollup import rollup_task
+from services.threshold_index import get_threshold_index
+from services.window_stats import AGGREGATIONS, DEFAULT_WINDOW_SECONDS, SlidingWindow
+
+WINDOW_SIZE_SECONDS = DEFAULT_WINDOW_SECONDS
+
+# 历史记录存储: interface -> (metric, window_seconds) -> SlidingWindow
+_rate_history = defaultdict(dict)
+
+def _check_single_threshold(interface, metric, window_value, threshold):
     """
     检查单个阈值是否被突破，如果是则发送告警。
     """
-    if average_value <= threshold.value:
+    if window_value <= threshold.value:
         return
 
-    # pylint: disable=protected-access
-    last_alert_time = ext._alert_cooldowns.get(threshold.id, 0)
-    current_time = time.time()
-
-    if current_time - last_alert_time <= ALERT_COOLDOWN_SECONDS:
+    # 每个 (阈值, 接口) 独立冷却，冷却状态持久化并在进程间共享
+    if not get_cooldown_store().try_acquire(threshold.id, interface):
         return
 
-    # --- 阈值突破 (平均值) 且不在冷却期 ---
+    # --- 阈值突破 (窗口统计值) 且不在冷却期 ---
     message = (
         f"检测到瓶颈: {interface} 上的 {metric} "
-        f"平均({WINDOW_SIZE_SECONDS}s): {average_value:.2f}, "
+        f"{AGGREGATIONS[threshold.aggregation]}({threshold.window_seconds}s): {window_value:.2f}, "
         f"阈值: {threshold.value:.2f}"
     )
 
-    # 如果平均值 > 2 * 阈值，也许是 ERROR
-    alert_level = 'error' if average_value > threshold.value * 2 else 'warning'
+    # 如果统计值 > 2 * 阈值，也许是 ERROR
+    alert_level = 'error' if window_value > threshold.value * 2 else 'warning'
 
     AlertManager.send_alert(
         user_id=threshold.user_id,
         message=message,
-        level=alert_level
+        level=alert_level,
+        threshold_id=threshold.id,
+        interface=interface
     )
 
-    # 更新冷却时间
-    ext._alert_cooldowns[threshold.id] = current_time
-
 
 def check_and_notify_thresholds(rates):
     """
-    使用滑动窗口平均值检查流量速率是否超过活动阈值。
+    使用滑动窗口统计值(平均/最小/最大/分位数)检查流量速率是否超过活动阈值。
+    每个采样只更新阈值实际用到的窗口，代价与窗口长度无关。
     """
     try:
-        active_thresholds = Threshold.query.filter_by(is_enabled=True).all()
-        if not active_thresholds:
+        threshold_index = get_threshold_index()
+        if not threshold_index:
             return
 
-        thresholds_by_metric = defaultdict(list)
-        for t in active_thresholds:
-            thresholds_by_metric[t.metric].append(t)
-
         current_time = time.time()
 
         for rate_info in rates:
             interface = rate_info.get('interface', 'unknown')
+            windows = _rate_history[interface]
 
             # 更新历史并检查 rate_info 中存在的每个指标的阈值
             for metric, current_value in rate_info.items():
                 if metric == 'interface':
                     continue
 
-                # 1. 更新滑动窗口历史
-                history_queue = _rate_history[interface][metric]
-                history_queue.append((current_time, current_value))
-
-                # 移除旧数据点
-                while history_queue and history_queue[0][0] < current_time - WINDOW_SIZE_SECONDS:
-                    history_queue.popleft()
-
-                # 计算平均值
-                if not history_queue:
-                    continue
+                for aggregation, window_seconds in threshold_index.specs(metric):
+                    # 1. 更新滑动窗口(同一窗口长度的多种聚合方式共用一个窗口)
+                    window = windows.get((metric, window_seconds))
+                    if window is None:
+                        window = windows[(metric, window_seconds)] = SlidingWindow(window_seconds)
+                    if window.last_timestamp != current_time:
+                        window.add(current_time, current_value)
 
-                total_value = sum(val for _, val in history_queue)
-                average_value = total_value / len(history_queue)
+                    window_value = window.value(aggregation)
+                    if window_value is None:
+                        continue
 
-                # 2. 对比平均值与阈值
-                if metric in thresholds_by_metric:
-                    for threshold in thresholds_by_metric[metric]:
-                        _check_single_threshold(interface, metric, average_value, threshold)
+                    # 2. 二分查找所有被窗口统计值突破的阈值
+                    for threshold in threshold_index.breached(
+                            metric, interface, window_value, aggregation, window_seconds):
+                        _check_single_threshold(interface, metric, window_value, threshold)
 
     except Exception as e: # pylint: disable=broad-exception-caught
         current_app.logger.error(f"检查阈值时出错: {e}")
@@ -101,69 +101,76 @@ def check_and_notify_thresholds(rates):
 
 def get_traffic_rates():
     """
-    计算每秒字节速率的辅助函数。
+    计算每个网卡所有计数器(字节/包/错误/丢弃)每秒速率的辅助函数。
     """
-    current_counters = psutil.net_io_counters(pernic=True)
-    current_time = time.time()
+    # pylint: disable=protected-access
+    if ext._counter_snapshot is None:
+        ext._counter_snapshot = CounterSnapshot()
 
-    rates = []
+    names, rates = ext._counter_snapshot.update(get_counter_source().read(), time.time())
+    return rates_to_dicts(names, rates)
 
-    # pylint: disable=protected-access
-    if not ext._last_io_counters:
-        ext._last_io_counters = {"time": current_time, "counters": current_counters}
-        return []
+def _publish_rates(rates, writer):
+    """检查阈值、写入缓冲区并推送一帧流量数据"""
+    # 1. 检查瓶颈/阈值突破 (告警只进入队列，由告警工作任务写库和推送)
+    check_and_notify_thresholds(rates)
 
-    prev_time = ext._last_io_counters["time"]
-    prev_counters = ext._last_io_counters["counters"]
+    # 2. 流量数据先进入写缓冲区，按数量或时间批量写入数据库
+    sampled_at = datetime.now(timezone.utc)
+    for rate in rates:
+        writer.add(rate['interface'], rate['bytes_sent_sec'], rate['bytes_recv_sec'], sampled_at)
+    if writer.should_flush():
+        writer.flush()
 
-    time_diff = current_time - prev_time
-    if time_diff == 0:
-        return [] # 避免除以零
+    # 3. 通过WebSocket发送流量数据: 订阅客户端接收增量帧，旧版客户端接收完整广播
+    get_traffic_stream().publish(rates)
+    # 多进程部署时其他 Web 进程的订阅客户端由各自进程计算增量帧
+    publish_worker_event(TRAFFIC_RATES_EVENT, rates)
+    if current_app.config.get('TRAFFIC_STREAM_LEGACY_BROADCAST', True):
+        socketio.emit('traffic_data', {'rates': rates})
 
-    for if_name, current_status in current_counters.items():
-        if if_name in prev_counters and if_name != "lo0":
-            prev_status = prev_counters[if_name]
-            bytes_sent_rate = (current_status.bytes_sent - prev_status.bytes_sent) / time_diff
-            bytes_recv_rate = (current_status.bytes_recv - prev_status.bytes_recv) / time_diff
 
-            rates.append({
-                "interface": if_name,
-                "bytes_sent_sec": round(bytes_sent_rate, 2),
-                "bytes_recv_sec": round(bytes_recv_rate, 2)
-            })
+def _run_hires_sampling(writer):
+    """
+    高精度采样模式: 按自适应间隔采样，细粒度数据只保留在内存中，
+    每个 TRAFFIC_UPDATE_INTERVAL 周期推送并保存一次聚合帧。
+    """
+    sampler = configure_sampler(current_app.config, get_counter_source().read)
+    emit_interval = current_app.config.get('TRAFFIC_UPDATE_INTERVAL', 3)
+    next_emit = time.monotonic() + emit_interval
+
+    while True:
+        delay = sampler.sample()
+        now = time.monotonic()
+        if now >= next_emit:
+            # 落后超过一个周期时不补发，直接从当前时间重新计时
+            next_emit = max(next_emit + emit_interval, now)
+            rates = sampler.drain()
+            if rates:
+                _publish_rates(rates, writer)
+        socketio.sleep(min(delay, max(next_emit - time.monotonic(), 0)))
 
-    ext._last_io_counters = {"time": current_time, "counters": current_counters}
-    return rates
 
 def monitor_traffic_task(app):
     """
     后台任务，定期获取流量数据，保存数据，
     检查阈值，并通过WebSocket发送数据。
     """
+    writer = configure_writer(app.config)
+    get_traffic_stream().configure(app.config)
+    atexit.register(flush_on_shutdown, app)
+    # 启动增量汇总任务和告警工作任务
+    socketio.start_background_task(rollup_task, app)
+    socketio.start_background_task(alert_worker_task, app)
+
     with app.app_context():
+        if current_app.config.get('TRAFFIC_SAMPLING_MODE') == 'hires':
+            _run_hires_sampling(writer)
+            return
+
         while True:
             rates = get_traffic_rates()
             if rates:
-                # 1. 检查瓶颈/阈值突破
-                check_and_notify_thresholds(rates)
-
-                # 2. 保存流量数据到数据库
-                for rate in rates:
-                    traffic_entry = Traffic(
-                        interface=rate['interface'],
-                        bytes_sent=int(rate['bytes_sent_sec']),
-                        bytes_recv=int(rate['bytes_recv_sec'])
-                    )
-                    db.session.add(traffic_entry)
-
-                try:
-                    # 提交流量数据和任何新创建的告警（来自AlertManager）
-                    db.session.commit()
-                except Exception as e: # pylint: disable=broad-exception-caught
-                    current_app.logger.error(f"保存数据到数据库时出错: {e}")
-                    db.session.rollback()
-
-                # 3. 通过WebSocket发送流量数据
-                socketio.emit('traffic_data', {'rates': rates})
+                _publish_rates(rates, writer)
 
             socketio.sleep(current_app.config.get('TRAFFIC_UPDATE_INTERVAL', 3))
@@ -0,0 +1,210 @@
+"""
+流量汇总服务模块
+增量地将原始流量采样汇总到 1分钟/1小时/1天 时间桶，并按层级执行数据保留策略。
+"""
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from extensions import db, socketio
+from models import Traffic, TrafficRollup, RollupWatermark
+
+# 汇总层级: 时间桶长度(秒) -> 名称
+ROLLUP_TIERS = {60: '1m', 3600: '1h', 86400: '1d'}
+WATERMARK_NAME = 'traffic'
+
+_VALUE_COLUMNS = (
+    'samples', 'bytes_sent_min', 'bytes_sent_max', 'bytes_sent_sum',
+    'bytes_recv_min', 'bytes_recv_max', 'bytes_recv_sum'
+)
+
+
+def _as_utc(value):
+    """数据库中的时间均按 UTC 存储(SQLite 会丢失时区信息)"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def bucket_start(created_at, resolution):
+    """计算时间点所在时间桶的起始时间(不含时区的 UTC 时间)"""
+    epoch = int(_as_utc(created_at).timestamp())
+    start = datetime.fromtimestamp(epoch - epoch % resolution, timezone.utc)
+    return start.replace(tzinfo=None)
+
+
+def _aggregate(rows):
+    """将原始采样按 (层级, 接口, 时间桶) 聚合"""
+    buckets = {}
+    for _, interface, sent, recv, created_at in rows:
+        for resolution in ROLLUP_TIERS:
+            key = (resolution, interface, bucket_start(created_at, resolution))
+            acc = buckets.get(key)
+            if acc is None:
+                buckets[key] = [1, sent, sent, sent, recv, recv, recv]
+            else:
+                acc[0] += 1
+                acc[1] = min(acc[1], sent)
+                acc[2] = max(acc[2], sent)
+                acc[3] += sent
+                acc[4] = min(acc[4], recv)
+                acc[5] = max(acc[5], recv)
+                acc[6] += recv
+    return buckets
+
+
+def _merge_rows(buckets):
+    """将新的聚合结果与已有的时间桶合并(INSERT ... ON CONFLICT DO UPDATE)"""
+    values = [
+        dict(zip(('resolution', 'interface', 'bucket_start') + _VALUE_COLUMNS, key + tuple(acc)))
+        for key, acc in buckets.items()
+    ]
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            insert, smallest, largest = sqlite.insert, db.func.min, db.func.max
+        else:
+            insert, smallest, largest = postgresql.insert, db.func.least, db.func.greatest
+        table = TrafficRollup.__table__
+        stmt = insert(table)
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['resolution', 'interface', 'bucket_start'],
+            set_={
+                'samples': table.c.samples + excluded.samples,
+                'bytes_sent_min': smallest(table.c.bytes_sent_min, excluded.bytes_sent_min),
+                'bytes_sent_max': largest(table.c.bytes_sent_max, excluded.bytes_sent_max),
+                'bytes_sent_sum': table.c.bytes_sent_sum + excluded.bytes_sent_sum,
+                'bytes_recv_min': smallest(table.c.bytes_recv_min, excluded.bytes_recv_min),
+                'bytes_recv_max': largest(table.c.bytes_recv_max, excluded.bytes_recv_max),
+                'bytes_recv_sum': table.c.bytes_recv_sum + excluded.bytes_recv_sum,
+            }
+        )
+        db.session.execute(stmt, values)
+        return
+
+    # 其他数据库: 先读取已有时间桶再合并
+    existing = {
+        (row.resolution, row.interface, row.bucket_start): row
+        for row in TrafficRollup.query.filter(
+            tuple_(TrafficRollup.resolution, TrafficRollup.interface, TrafficRollup.bucket_start)
+            .in_(list(buckets.keys()))
+        )
+    }
+    for value in values:
+        key = (value['resolution'], value['interface'], value['bucket_start'])
+        row = existing.get(key)
+        if row is None:
+            db.session.add(TrafficRollup(**value))
+            continue
+        row.samples += value['samples']
+        row.bytes_sent_min = min(row.bytes_sent_min, value['bytes_sent_min'])
+        row.bytes_sent_max = max(row.bytes_sent_max, value['bytes_sent_max'])
+        row.bytes_sent_sum += value['bytes_sent_sum']
+        row.bytes_recv_min = min(row.bytes_recv_min, value['bytes_recv_min'])
+        row.bytes_recv_max = max(row.bytes_recv_max, value['bytes_recv_max'])
+        row.bytes_recv_sum += value['bytes_recv_sum']
+
+
+def run_rollup(batch_size=5000):
+    """
+    汇总一批尚未处理的原始流量记录(需在应用上下文中调用)。
+
+    Returns:
+        int: 本次处理的原始记录数
+    """
+    watermark = db.session.get(RollupWatermark, WATERMARK_NAME)
+    if watermark is None:
+        watermark = RollupWatermark(name=WATERMARK_NAME, last_id=0)
+        db.session.add(watermark)
+
+    rows = db.session.execute(
+        select(Traffic.id, Traffic.interface, Traffic.bytes_sent, Traffic.bytes_recv, Traffic.created_at,
+               Traffic.host_id)
+        .where(Traffic.id > watermark.last_id, Traffic.created_at.isnot(None))
+        .order_by(Traffic.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        db.session.commit()
+        return 0
+
+    # 汇总表按接口名聚合，只包含本机采样；Agent 主机的采样仍推进水位线，以便按保留期删除
+    local_rows = [row[:5] for row in rows if row[5] is None]
+    if local_rows:
+        _merge_rows(_aggregate(local_rows))
+    watermark.last_id = rows[-1][0]
+    db.session.commit()
+    return len(rows)
+
+
+def apply_retention(retention):
+    """
+    按层级删除过期数据。原始记录只有在已被汇总后才会删除。
+
+    Args:
+        retention (dict): 层级 -> 保留天数；'raw' 表示原始记录，None 表示永久保留
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    raw_days = retention.get('raw')
+    if raw_days is not None:
+        watermark = db.session.get(RollupWatermark, WATERMARK_NAME)
+        last_id = watermark.last_id if watermark else 0
+        db.session.execute(
+            delete(Traffic).where(
+                Traffic.created_at < now - timedelta(days=raw_days),
+                Traffic.id <= last_id
+            )
+        )
+    for resolution in ROLLUP_TIERS:
+        days = retention.get(resolution)
+        if days is None:
+            continue
+        db.session.execute(
+            delete(TrafficRollup).where(
+                TrafficRollup.resolution == resolution,
+                TrafficRollup.bucket_start < now - timedelta(days=days)
+            )
+        )
+    db.session.commit()
+
+
+def choose_resolution(start_time, end_time, max_points, raw_interval, retention=None):
+    """
+    在满足 max_points 的前提下选择最精细的层级(从原始数据开始逐级变粗)。
+    超出某层级保留期的时间范围不会选择该层级。
+
+    Returns:
+        int | None: 时间桶长度(秒)，None 表示使用原始记录
+    """
+    retention = retention or {}
+    now = datetime.now(timezone.utc)
+    span = max((_as_utc(end_time) - _as_utc(start_time)).total_seconds(), 1)
+
+    candidates = [(None, raw_interval, retention.get('raw'))]
+    candidates += [(res, res, retention.get(res)) for res in sorted(ROLLUP_TIERS)]
+    for resolution, seconds, days in candidates:
+        if days is not None and _as_utc(start_time) < now - timedelta(days=days):
+            continue
+        if span / seconds <= max_points:
+            return resolution
+    return max(ROLLUP_TIERS)
+
+
+def rollup_task(app):
+    """定期执行增量汇总和数据保留策略"""
+    with app.app_context():
+        interval = current_app.config.get('TRAFFIC_ROLLUP_INTERVAL', 60)
+        batch_size = current_app.config.get('TRAFFIC_ROLLUP_BATCH_SIZE', 5000)
+        retention = current_app.config.get('TRAFFIC_RETENTION_DAYS', {})
+        while True:
+            try:
+                while run_rollup(batch_size) == batch_size:
+                    socketio.sleep(0)
+                apply_retention(retention)
+            except Exception as e: # pylint: disable=broad-exception-caught
+                db.session.rollback()
+                current_app.logger.error(f"流量汇总出错: {e}")
+            socketio.sleep(interval)
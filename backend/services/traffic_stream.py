@@ -0,0 +1,225 @@
+"""
+流量推送订阅模块
+客户端按接口/指标订阅实时流量，服务端只推送相对上一帧发生变化的值(增量帧)。
+每个客户端同一时间最多只有一帧等待确认，慢客户端的更新会被合并为一帧，
+不会在服务端无限积压。
+"""
+import threading
+import time
+
+from extensions import socketio
+from services.message_queue import on_worker_event
+
+# 主进程通过消息队列向其他 Web 进程转发流量速率的内部事件名
+TRAFFIC_RATES_EVENT = 'traffic_rates'
+
+
+class TrafficSubscription:
+    """单个客户端的订阅状态"""
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+
+    def __init__(self, sid, interfaces=None, metrics=None, min_interval=1.0):
+        self.sid = sid
+        self.interfaces = frozenset(interfaces) if interfaces else None
+        self.metrics = frozenset(metrics) if metrics else None
+        self.min_interval = min_interval
+        self.last_sent = {}
+        self.seq = 0
+        self.in_flight_since = None
+        self.last_emit = None
+        self.pending = False
+        self.need_keyframe = True
+
+    def to_dict(self):
+        """订阅信息"""
+        return {
+            'interfaces': sorted(self.interfaces) if self.interfaces else None,
+            'metrics': sorted(self.metrics) if self.metrics else None,
+            'min_interval_ms': int(self.min_interval * 1000)
+        }
+
+
+class TrafficStream:
+    """
+    按客户端维护订阅并推送 'traffic_delta' 增量帧:
+
+        {'seq', 'keyframe', 'timestamp', 'changes': {接口: {指标: 值}}, 'removed': [接口]}
+
+    - keyframe 为 True 时 changes 包含订阅范围内的全部值，客户端应替换本地状态
+    - 客户端通过确认回调应答后才会发送下一帧；等待确认期间或未到最小推送间隔时
+      新数据只标记为待发送，下次发送时与最新状态比较，自然合并为一帧
+    - 超过 ack_timeout 未确认时认为该帧丢失，下一帧发送关键帧
+    """
+
+    def __init__(self, emit, min_interval=1.0, ack_timeout=10.0, keyframe_every=60):
+        self._emit = emit
+        self.min_interval = min_interval
+        self.ack_timeout = ack_timeout
+        self.keyframe_every = keyframe_every
+        self._subscriptions = {}
+        self._latest = {}
+        self._lock = threading.RLock()
+        self.metrics = {
+            'frames': 0,
+            'keyframes': 0,
+            'coalesced': 0,
+            'ack_timeouts': 0
+        }
+
+    def configure(self, config):
+        """根据应用配置更新推送参数，保留已有订阅"""
+        self.min_interval = config.get('TRAFFIC_STREAM_MIN_INTERVAL_MS', 1000) / 1000
+        self.ack_timeout = config.get('TRAFFIC_STREAM_ACK_TIMEOUT', 10)
+        self.keyframe_every = config.get('TRAFFIC_STREAM_KEYFRAME_EVERY', 60)
+
+    def subscribe(self, sid, interfaces=None, metrics=None, min_interval_ms=None, now=None):
+        """
+        新建或替换客户端订阅，并立即推送一帧关键帧(如果已有数据)。
+
+        Args:
+            sid (str): Socket.IO 会话 ID
+            interfaces (list[str] | None): 订阅的接口，None 表示全部
+            metrics (list[str] | None): 订阅的指标，None 表示全部
+            min_interval_ms (int | None): 客户端希望的最小推送间隔，不低于服务端配置
+        """
+        min_interval = self.min_interval
+        if min_interval_ms is not None:
+            min_interval = max(min_interval, float(min_interval_ms) / 1000)
+        subscription = TrafficSubscription(sid, interfaces, metrics, min_interval)
+        with self._lock:
+            self._subscriptions[sid] = subscription
+            self._deliver(subscription, time.monotonic() if now is None else now)
+        return subscription
+
+    def unsubscribe(self, sid):
+        """取消订阅"""
+        with self._lock:
+            return self._subscriptions.pop(sid, None) is not None
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def publish(self, rates, now=None):
+        """
+        发布新一帧流量数据并向各订阅者推送增量。
+
+        Args:
+            rates (list[dict]): get_traffic_rates() 格式的速率列表
+        """
+        now = time.monotonic() if now is None else now
+        latest = {}
+        for rate in rates:
+            values = dict(rate)
+            latest[values.pop('interface')] = values
+        with self._lock:
+            self._latest = latest
+            for subscription in list(self._subscriptions.values()):
+                self._deliver(subscription, now)
+
+    def ack(self, sid, seq, now=None):
+        """客户端确认收到 seq 帧；如有合并的待发送更新则立即发送"""
+        with self._lock:
+            subscription = self._subscriptions.get(sid)
+            if subscription is None or subscription.seq != seq:
+                return
+            subscription.in_flight_since = None
+            if subscription.pending:
+                self._deliver(subscription, time.monotonic() if now is None else now)
+
+    def _deliver(self, subscription, now):
+        if subscription.in_flight_since is not None:
+            if now - subscription.in_flight_since < self.ack_timeout:
+                self._coalesce(subscription)
+                return
+            # 确认超时: 无法确定客户端状态，下一帧发送关键帧
+            self.metrics['ack_timeouts'] += 1
+            subscription.in_flight_since = None
+            subscription.need_keyframe = True
+
+        if subscription.last_emit is not None and now - subscription.last_emit < subscription.min_interval:
+            self._coalesce(subscription)
+            return
+
+        frame = self._build_frame(subscription)
+        subscription.pending = False
+        if frame is None:
+            return
+
+        subscription.in_flight_since = now
+        subscription.last_emit = now
+        self.metrics['frames'] += 1
+        if frame['keyframe']:
+            self.metrics['keyframes'] += 1
+        sid, seq = subscription.sid, frame['seq']
+        # 订阅者一定连接在本进程，无需经过消息队列
+        self._emit('traffic_delta', frame, to=sid, callback=lambda *_: self.ack(sid, seq),
+                   ignore_queue=True)
+
+    def _coalesce(self, subscription):
+        if not subscription.pending:
+            subscription.pending = True
+            self.metrics['coalesced'] += 1
+
+    def _build_frame(self, subscription):
+        """计算订阅范围内相对上次发送状态的变化，没有变化时返回 None"""
+        keyframe = subscription.need_keyframe or (
+            self.keyframe_every and subscription.seq % self.keyframe_every == self.keyframe_every - 1
+        )
+        if keyframe and not self._latest and not subscription.last_sent:
+            return None
+
+        changes = {}
+        visible = set()
+        for interface, values in self._latest.items():
+            if subscription.interfaces is not None and interface not in subscription.interfaces:
+                continue
+            visible.add(interface)
+            if subscription.metrics is not None:
+                values = {metric: value for metric, value in values.items()
+                          if metric in subscription.metrics}
+            previous = {} if keyframe else subscription.last_sent.get(interface, {})
+            diff = {metric: value for metric, value in values.items() if previous.get(metric) != value}
+            if diff:
+                changes[interface] = diff
+
+        removed = [interface for interface in subscription.last_sent if interface not in visible]
+        if not changes and not removed and not keyframe:
+            return None
+
+        if keyframe:
+            subscription.last_sent = {interface: dict(diff) for interface, diff in changes.items()}
+        else:
+            for interface in removed:
+                del subscription.last_sent[interface]
+            for interface, diff in changes.items():
+                subscription.last_sent.setdefault(interface, {}).update(diff)
+        subscription.need_keyframe = False
+        subscription.seq += 1
+        return {
+            'seq': subscription.seq,
+            'keyframe': bool(keyframe),
+            'timestamp': time.time(),
+            'changes': changes,
+            'removed': [] if keyframe else removed
+        }
+
+    def get_metrics(self):
+        """推送统计"""
+        return dict(self.metrics, subscribers=len(self))
+
+
+_stream = None
+
+
+def get_traffic_stream():
+    """获取流量推送订阅管理器"""
+    global _stream # pylint: disable=global-statement
+    if _stream is None:
+        _stream = TrafficStream(socketio.emit)
+    return _stream
+
+
+@on_worker_event(TRAFFIC_RATES_EVENT)
+def _publish_forwarded_rates(rates):
+    """其他进程(主进程)转发的流量速率，推送给本进程的订阅客户端"""
+    get_traffic_stream().publish(rates)
@@ -0,0 +1,146 @@
+"""
+流量写入缓冲模块
+以写后(write-behind)方式缓存流量采样，按数量或时间触发，用一次批量 INSERT 写入数据库，
+减少 SQLite 的写放大以及与历史查询之间的锁竞争。
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import insert
+
+from extensions import db
+from models import Traffic
+
+
+class TrafficWriteBuffer:
+    """
+    流量采样写缓冲区。
+
+    - 队列有界，积压超过 max_backlog 时丢弃最旧的采样并计数
+    - 积压达到 batch_size 或距上次写入超过 flush_interval 秒时批量写入
+    - 写入失败时采样重新放回队列头部，等待下次重试
+    """
+
+    def __init__(self, batch_size=500, flush_interval=30, max_backlog=50000):
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.max_backlog = max(self.batch_size, int(max_backlog))
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.metrics = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'last_batch_size': 0
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        """根据应用配置创建写缓冲区"""
+        return cls(
+            batch_size=config.get('TRAFFIC_FLUSH_BATCH_SIZE', 500),
+            flush_interval=config.get('TRAFFIC_FLUSH_INTERVAL', 30),
+            max_backlog=config.get('TRAFFIC_MAX_BACKLOG', 50000)
+        )
+
+    def add(self, interface, bytes_sent, bytes_recv, created_at=None, host_id=None):
+        """缓存一条流量采样(host_id 为 None 表示本机，否则为上报的 Agent 主机)"""
+        row = {
+            'interface': interface,
+            'bytes_sent': int(bytes_sent),
+            'bytes_recv': int(bytes_recv),
+            'created_at': created_at or datetime.now(timezone.utc),
+            'host_id': host_id
+        }
+        with self._lock:
+            if len(self._queue) >= self.max_backlog:
+                self._queue.popleft()
+                self.metrics['dropped'] += 1
+            self._queue.append(row)
+            self.metrics['enqueued'] += 1
+
+    def backlog(self):
+        """当前待写入的采样数"""
+        return len(self._queue)
+
+    def should_flush(self):
+        """是否达到数量或时间触发条件"""
+        if not self._queue:
+            return False
+        return (len(self._queue) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval)
+
+    def flush(self):
+        """
+        将全部积压采样以批量 INSERT 写入数据库(需在应用上下文中调用)。
+
+        Returns:
+            int: 写入的行数
+        """
+        with self._lock:
+            rows = list(self._queue)
+            self._queue.clear()
+        self._last_flush = time.monotonic()
+        if not rows:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            for offset in range(0, len(rows), self.batch_size):
+                db.session.execute(insert(Traffic), rows[offset:offset + self.batch_size])
+            db.session.commit()
+        except Exception as e: # pylint: disable=broad-exception-caught
+            db.session.rollback()
+            self.metrics['failed_flushes'] += 1
+            current_app.logger.error(f"批量写入流量数据失败: {e}")
+            with self._lock:
+                # 放回队列头部等待重试，超出积压上限的部分丢弃最旧的
+                self._queue.extendleft(reversed(rows))
+                while len(self._queue) > self.max_backlog:
+                    self._queue.popleft()
+                    self.metrics['dropped'] += 1
+            return 0
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.metrics['flushes'] += 1
+        self.metrics['written'] += len(rows)
+        self.metrics['last_flush_ms'] = round(elapsed_ms, 2)
+        self.metrics['max_flush_ms'] = round(max(self.metrics['max_flush_ms'], elapsed_ms), 2)
+        self.metrics['last_batch_size'] = len(rows)
+        return len(rows)
+
+    def get_metrics(self):
+        """写缓冲区指标(含当前积压)"""
+        return dict(self.metrics, backlog=self.backlog())
+
+
+_writer = TrafficWriteBuffer()
+
+
+def configure_writer(config):
+    """根据应用配置重建写缓冲区，保留尚未写入的采样"""
+    global _writer # pylint: disable=global-statement
+    pending = list(_writer._queue) # pylint: disable=protected-access
+    _writer = TrafficWriteBuffer.from_config(config)
+    for row in pending:
+        _writer.add(**row)
+    return _writer
+
+
+def get_writer():
+    """获取流量写缓冲区"""
+    return _writer
+
+
+def flush_on_shutdown(app):
+    """进程退出前写入剩余的采样"""
+    with app.app_context():
+        _writer.flush()
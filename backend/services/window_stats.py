@@ -0,0 +1,144 @@
+"""
+滑动窗口统计模块
+以每个采样 O(1) 的代价维护时间窗口内的 count/sum/min/max，
+并用对数分桶直方图估算 p95/p99 等分位数(相对误差约 1%)。
+"""
+import math
+from collections import deque
+
+DEFAULT_WINDOW_SECONDS = 30
+
+# 支持的聚合方式及其在告警消息中的名称
+AGGREGATIONS = {
+    'avg': '平均',
+    'min': '最小',
+    'max': '最大',
+    'p95': 'P95',
+    'p99': 'P99'
+}
+
+# 直方图相对误差
+_RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + _RELATIVE_ACCURACY) / (1 - _RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+
+def _bucket_key(value):
+    """值所在的对数桶编号，非正值统一放入 None 桶"""
+    if value <= 0:
+        return None
+    return math.ceil(math.log(value) / _LOG_GAMMA)
+
+
+def _bucket_value(key):
+    """桶的代表值(桶上下界的调和中点)"""
+    if key is None:
+        return 0.0
+    return 2 * _GAMMA ** key / (_GAMMA + 1)
+
+
+class SlidingWindow:
+    """
+    时间滑动窗口。
+
+    - count/sum: 随采样进出增量维护
+    - min/max: 单调队列，队首即为窗口极值
+    - 分位数: 对数分桶计数，查询代价只与桶数有关，与窗口长度无关
+    """
+
+    def __init__(self, window_seconds=DEFAULT_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._samples = deque()
+        self._min = deque()
+        self._max = deque()
+        self._buckets = {}
+        self._sum = 0.0
+
+    def __len__(self):
+        return len(self._samples)
+
+    @property
+    def last_timestamp(self):
+        """最近一次采样的时间戳"""
+        return self._samples[-1][0] if self._samples else None
+
+    def add(self, timestamp, value):
+        """加入一个采样并移除窗口外的旧采样"""
+        self._samples.append((timestamp, value))
+        self._sum += value
+
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((timestamp, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((timestamp, value))
+
+        key = _bucket_key(value)
+        self._buckets[key] = self._buckets.get(key, 0) + 1
+        self.expire(timestamp)
+
+    def expire(self, now):
+        """移除早于 now - window_seconds 的采样"""
+        cutoff = now - self.window_seconds
+        samples = self._samples
+        while samples and samples[0][0] < cutoff:
+            _, value = samples.popleft()
+            self._sum -= value
+            key = _bucket_key(value)
+            remaining = self._buckets[key] - 1
+            if remaining:
+                self._buckets[key] = remaining
+            else:
+                del self._buckets[key]
+        while self._min and self._min[0][0] < cutoff:
+            self._min.popleft()
+        while self._max and self._max[0][0] < cutoff:
+            self._max.popleft()
+        if not samples:
+            # 窗口清空时重置累加值，避免浮点误差累积
+            self._sum = 0.0
+
+    def avg(self):
+        """窗口平均值"""
+        return self._sum / len(self._samples) if self._samples else None
+
+    def min(self):
+        """窗口最小值"""
+        return self._min[0][1] if self._min else None
+
+    def max(self):
+        """窗口最大值"""
+        return self._max[0][1] if self._max else None
+
+    def percentile(self, q):
+        """
+        估算窗口分位数。
+
+        Args:
+            q (float): 0~1 之间的分位点，例如 0.95
+        """
+        if not self._samples:
+            return None
+        rank = q * (len(self._samples) - 1)
+        seen = self._buckets.get(None, 0)
+        if rank < seen:
+            return 0.0
+        for key in sorted(k for k in self._buckets if k is not None):
+            seen += self._buckets[key]
+            if rank < seen:
+                # 估算值限制在窗口实际的最小/最大值之间
+                return min(max(_bucket_value(key), self.min()), self.max())
+        return self.max()
+
+    def value(self, aggregation):
+        """按聚合方式取窗口统计值"""
+        if aggregation == 'avg':
+            return self.avg()
+        if aggregation == 'min':
+            return self.min()
+        if aggregation == 'max':
+            return self.max()
+        if aggregation in ('p95', 'p99'):
+            return self.percentile(int(aggregation[1:]) / 100)
+        raise ValueError(f"不支持的聚合方式: {aggregation}")
@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# agent.py lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import socketio
+from agent import HeadlessAgent, MetricAggregator, Spool, decode_batch
+
+class FakeClient:
+    def __init__(self):
+        self.connected = True
+        self.received = []
+        self.fail = False
+
+    def call(self, event, data, timeout=None):
+        if self.fail:
+            raise socketio.exceptions.TimeoutError()
+        self.received.append((event, data))
+        return {'ok': True, 'seq': data['seq']}
+
+def counters(sent, recv):
+    return {'eth0': (sent, recv, 1, 1, 0, 0, 0, 0), 'lo': (0, 0, 0, 0, 0, 0, 0, 0)}
+
+class TestAgent(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.client = FakeClient()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_aggregates_window(self):
+        aggregator = MetricAggregator(interfaces=['eth0'])
+        self.assertIsNone(aggregator.drain(0))
+        aggregator.sample(counters(1000, 0), 0)
+        aggregator.sample(counters(1500, 100), 1)
+        aggregator.sample(counters(3500, 100), 2)
+        # 计数器回绕按 0 处理
+        aggregator.sample(counters(100, 200), 3)
+        window = aggregator.drain(3)
+        self.assertEqual((window['start'], window['end'], window['samples']), (0, 3, 3))
+        self.assertEqual(list(window['interfaces']), ['eth0'])
+        eth0 = window['interfaces']['eth0']
+        self.assertEqual((eth0['bytes_sent'], eth0['bytes_recv']), (2500, 200))
+        self.assertEqual((eth0['peak_sent_rate'], eth0['peak_recv_rate']), (2000, 100))
+        self.assertIsNone(aggregator.drain(4))
+
+    def test_spools_while_disconnected_and_replays_in_order(self):
+        spool = Spool(self.tmpdir, max_batches=3)
+        agent = HeadlessAgent(self.client, 7, 'web-1', spool)
+        self.client.connected = False
+        for second in range(6):
+            agent.aggregator.sample(counters(second * 100, 0), second)
+            if second:
+                agent.build_batch(second)
+        self.assertEqual(agent.flush_spool(), 0)
+        self.assertEqual(spool.pending(), [3, 4, 5])
+        self.assertEqual(spool.dropped, 2)
+
+        # 重启后序号继续递增
+        spool = Spool(self.tmpdir, max_batches=3)
+        self.assertEqual(spool.next_seq(), 6)
+
+        self.client.connected = True
+        self.assertEqual(agent.flush_spool(), 3)
+        self.assertEqual([data['seq'] for _, data in self.client.received], [3, 4, 5])
+        batch = decode_batch(self.client.received[-1][1]['payload'])
+        self.assertEqual((batch['host_id'], batch['seq'], batch['spool_dropped']), ('7', 5, 1))
+        self.assertEqual(batch['interfaces']['eth0']['bytes_sent'], 100)
+        self.assertEqual(spool.pending(), [])
+
+    def test_unacknowledged_batch_stays_spooled(self):
+        spool = Spool(self.tmpdir)
+        agent = HeadlessAgent(self.client, 7, 'web-1', spool)
+        agent.aggregator.sample(counters(0, 0), 0)
+        agent.aggregator.sample(counters(10, 0), 1)
+        agent.build_batch(1)
+        self.client.fail = True
+        self.assertEqual(agent.flush_spool(), 0)
+        self.assertEqual(spool.pending(), [1])
+
+if __name__ == '__main__':
+    unittest.main()
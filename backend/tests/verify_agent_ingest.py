@@ -0,0 +1,166 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import zlib
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from extensions import db, socketio
+from models import Traffic
+from routes.client_management import client_bp
+import services.agent_ingest as agent_ingest
+from services.agent_ingest import (
+    AgentIngest, BatchError, TimerWheel, authenticate_agent, decode_batch, ingest_message
+)
+from services.traffic_writer import get_writer
+
+def message(host_id='7', seq=1, start=100.0, end=110.0, sent=10000, **overrides):
+    batch = {
+        'v': 1, 'host_id': host_id, 'host_name': 'web-1', 'seq': seq, 'start': start, 'end': end,
+        'samples': 10, 'interfaces': {'eth0': {'bytes_sent': sent, 'bytes_recv': 500,
+                                               'peak_sent_rate': 4000, 'peak_recv_rate': 80}}
+    }
+    batch.update(overrides)
+    return {'v': 1, 'host_id': host_id, 'seq': seq, 'encoding': 'zlib+json',
+            'payload': zlib.compress(json.dumps(batch).encode())}
+
+class TestAgentIngest(unittest.TestCase):
+    def test_decode_rejects_invalid_batches(self):
+        self.assertEqual(decode_batch(message())['interfaces']['eth0']['bytes_sent'], 10000)
+        invalid = [
+            dict(message(), v=2),
+            dict(message(), seq=2),
+            dict(message(), payload=b'not zlib'),
+            message(end=90.0),
+            message(interfaces={'eth0': {'bytes_sent': -1}}),
+            message(interfaces={'eth0': {'bytes_sent': float('inf')}}),
+        ]
+        for item in invalid:
+            with self.assertRaises(BatchError):
+                decode_batch(item)
+        with self.assertRaises(BatchError):
+            decode_batch(message(padding='x' * 5000), max_bytes=1024)
+
+    def test_sequence_tracking(self):
+        ingest = AgentIngest(stale_after=30)
+        verdict, state, came_up = ingest.accept(decode_batch(message()), now=0)
+        self.assertEqual((verdict, came_up), ('accepted', True))
+        self.assertEqual(state['rates']['eth0']['bytes_sent_sec'], 1000)
+
+        self.assertEqual(ingest.accept(decode_batch(message()), now=1)[0], 'duplicate')
+        state = ingest.accept(decode_batch(message(seq=4, start=110.0, end=120.0)), now=2)[1]
+        self.assertEqual((state['gaps'], state['duplicates'], state['last_seq']), (2, 1, 4))
+        # Agent 丢失序号后从 1 重新开始
+        verdict, state, _ = ingest.accept(decode_batch(message(seq=1, start=500.0, end=510.0)), now=3)
+        self.assertEqual((verdict, state['resets'], state['last_seq']), ('accepted', 1, 1))
+
+    def test_timer_wheel_marks_stale_hosts(self):
+        ingest = AgentIngest(stale_after=30, max_hosts=2)
+        ingest.accept(decode_batch(message(host_id='a')), now=0)
+        ingest.accept(decode_batch(message(host_id='b')), now=0)
+        with self.assertRaises(BatchError):
+            ingest.accept(decode_batch(message(host_id='c')), now=0)
+
+        self.assertEqual(ingest.expire(now=20), [])
+        ingest.accept(decode_batch(message(host_id='a', seq=2, start=110.0, end=120.0)), now=20)
+        self.assertEqual([state['host_id'] for state in ingest.expire(now=31)], ['b'])
+        self.assertEqual(ingest.expire(now=40), [])
+        self.assertEqual([state['host_id'] for state in ingest.expire(now=51)], ['a'])
+
+        # 重新上报后恢复在线
+        _, state, came_up = ingest.accept(decode_batch(message(host_id='b', seq=2, start=110.0, end=120.0)), now=60)
+        self.assertEqual((state['status'], came_up), ('up', True))
+        self.assertEqual(ingest.get_metrics()['up'], 1)
+
+    def test_timer_wheel_keeps_deadlines_beyond_one_revolution(self):
+        wheel = TimerWheel(tick=1, slots=8)
+        wheel.schedule('far', 20)
+        wheel.schedule('near', 3)
+        self.assertEqual(wheel.advance(5), ['near'])
+        self.assertEqual(wheel.advance(12), [])
+        self.assertEqual(wheel.advance(100), ['far'])
+        self.assertEqual(len(wheel), 0)
+
+class TestAgentIngestRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        db.init_app(self.app)
+        self.app.register_blueprint(client_bp, url_prefix='/api/clients')
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.ingest = agent_ingest.configure_ingest(self.app.config)
+        self.emit = patch('services.agent_ingest.socketio').start()
+        patch('services.agent_ingest.publish_worker_event').start()
+        patch('routes.client_management.XMLManager.get_clients',
+              return_value=[{'id': '7', 'name': 'MyMac', 'ip': '10.0.0.7', 'description': ''},
+                            {'id': '8', 'name': 'Idle', 'ip': '10.0.0.8', 'description': ''}]).start()
+
+    def tearDown(self):
+        patch.stopall()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_ingest_persists_and_reports_status(self):
+        self.assertTrue(ingest_message(message())['ok'])
+        self.assertTrue(ingest_message(message())['duplicate'])
+        self.assertTrue(ingest_message(message(host_id='99'))['ok'])
+        self.assertFalse(ingest_message({'v': 1})['ok'])
+        self.assertEqual(self.emit.emit.call_count, 2)
+
+        get_writer().flush()
+        rows = Traffic.query.order_by(Traffic.host_id).all()
+        self.assertEqual([(row.host_id, row.interface, row.bytes_sent) for row in rows],
+                         [('7', 'eth0', 1000), ('99', 'eth0', 1000)])
+
+        body = self.app.test_client().get('/api/clients/status').get_json()
+        self.assertEqual(body['summary'], {'total': 3, 'up': 2, 'down': 0, 'unknown': 1})
+        by_id = {client['host_id']: client for client in body['clients']}
+        self.assertEqual((by_id['7']['name'], by_id['7']['status']), ('MyMac', 'up'))
+        self.assertEqual(by_id['8']['status'], 'unknown')
+        self.assertFalse(by_id['99']['registered'])
+
+    def test_agent_authentication(self):
+        registry = patch('services.agent_ingest.get_registry').start().return_value
+        registry.get_client.side_effect = lambda host_id: {'7': {'id': '7', 'ip': '10.0.0.7'}}.get(host_id)
+        registered = {'AGENT_REQUIRE_REGISTERED': True}
+        self.assertEqual(authenticate_agent({'host_id': '7'}, '10.0.0.7', registered), '7')
+        self.assertIsNone(authenticate_agent({'host_id': '7'}, '10.9.9.9', registered))
+        self.assertIsNone(authenticate_agent({'host_id': '99'}, '10.0.0.7', registered))
+        self.assertIsNone(authenticate_agent({'host_id': '99'}, '10.0.0.7', {}))
+        self.assertEqual(authenticate_agent({'host_id': '99'}, None, {'AGENT_REQUIRE_REGISTERED': False}), '99')
+
+        tokens = {'AGENT_TOKENS': {'99': 's3cret'}}
+        self.assertEqual(authenticate_agent({'host_id': '99', 'agent_token': 's3cret'}, None, tokens), '99')
+        self.assertIsNone(authenticate_agent({'host_id': '99', 'agent_token': 'guess'}, None, tokens))
+        self.assertIsNone(authenticate_agent({'host_id': '7'}, '10.0.0.7', tokens))
+
+    def test_socketio_rejects_unauthenticated_agents(self):
+        import routes.monitoring # pylint: disable=import-outside-toplevel,unused-import
+        patch('routes.monitoring.ensure_monitoring_tasks').start()
+        patch('routes.monitoring.ensure_ingest_task').start()
+        decode = patch('services.agent_ingest.decode_batch', wraps=decode_batch).start()
+        self.app.config['AGENT_TOKENS'] = {'7': 's3cret'}
+        socketio.init_app(self.app, async_mode='threading')
+
+        rejected = socketio.test_client(self.app, auth={'host_id': '7', 'agent_token': 'guess'})
+        self.assertFalse(rejected.is_connected())
+        anonymous = socketio.test_client(self.app)
+        self.assertEqual(anonymous.emit('agent_metrics', message(), callback=True),
+                         {'ok': False, 'error': '未认证的 Agent 连接'})
+        self.assertEqual(decode.call_count, 0)
+
+        agent = socketio.test_client(self.app, auth={'host_id': '7', 'agent_token': 's3cret'})
+        self.assertFalse(agent.emit('agent_metrics', message(host_id='8'), callback=True)['ok'])
+        self.assertTrue(agent.emit('agent_metrics', message(), callback=True)['ok'])
+        agent.disconnect()
+        anonymous.disconnect()
+
+if __name__ == '__main__':
+    unittest.main()
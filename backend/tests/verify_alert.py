@@ -9,16 +9,18 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from services.traffic_monitor import check_and_notify_thresholds, _rate_history
 from services.alert_manager import AlertManager
+from services.threshold_index import ThresholdIndex
+from services.cooldown_store import CooldownStore
 
 class TestAlertLogic(unittest.TestCase):
     def setUp(self):
         # Reset history
         _rate_history.clear()
         
-    @patch('services.traffic_monitor.Threshold')
-    @patch('services.traffic_monitor.ext')
+    @patch('services.traffic_monitor.get_threshold_index')
+    @patch('services.traffic_monitor.get_cooldown_store')
     @patch('services.traffic_monitor.AlertManager')
-    def test_sliding_window_alert(self, MockAlertManager, MockExt, MockThreshold):
+    def test_sliding_window_alert(self, MockAlertManager, MockGetStore, MockGetIndex):
         # Setup Threshold
         mock_threshold = MagicMock()
         mock_threshold.metric = 'bytes_sent_sec'
@@ -27,10 +29,15 @@ class TestAlertLogic(unittest.TestCase):
         mock_threshold.id = 1
         mock_threshold.is_enabled = True
         
-        MockThreshold.query.filter_by.return_value.all.return_value = [mock_threshold]
+        mock_threshold.interface = None
+        mock_threshold.aggregation = 'avg'
+        mock_threshold.window_seconds = None
+        index = ThresholdIndex()
+        index.load([mock_threshold])
+        MockGetIndex.return_value = index
         
-        # Mock Cooldowns
-        MockExt._alert_cooldowns = {}
+        # In-memory cooldowns
+        MockGetStore.return_value = CooldownStore()
         
         # 1. Send data slightly below threshold
         rates = [{'interface': 'eth0', 'bytes_sent_sec': 900, 'bytes_recv_sec': 0}]
@@ -51,6 +58,16 @@ class TestAlertLogic(unittest.TestCase):
         MockAlertManager.send_alert.assert_called_once()
         args = MockAlertManager.send_alert.call_args
         print(f"Alert Triggered: {args}")
+        self.assertEqual(args.kwargs['interface'], 'eth0')
+
+        # 3. Same interface is in cooldown, another interface is not
+        rates = [
+            {'interface': 'eth0', 'bytes_sent_sec': 5000, 'bytes_recv_sec': 0},
+            {'interface': 'eth1', 'bytes_sent_sec': 5000, 'bytes_recv_sec': 0}
+        ]
+        check_and_notify_thresholds(rates)
+        self.assertEqual(MockAlertManager.send_alert.call_count, 2)
+        self.assertEqual(MockAlertManager.send_alert.call_args.kwargs['interface'], 'eth1')
 
 if __name__ == '__main__':
     unittest.main()
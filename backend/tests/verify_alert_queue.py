@@ -0,0 +1,136 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from extensions import db
+from models import Alert
+import services.alert_queue as alert_queue
+from services.alert_queue import AlertQueue, configure_alert_queue
+from services.alert_sinks import AlertSink, DeliveryQueue, SinkDispatcher, WebhookSink
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+class FlakySink(AlertSink):
+    name = 'flaky'
+
+    def __init__(self, failures, levels=None):
+        super().__init__(levels)
+        self.failures = failures
+        self.sent = []
+
+    def send(self, notification):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('unreachable')
+        self.sent.append(notification)
+
+class TestAlertQueue(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.queue = AlertQueue(coalesce_window=600, batch_size=100)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def breach(self, seconds, interface='eth0', level='warning', threshold_id=7):
+        self.queue.put(1, f'{interface} 超过阈值', level, threshold_id, interface,
+                       T0 + timedelta(seconds=seconds))
+
+    def test_coalesces_within_window(self):
+        self.breach(0)
+        self.breach(1, level='error')
+        self.breach(2)
+        self.breach(2, interface='eth1')
+        notifications = self.queue.process()
+        self.assertEqual([(n['interface'], n['count'], n['level']) for n in notifications],
+                         [('eth0', 3, 'error'), ('eth1', 1, 'warning')])
+        self.assertEqual(Alert.query.count(), 2)
+
+        Alert.query.filter_by(interface='eth0').update({'is_read': True})
+        db.session.commit()
+        self.breach(300)
+        self.breach(301)
+        notifications = self.queue.process()
+        self.assertEqual(notifications[0]['count'], 5)
+        alert = Alert.query.filter_by(interface='eth0').one()
+        self.assertEqual((alert.count, alert.level, alert.is_read), (5, 'error', False))
+        self.assertEqual(self.queue.get_metrics()['updated'], 1)
+
+        # 超出合并窗口后新建记录
+        self.breach(700)
+        self.queue.process()
+        self.assertEqual(Alert.query.filter_by(interface='eth0').count(), 2)
+
+    def test_resumes_open_alerts_from_database(self):
+        self.breach(0)
+        self.queue.process()
+        restarted = AlertQueue(coalesce_window=600)
+        restarted.put(1, 'again', 'warning', 7, 'eth0', T0 + timedelta(seconds=60))
+        self.assertEqual(restarted.process()[0]['count'], 2)
+        self.assertEqual(Alert.query.count(), 1)
+
+    def test_failed_batch_is_requeued(self):
+        self.breach(0)
+        self.breach(1)
+        with patch.object(db.session, 'commit', side_effect=RuntimeError('locked')):
+            self.assertEqual(self.queue.process(), [])
+        self.assertEqual(self.queue.backlog(), 2)
+        self.assertEqual(self.queue.process()[0]['count'], 2)
+        self.assertEqual(Alert.query.one().count, 2)
+
+    def test_dispatcher_retries_with_backoff(self):
+        flaky = FlakySink(failures=2)
+        errors_only = FlakySink(failures=0, levels=['error'])
+        dispatcher = SinkDispatcher([flaky, errors_only], max_attempts=3, backoff_initial=1)
+        dispatcher.dispatch({'level': 'warning', 'message': 'm'}, now=0)
+        self.assertEqual(errors_only.sent, [])
+        self.assertEqual(dispatcher.retry_due(now=0.5), 0)
+        self.assertEqual(dispatcher.retry_due(now=1), 1)
+        self.assertEqual(dispatcher.retry_due(now=2.5), 0)
+        self.assertEqual(dispatcher.retry_due(now=3), 1)
+        self.assertEqual(len(flaky.sent), 1)
+        self.assertEqual(dispatcher.pending_retries(), 0)
+
+        dead = FlakySink(failures=10)
+        dispatcher = SinkDispatcher([dead], max_attempts=2, backoff_initial=1)
+        dispatcher.dispatch({'level': 'error', 'message': 'm'}, now=0)
+        dispatcher.retry_due(now=1)
+        self.assertEqual(dispatcher.metrics['dropped'], 1)
+        self.assertEqual(dispatcher.pending_retries(), 0)
+
+    def test_network_sinks_are_delivered_separately(self):
+        configure_alert_queue({'ALERT_SINKS': ['webhook', 'stub'], 'ALERT_WEBHOOK_URL': 'http://hook'})
+        self.assertEqual([sink.name for sink in alert_queue.get_alert_dispatcher().sinks],
+                         ['socketio', 'log', 'stub'])
+        delivery = alert_queue.get_alert_delivery()
+        self.assertIsInstance(delivery.dispatcher.sinks[0], WebhookSink)
+        configure_alert_queue({})
+        self.assertIsNone(alert_queue.get_alert_delivery())
+
+        flaky = FlakySink(failures=1)
+        flaky.blocking = True
+        delivery = DeliveryQueue(SinkDispatcher([flaky], backoff_initial=1), max_backlog=2)
+        for i in range(3):
+            delivery.put({'level': 'warning', 'message': str(i)})
+        self.assertEqual(flaky.sent, [])
+        self.assertEqual(delivery.run_once(now=0), 2)
+        self.assertEqual([n['message'] for n in flaky.sent], ['2'])
+        delivery.run_once(now=1)
+        metrics = delivery.get_metrics()
+        self.assertEqual((metrics['dropped'], metrics['sent'], metrics['backlog']), (1, 2, 0))
+
+if __name__ == '__main__':
+    unittest.main()
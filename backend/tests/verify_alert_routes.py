@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from extensions import db
+from models import Alert
+from routes.alerts import alerts_bp
+from services.alert_counters import get_unread_counter
+
+class TestAlertRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app.config['JWT_SECRET_KEY'] = 'test-secret-key-with-enough-length-32'
+        db.init_app(self.app)
+        JWTManager(self.app)
+        self.app.register_blueprint(alerts_bp, url_prefix='/api/alerts')
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        get_unread_counter().invalidate(1)
+        self.headers = {'Authorization': f"Bearer {create_access_token(identity='1')}"}
+        self.client = self.app.test_client()
+        self.emit = patch('services.alert_counters.socketio').start()
+
+        start = datetime(2026, 1, 1)
+        for i in range(7):
+            db.session.add(Alert(user_id=1, message=f'a{i}', level='error' if i % 2 else 'warning',
+                                 is_read=i < 2, created_at=start + timedelta(minutes=i // 2)))
+        db.session.add(Alert(user_id=2, message='other', level='error', created_at=start))
+        db.session.commit()
+
+    def tearDown(self):
+        patch.stopall()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def get(self, path, **query):
+        return self.client.get(path, query_string=query, headers=self.headers)
+
+    def test_keyset_pages_and_filters(self):
+        seen, cursor = [], None
+        while True:
+            query = {'per_page': 3}
+            if cursor:
+                query['cursor'] = cursor
+            body = self.get('/api/alerts', **query).get_json()
+            seen += [alert['message'] for alert in body['alerts']]
+            cursor = body['next_cursor']
+            if not body['has_next']:
+                break
+        self.assertEqual(seen, ['a6', 'a5', 'a4', 'a3', 'a2', 'a1', 'a0'])
+
+        body = self.get('/api/alerts', level='error', is_read='false').get_json()
+        self.assertEqual([alert['message'] for alert in body['alerts']], ['a5', 'a3'])
+        self.assertEqual(self.get('/api/alerts', level='fatal').status_code, 400)
+        self.assertEqual(self.get('/api/alerts', cursor='!!bad').status_code, 400)
+
+    def test_refired_alert_moves_to_first_page(self):
+        alert = Alert.query.filter_by(message='a0').one()
+        self.assertEqual(alert.last_seen_at, alert.created_at)
+        # 告警队列合并再次触发的告警: 更新 last_seen_at 并重新标记为未读
+        alert.last_seen_at = datetime(2026, 1, 1, 5)
+        alert.is_read = False
+        db.session.commit()
+
+        body = self.get('/api/alerts', per_page=2).get_json()
+        self.assertEqual([a['message'] for a in body['alerts']], ['a0', 'a6'])
+        rest = self.get('/api/alerts', per_page=10, cursor=body['next_cursor']).get_json()
+        self.assertEqual([a['message'] for a in rest['alerts']], ['a5', 'a4', 'a3', 'a2', 'a1'])
+
+    def test_unread_count_and_mark_all_read(self):
+        self.assertEqual(self.get('/api/alerts/unread-count').get_json()['unread_count'], 5)
+
+        response = self.client.post('/api/alerts/mark-all-read', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('5', response.get_json()['msg'])
+        self.emit.emit.assert_called_with('unread_count', {'unread_count': 0}, room='1')
+        self.assertEqual(self.get('/api/alerts/unread-count').get_json()['unread_count'], 0)
+        self.assertFalse(Alert.query.filter_by(user_id=2).one().is_read)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import threading
+import time
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import async_compat
+from services.async_compat import cooperative_yield, is_cooperative, readable_waiter
+
+class TestAsyncCompat(unittest.TestCase):
+    def setUp(self):
+        patch.object(async_compat, 'get_async_mode', return_value='threading').start()
+        self.read_fd, self.write_fd = os.pipe()
+
+    def tearDown(self):
+        patch.stopall()
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+
+    def test_threading_mode_is_not_cooperative(self):
+        self.assertFalse(is_cooperative())
+        self.assertIsNone(cooperative_yield()())
+
+    def test_readable_waiter_times_out(self):
+        wait = readable_waiter(self.read_fd)
+        started = time.monotonic()
+        self.assertFalse(wait(0.05))
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+        self.assertFalse(wait(0))
+
+    def test_readable_waiter_returns_when_readable(self):
+        wait = readable_waiter(self.read_fd)
+        os.write(self.write_fd, b'x')
+        self.assertTrue(wait(1))
+        # 数据未读取前保持可读
+        self.assertTrue(wait(0))
+        os.read(self.read_fd, 1)
+        self.assertFalse(wait(0))
+
+    def test_readable_waiter_wakes_on_write_from_other_thread(self):
+        wait = readable_waiter(self.read_fd)
+        writer = threading.Timer(0.05, os.write, args=(self.write_fd, b'x'))
+        writer.start()
+        started = time.monotonic()
+        self.assertTrue(wait(5))
+        self.assertLess(time.monotonic() - started, 2)
+        writer.join()
+
+        # timeout 为 None 时一直等待到可读
+        os.read(self.read_fd, 1)
+        writer = threading.Timer(0.05, os.write, args=(self.write_fd, b'y'))
+        writer.start()
+        self.assertTrue(wait(None))
+        writer.join()
+
+if __name__ == '__main__':
+    unittest.main()
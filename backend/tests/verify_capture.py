@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import scapy.all as scapy
+from services.capture_backends import parse_headers, format_summary, ETH_P_IP, ETH_P_ARP
+from services.protocol_classifier import classify_frame
+
+class TestHeaderParsing(unittest.TestCase):
+    def test_tcp_over_ipv4(self):
+        frame = bytes(scapy.Ether() / scapy.IP(src='10.0.0.1', dst='10.0.0.2') / scapy.TCP(sport=1234, dport=80))
+        headers = parse_headers(frame)
+
+        self.assertEqual(headers.ethertype, ETH_P_IP)
+        self.assertEqual(headers.ip_proto, 6)
+        self.assertEqual((headers.sport, headers.dport), (1234, 80))
+        self.assertEqual(format_summary(headers), "Ether / IP / TCP 10.0.0.1:1234 > 10.0.0.2:80")
+
+    def test_arp_and_truncated_frames(self):
+        frame = bytes(scapy.Ether() / scapy.ARP(psrc='10.0.0.1', pdst='10.0.0.9'))
+        headers = parse_headers(frame)
+
+        self.assertEqual(headers.ethertype, ETH_P_ARP)
+        self.assertEqual(format_summary(headers), "Ether / ARP 10.0.0.1 > 10.0.0.9")
+        self.assertIsNone(parse_headers(frame[:10]))
+
+    def test_parses_memoryview(self):
+        frame = bytes(scapy.Ether() / scapy.IPv6() / scapy.UDP(sport=5353, dport=53))
+        headers = parse_headers(memoryview(frame))
+
+        self.assertEqual(headers.ip_proto, 17)
+        self.assertEqual(headers.dport, 53)
+
+class TestProtocolClassifier(unittest.TestCase):
+    def test_application_ports(self):
+        cases = [
+            (scapy.IP() / scapy.UDP(sport=40000, dport=53), "DNS"),
+            (scapy.IP() / scapy.TCP(sport=80, dport=40000), "HTTP"),
+            (scapy.IP() / scapy.TCP(sport=40000, dport=443), "TLS"),
+            (scapy.IPv6() / scapy.UDP(sport=40000, dport=443), "QUIC"),
+            (scapy.IP() / scapy.TCP(sport=40000, dport=22), "TCP"),
+            (scapy.IP() / scapy.UDP(sport=40000, dport=9999), "UDP"),
+        ]
+        for layers, expected in cases:
+            self.assertEqual(classify_frame(bytes(scapy.Ether() / layers)), expected)
+
+    def test_icmp_variants_and_non_ip(self):
+        self.assertEqual(classify_frame(bytes(scapy.Ether() / scapy.IP() / scapy.ICMP())), "ICMP")
+        self.assertEqual(classify_frame(bytes(scapy.Ether() / scapy.IPv6() / scapy.ICMPv6EchoRequest())), "ICMPv6")
+        self.assertEqual(classify_frame(bytes(scapy.Ether() / scapy.ARP())), "ARP")
+        self.assertEqual(classify_frame(b'\x00' * 8), "Other")
+
+    def test_vlan_and_ipv6_extension_headers(self):
+        vlan = scapy.Ether() / scapy.Dot1Q(vlan=10) / scapy.Dot1Q(vlan=20) / scapy.IP() / scapy.TCP(dport=80)
+        self.assertEqual(classify_frame(bytes(vlan)), "HTTP")
+
+        ext = scapy.Ether() / scapy.IPv6() / scapy.IPv6ExtHdrHopByHop() / scapy.UDP(dport=53)
+        self.assertEqual(classify_frame(bytes(ext)), "DNS")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import extensions as ext
+from services.capture_supervisor import RESTART_BACKOFF_INITIAL, RESTART_BACKOFF_MAX, CaptureSupervisor
+
+class FakeProcess:
+    def __init__(self, exitcode=None):
+        self.exitcode = exitcode
+        self.pid = 1000
+
+    def is_alive(self):
+        return self.exitcode is None
+
+    def join(self, timeout=None):
+        pass
+
+def aggregate(pid, counts, packets=()):
+    return {'type': 'aggregate', 'iface': 'eth0', 'pid': pid, 'counts': counts,
+            'stats': {'sent': 0}, 'packets': list(packets), 'flows': None}
+
+class TestCaptureSupervisor(unittest.TestCase):
+    def setUp(self):
+        app = SimpleNamespace(config={'CAPTURE_INTERFACES': ['eth0'], 'CAPTURE_SOCKET_PATH': '/tmp/unused.sock'})
+        self.supervisor = CaptureSupervisor(app)
+        ext._protocol_counts.clear()
+        self.spawned = []
+
+        def spawn(label):
+            worker = self.supervisor._workers.setdefault(label, {
+                'process': None, 'started_at': 0, 'restarts': 0,
+                'backoff': RESTART_BACKOFF_INITIAL, 'next_start': 0, 'finished': False
+            })
+            worker['process'] = FakeProcess()
+            self.spawned.append(label)
+        patch.object(self.supervisor, '_spawn', side_effect=spawn).start()
+        patch('builtins.print').start()
+
+    def tearDown(self):
+        patch.stopall()
+        ext._protocol_counts.clear()
+
+    def test_cumulative_counts_are_merged_across_restarts(self):
+        self.supervisor._apply(aggregate(1, {'TCP': 10, 'UDP': 2}, [('eth0-1', 'TCP a > b', b'raw')]))
+        self.supervisor._apply(aggregate(1, {'TCP': 15, 'UDP': 2}))
+        self.assertEqual(dict(ext._protocol_counts), {'TCP': 15, 'UDP': 2})
+        self.assertEqual(self.supervisor.pipeline.emitter.pending(), 1)
+
+        # 重启后的工作进程从零开始累计
+        self.supervisor._apply(aggregate(2, {'TCP': 4, 'DNS': 1}))
+        self.supervisor._apply(aggregate(2, {'TCP': 6, 'DNS': 1}))
+        self.assertEqual(dict(ext._protocol_counts), {'TCP': 21, 'UDP': 2, 'DNS': 1})
+        self.assertEqual(ext._capture_worker_stats['eth0']['pid'], 2)
+
+    def test_restart_backoff(self):
+        self.supervisor._spawn('eth0')
+        worker = self.supervisor._workers['eth0']
+        worker['started_at'] = 0
+        delays = []
+        now = 0
+        for _ in range(7):
+            worker['process'].exitcode = 1
+            self.supervisor.check_workers(now)
+            delays.append(worker['next_start'] - now)
+            self.supervisor.check_workers(worker['next_start'] - 0.1)
+            self.assertIsNone(worker['process'])
+            now = worker['next_start']
+            self.supervisor.check_workers(now)
+            worker['started_at'] = now
+        self.assertEqual(delays, [1, 2, 4, 8, 16, 30, 30])
+        self.assertEqual(worker['restarts'], 7)
+        self.assertEqual(worker['backoff'], RESTART_BACKOFF_MAX)
+
+        # 稳定运行后重置退避时间
+        self.supervisor.check_workers(now + 61)
+        self.assertEqual(worker['backoff'], RESTART_BACKOFF_INITIAL)
+
+        # 正常退出的工作进程不再重启
+        worker['process'].exitcode = 0
+        self.supervisor.check_workers(now + 62)
+        self.supervisor.check_workers(now + 1000)
+        self.assertTrue(worker['finished'])
+        self.assertEqual(len(self.spawned), 8)
+
+if __name__ == '__main__':
+    unittest.main()
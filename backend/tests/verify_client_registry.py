@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.xml_manager import ClientRegistry
+
+SAMPLE = ('<clients><client><id>1</id><name>MyMac</name><ip>10.0.0.1</ip>'
+          '<description>d</description></client></clients>')
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'clients.xml')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(SAMPLE)
+        # 两个实例共享同一文件，模拟两个进程
+        self.first = ClientRegistry(self.path, flush_delay=60)
+        self.second = ClientRegistry(self.path, flush_delay=60)
+
+    def tearDown(self):
+        for registry in (self.first, self.second):
+            if registry._timer is not None:
+                registry._timer.cancel()
+        shutil.rmtree(self.tmpdir)
+
+    def test_loads_once_and_indexes(self):
+        for _ in range(3):
+            self.assertEqual(self.first.get_client(1)['name'], 'MyMac')
+        self.assertEqual(self.first.metrics['loads'], 1)
+        self.assertEqual([c['id'] for c in self.first.find_by_ip('10.0.0.1')], ['1'])
+
+        self.first.update_client(1, {'ip': '10.0.0.2'})
+        self.assertEqual(self.first.find_by_ip('10.0.0.1'), [])
+        self.assertEqual(self.first.find_by_ip('10.0.0.2')[0]['id'], '1')
+
+    def test_coalesces_writes(self):
+        new_ids = self.first.add_clients([{'name': f'agent{i}', 'ip': f'10.1.0.{i}'} for i in range(5)])
+        self.assertEqual(new_ids, ['2', '3', '4', '5', '6'])
+        self.assertEqual(self.first.metrics['writes'], 1)
+
+        for i in range(5):
+            self.first.update_client(new_ids[i], {'description': f'rack {i}'})
+        self.first.delete_client(1)
+        self.assertEqual(self.first.metrics['writes'], 1)
+        self.assertEqual(self.second.get_client(2)['description'], '')
+
+        self.first.flush()
+        self.assertEqual(self.first.metrics['writes'], 2)
+        self.assertEqual(self.second.get_client(6)['description'], 'rack 4')
+        self.assertIsNone(self.second.get_client(1))
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ['clients.xml', 'clients.xml.lock'])
+
+    def test_concurrent_writers_do_not_lose_updates(self):
+        self.first.get_clients()
+        self.first.update_client(1, {'name': 'renamed'})
+        # 另一个进程在此期间新增了客户端
+        added = self.second.add_client({'name': 'agent', 'ip': '10.0.0.9'})
+        self.assertEqual(self.first.add_client({'name': 'next', 'ip': '10.0.0.10'}), '3')
+        self.first.flush()
+
+        reloaded = ClientRegistry(self.path)
+        self.assertEqual([(c['id'], c['name']) for c in reloaded.get_clients()],
+                         [('1', 'renamed'), (added, 'agent'), ('3', 'next')])
+
+    def test_missing_client(self):
+        self.assertFalse(self.first.update_client(42, {'name': 'x'}))
+        self.assertFalse(self.first.delete_client(42))
+        self.assertIsNone(self.first.get_client(42))
+
+    def test_rejects_non_string_fields(self):
+        with self.assertRaises(ValueError):
+            self.first.update_client(1, {'name': 123})
+        with self.assertRaises(ValueError):
+            self.first.add_client({'name': 'x', 'ip': ['10.0.0.1']})
+        self.assertEqual(self.first._journal, [])
+        self.assertEqual(self.first.add_client({'name': 'ok', 'ip': '10.0.0.3'}), '2')
+
+    def test_failed_write_is_quarantined(self):
+        self.first.update_client(1, {'name': 'lost'})
+        with patch.object(self.first, '_write_file', side_effect=OSError('disk full')):
+            with self.assertLogs('utils.xml_manager', level='ERROR'):
+                self.assertFalse(self.first.flush())
+        self.assertEqual(len(self.first.quarantined), 1)
+        # 内存状态回到磁盘上的内容，之后的写入正常
+        self.assertEqual(self.first.get_client(1)['name'], 'MyMac')
+        self.assertEqual(self.first.add_client({'name': 'next', 'ip': '10.0.0.4'}), '2')
+        self.assertEqual(self.second.get_client(2)['name'], 'next')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.cooldown_store import CooldownStore
+
+class TestCooldownStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'cooldowns.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_per_interface_ttl(self):
+        store = CooldownStore(ttl=300)
+        self.assertTrue(store.try_acquire(1, 'eth0', now=0))
+        self.assertFalse(store.try_acquire(1, 'eth0', now=299))
+        self.assertTrue(store.try_acquire(1, 'eth1', now=10))
+        self.assertTrue(store.try_acquire(2, 'eth0', now=10))
+        self.assertTrue(store.try_acquire(1, 'eth0', now=300))
+        self.assertEqual(store.get_metrics()['suppressed'], 1)
+
+    def test_state_survives_restart_and_is_shared(self):
+        first = CooldownStore(self.path, ttl=300)
+        self.assertTrue(first.try_acquire(1, 'eth0', now=1000))
+        first.close()
+
+        restarted = CooldownStore(self.path, ttl=300)
+        other_worker = CooldownStore(self.path, ttl=300)
+        self.assertFalse(restarted.try_acquire(1, 'eth0', now=1100))
+        self.assertTrue(restarted.try_acquire(1, None, now=1100))
+        self.assertFalse(other_worker.try_acquire(1, None, now=1101))
+
+        # 同时到期后只有一个进程能占用新的冷却期
+        self.assertTrue(other_worker.try_acquire(1, 'eth0', now=1300))
+        self.assertFalse(restarted.try_acquire(1, 'eth0', now=1300))
+
+        restarted.clear(1)
+        fresh = CooldownStore(self.path, ttl=300)
+        self.assertTrue(fresh.try_acquire(1, 'eth0', now=1301))
+        for store in (restarted, other_worker, fresh):
+            store.close()
+
+    def test_clear_reaches_other_workers_through_forget(self):
+        editor = CooldownStore(self.path, ttl=300)
+        leader = CooldownStore(self.path, ttl=300)
+        self.assertTrue(leader.try_acquire(1, 'eth0', now=1000))
+
+        # 处理修改请求的进程清除数据库记录，主进程的缓存仍在冷却期
+        editor.clear(1)
+        self.assertFalse(leader.try_acquire(1, 'eth0', now=1001))
+        # threshold_changed 事件到达主进程后丢弃缓存，下一次突破立即告警
+        leader.forget(1)
+        self.assertTrue(leader.try_acquire(1, 'eth0', now=1002))
+
+    def test_cache_is_bounded(self):
+        store = CooldownStore(self.path, ttl=100, max_entries=3)
+        for threshold_id in range(3):
+            store.try_acquire(threshold_id, 'eth0', now=threshold_id)
+        store.try_acquire(10, 'eth0', now=150)
+        self.assertEqual(len(store), 1)
+        for threshold_id in range(20, 25):
+            store.try_acquire(threshold_id, 'eth0', now=160)
+        self.assertEqual(len(store), 3)
+        # 被淘汰的键回到数据库查询，仍在冷却期
+        self.assertFalse(store.try_acquire(10, 'eth0', now=170))
+        store.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.counter_snapshot import CounterSnapshot, rates_to_dicts
+
+def counters(**values):
+    # (bytes_sent, bytes_recv, packets_sent, packets_recv, errin, errout, dropin, dropout)
+    return {name: (value, value * 2, value // 100, value // 50, 0, 0, 0, 0)
+            for name, value in values.items()}
+
+class TestCounterSnapshot(unittest.TestCase):
+    def test_vectorized_rates(self):
+        snapshot = CounterSnapshot(capacity=2)
+        names, rates = snapshot.update(counters(eth0=1000, lo0=5, veth1=0), 10.0)
+        self.assertEqual(names, [])
+
+        names, rates = snapshot.update(counters(eth0=3000, lo0=500, veth1=1000), 12.0)
+        result = {row['interface']: row for row in rates_to_dicts(names, rates)}
+        self.assertEqual(sorted(result), ['eth0', 'veth1'])
+        self.assertEqual(result['eth0']['bytes_sent_sec'], 1000.0)
+        self.assertEqual(result['eth0']['bytes_recv_sec'], 2000.0)
+        self.assertEqual(result['veth1']['packets_sent_sec'], 5.0)
+        self.assertEqual(result['veth1']['dropin_sec'], 0.0)
+
+    def test_interface_churn_and_counter_reset(self):
+        snapshot = CounterSnapshot(capacity=2)
+        snapshot.update(counters(eth0=1000, veth1=1000), 0.0)
+        # veth1 消失、veth2 出现并复用下标，eth0 计数器被重置
+        names, rates = snapshot.update(counters(eth0=10, veth2=5000), 1.0)
+        self.assertEqual(names, ['eth0'])
+        self.assertEqual(rates[0][0], 0.0)
+
+        names, _ = snapshot.update(counters(eth0=20, veth2=6000, veth3=1, veth4=1), 2.0)
+        self.assertEqual(names, ['eth0', 'veth2'])
+        self.assertEqual(snapshot.capacity, 4)
+
+        # 时间未前进时不更新快照
+        self.assertEqual(snapshot.update(counters(eth0=99), 2.0)[0], [])
+        names, rates = snapshot.update(counters(eth0=30, veth2=7000, veth3=1, veth4=1), 3.0)
+        self.assertEqual(rates[names.index('veth2')][0], 1000.0)
+
+if __name__ == '__main__':
+    unittest.main()
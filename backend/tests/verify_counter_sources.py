@@ -0,0 +1,77 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.counter_sources import ProcNetDevCounterSource, SysfsCounterSource
+
+PROC_NET_DEV = (
+    "Inter-|   Receive                                                |  Transmit\n"
+    " face |bytes    packets errs drop fifo frame compressed multicast|"
+    "bytes    packets errs drop fifo colls carrier compressed\n"
+    "    lo: 500 5 0 0 0 0 0 0 500 5 0 0 0 0 0 0\n"
+    "  eth0: 1000 10 1 2 0 0 0 0 2000 20 3 4 0 0 0 0\n"
+)
+
+class TestCounterSources(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_procfs_reuses_descriptor(self):
+        path = os.path.join(self.root, 'dev')
+        with open(path, 'w', encoding='ascii') as f:
+            f.write(PROC_NET_DEV)
+        source = ProcNetDevCounterSource(path, buffer_size=64)
+        counters = source.read()
+        # 与 psutil 相同的字段顺序: 发送字节, 接收字节, 发送包, 接收包, errin, errout, dropin, dropout
+        self.assertEqual(counters['eth0'], (2000, 1000, 20, 10, 1, 3, 2, 4))
+        self.assertEqual(sorted(counters), ['eth0', 'lo'])
+
+        with open(path, 'w', encoding='ascii') as f:
+            f.write(PROC_NET_DEV.replace('2000 20', '2500 25'))
+        self.assertEqual(source.read()['eth0'][:3], (2500, 1000, 25))
+        source.close()
+
+    def add_interface(self, name, base):
+        statistics = os.path.join(self.root, name, 'statistics')
+        os.makedirs(statistics)
+        files = ('tx_bytes', 'rx_bytes', 'tx_packets', 'rx_packets',
+                 'rx_errors', 'tx_errors', 'rx_dropped', 'tx_dropped')
+        for offset, filename in enumerate(files):
+            with open(os.path.join(statistics, filename), 'w', encoding='ascii') as f:
+                f.write(f"{base + offset}\n")
+
+    def test_sysfs_tracks_interface_churn(self):
+        add_interface = self.add_interface
+        add_interface('eth0', 100)
+        source = SysfsCounterSource(self.root)
+        self.assertEqual(source.read(), {'eth0': tuple(range(100, 108))})
+
+        add_interface('veth1', 200)
+        shutil.rmtree(os.path.join(self.root, 'eth0'))
+        self.assertEqual(list(source.read()), ['veth1'])
+        source.close()
+
+    def test_sysfs_bounds_cached_descriptors(self):
+        for i in range(5):
+            self.add_interface(f'veth{i}', i * 100)
+        os.makedirs(os.path.join(self.root, 'bonding_masters'))
+        source = SysfsCounterSource(self.root, max_cached_interfaces=2)
+        with self.assertLogs('services.counter_sources', level='WARNING') as logs:
+            counters = source.read()
+            source.read()
+        self.assertEqual(len(logs.output), 1)
+        self.assertEqual(sorted(counters), [f'veth{i}' for i in range(5)])
+        self.assertEqual(counters['veth3'], tuple(range(300, 308)))
+        self.assertEqual(len(source._fds), 2)
+        source.close()
+
+if __name__ == '__main__':
+    unittest.main()
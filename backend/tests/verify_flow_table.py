@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import scapy.all as scapy
+from services.capture_backends import parse_headers
+from services.flow_table import FlowTable, flow_key
+
+def make_key(sport, dport=80, src='10.0.0.1', dst='10.0.0.2'):
+    frame = bytes(scapy.Ether() / scapy.IP(src=src, dst=dst) / scapy.TCP(sport=sport, dport=dport))
+    return flow_key(parse_headers(frame))
+
+class TestFlowTable(unittest.TestCase):
+    def test_top_talkers(self):
+        table = FlowTable(capacity=64, idle_timeout=60)
+        table.update(make_key(1000), 100, 1.0)
+        table.update(make_key(1000), 1400, 2.0)
+        table.update(make_key(2000), 60, 2.0)
+        table.update(make_key(2000), 60, 3.0)
+        table.update(make_key(2000), 60, 4.0)
+
+        top = table.top(1)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(top[0]['sport'], 1000)
+        self.assertEqual(top[0]['src'], '10.0.0.1')
+        self.assertEqual(top[0]['bytes'], 1500)
+        self.assertEqual((top[0]['first_seen'], top[0]['last_seen']), (1.0, 2.0))
+        self.assertEqual(table.top(1, by='packets')[0]['sport'], 2000)
+
+    def test_idle_expiry(self):
+        table = FlowTable(capacity=64, idle_timeout=10)
+        table.update(make_key(1000), 100, 0.0)
+        table.update(make_key(2000), 100, 15.0)
+
+        self.assertEqual(table.expire(now=20.0), 1)
+        self.assertEqual([flow['sport'] for flow in table.top(10)], [2000])
+
+    def test_capacity_is_hard_limit(self):
+        table = FlowTable(capacity=32, idle_timeout=3600)
+        for port in range(100):
+            table.update(make_key(port), 100, float(port))
+
+        self.assertLessEqual(len(table), 32)
+        self.assertGreater(table.stats['evicted'], 0)
+        # 最新的流一定保留
+        self.assertIn(99, [flow['sport'] for flow in table.top(32)])
+
+    def test_non_ip_has_no_flow(self):
+        self.assertIsNone(flow_key(parse_headers(bytes(scapy.Ether() / scapy.ARP()))))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.hires_sampler import AdaptiveInterval, HiResSampler
+
+class FakeCounters:
+    def __init__(self):
+        self.sent = {'eth0': 0, 'eth1': 0}
+
+    def advance(self, **deltas):
+        for name, delta in deltas.items():
+            self.sent[name] += delta
+
+    def read(self):
+        return {name: (value, value, 0, 0, 0, 0, 0, 0) for name, value in self.sent.items()}
+
+class TestAdaptiveInterval(unittest.TestCase):
+    def test_burst_idle_and_cpu_budget(self):
+        controller = AdaptiveInterval(min_interval=0.1, max_interval=1.0, cpu_budget=0.01,
+                                      idle_bps=1000, burst_zscore=3.0)
+        for _ in range(10):
+            controller.observe(10000, 0.0)
+        self.assertEqual(controller.interval, 1.0)
+
+        # 突发流量立即切换到最小间隔
+        self.assertEqual(controller.observe(500000, 0.0), 0.1)
+        # 空闲时逐步放大
+        self.assertEqual(controller.observe(0, 0.0), 0.2)
+        self.assertEqual(controller.observe(0, 0.0), 0.4)
+
+        # 采样耗时 2ms、预算 1% 时间隔至少 200ms
+        busy = AdaptiveInterval(min_interval=0.1, max_interval=1.0, cpu_budget=0.01)
+        busy.observe(10000, 0.002)
+        self.assertGreaterEqual(busy.observe(10 ** 9, 0.002), 0.2)
+
+class TestHiResSampler(unittest.TestCase):
+    def test_aggregated_frame_and_ring(self):
+        counters = FakeCounters()
+        sampler = HiResSampler(counters.read, AdaptiveInterval(min_interval=0.1), ring_seconds=1)
+        sampler.sample(now=100.0)
+        for step, burst in enumerate((100, 100, 1000, 200)):
+            counters.advance(eth0=burst, eth1=10)
+            sampler.sample(now=100.0 + 0.1 * (step + 1))
+
+        frames = {frame['interface']: frame for frame in sampler.drain()}
+        self.assertEqual(frames['eth0']['samples'], 4)
+        self.assertAlmostEqual(frames['eth0']['bytes_sent_sec'], 3500.0)
+        self.assertAlmostEqual(frames['eth0']['peak_bytes_sent_sec'], 10000.0)
+        self.assertAlmostEqual(frames['eth1']['bytes_recv_sec'], 100.0)
+        self.assertEqual(sampler.drain(), [])
+        self.assertEqual(len(sampler.ring), 4)
+        self.assertEqual(sampler.ring.maxlen, 10)
+
+    def test_reused_slot_does_not_blend_interfaces(self):
+        counters = FakeCounters()
+        sampler = HiResSampler(counters.read, AdaptiveInterval(min_interval=0.1))
+        sampler.sample(now=100.0)
+        counters.advance(eth0=100, eth1=10)
+        sampler.sample(now=100.1)
+        sampler.drain()
+
+        # eth1 在本帧内先有采样，随后消失，其下标被新接口 veth0 复用
+        counters.advance(eth0=100, eth1=5000)
+        sampler.sample(now=100.2)
+        del counters.sent['eth1']
+        counters.sent['veth0'] = 0
+        sampler.sample(now=100.3)
+        for step in range(2):
+            counters.advance(eth0=100, veth0=20)
+            sampler.sample(now=100.4 + 0.1 * step)
+        self.assertEqual(sampler.snapshot.ids.get('veth0'), 1)
+
+        frames = {frame['interface']: frame for frame in sampler.drain()}
+        self.assertNotIn('eth1', frames)
+        self.assertEqual(frames['veth0']['samples'], 2)
+        self.assertAlmostEqual(frames['veth0']['bytes_sent_sec'], 200.0)
+        self.assertAlmostEqual(frames['veth0']['peak_bytes_sent_sec'], 200.0)
+        self.assertEqual(frames['eth0']['samples'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import logging
+import queue
+import tempfile
+import threading
+import time
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.message_queue import (
+    UnixSocketBroker, UnixSocketManager, message_queue_options, on_worker_event
+)
+from services.leader_election import FileLease, LeaderElector, create_lease
+
+class TestUnixSocketMessageQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'broker.sock')
+        self.url = f'unix://{self.path}'
+        self.broker = UnixSocketBroker(self.path).start()
+
+    def tearDown(self):
+        self.broker.stop()
+        self.tmp.cleanup()
+
+    def manager(self, channel='test'):
+        return UnixSocketManager(self.url, channel=channel, write_only=True,
+                                 logger=logging.getLogger('test'))
+
+    def listen(self, manager, expected_clients):
+        received = queue.Queue()
+
+        def run():
+            for message in manager._listen():
+                received.put(message)
+        threading.Thread(target=run, daemon=True).start()
+        deadline = time.time() + 5
+        while len(self.broker._clients) < expected_clients and time.time() < deadline:
+            time.sleep(0.01)
+        return received
+
+    def test_fan_out_between_hosts(self):
+        sender, receiver, other_channel = self.manager(), self.manager(), self.manager('other')
+        received = self.listen(receiver, 1)
+        ignored = self.listen(other_channel, 2)
+
+        sender._publish({'method': 'emit', 'event': 'alert', 'host_id': sender.host_id})
+        message = received.get(timeout=5)
+        self.assertEqual(message['event'], 'alert')
+        self.assertEqual(message['host_id'], sender.host_id)
+        time.sleep(0.1)
+        self.assertTrue(ignored.empty())
+
+    def test_worker_events_are_dispatched_not_yielded(self):
+        events = queue.Queue()
+        on_worker_event('test_event')(events.put)
+        sender, receiver = self.manager(), self.manager()
+        received = self.listen(receiver, 1)
+
+        sender.publish_worker_event('test_event', {'value': 1})
+        sender._publish({'method': 'emit', 'event': 'after', 'host_id': sender.host_id})
+        self.assertEqual(events.get(timeout=5), {'value': 1})
+        self.assertEqual(received.get(timeout=5)['event'], 'after')
+        self.assertTrue(received.empty())
+
+    def test_options_from_config(self):
+        self.assertEqual(message_queue_options({}), {})
+        options = message_queue_options({'SOCKETIO_MESSAGE_QUEUE': self.url})
+        self.assertIsInstance(options['client_manager'], UnixSocketManager)
+        self.assertEqual(options['client_manager'].path, self.path)
+
+
+class FakeLease:
+    def __init__(self):
+        self.available = True
+        self.valid = True
+
+    def acquire(self):
+        return self.available
+
+    def renew(self):
+        return self.valid
+
+    def release(self):
+        pass
+
+
+class TestLeaderElection(unittest.TestCase):
+    def test_file_lease_is_exclusive(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'leader.lock')
+            first, second = FileLease(path), FileLease(path)
+            self.assertTrue(first.acquire())
+            self.assertFalse(second.acquire())
+            self.assertTrue(first.renew())
+            first.release()
+            self.assertTrue(second.acquire())
+            second.release()
+
+    def test_lease_defaults_follow_message_queue(self):
+        self.assertIsInstance(create_lease({'SOCKETIO_MESSAGE_QUEUE': 'unix:///tmp/mq.sock'}), FileLease)
+        with patch('services.leader_election.RedisLease') as redis_lease:
+            create_lease({'SOCKETIO_MESSAGE_QUEUE': 'redis://mq:6379/0', 'SOCKETIO_CHANNEL': 'nm'})
+            redis_lease.assert_called_once_with('redis://mq:6379/0', 'nm:leader', 15)
+        with self.assertRaises(RuntimeError):
+            create_lease({'SOCKETIO_MESSAGE_QUEUE': 'amqp://mq//'})
+        lease = create_lease({'SOCKETIO_MESSAGE_QUEUE': 'amqp://mq//', 'LEADER_LOCK': '/srv/shared/leader.lock'})
+        self.assertEqual(lease.path, '/srv/shared/leader.lock')
+
+    def test_elector_starts_tasks_once_and_reports_loss(self):
+        lease = FakeLease()
+        lease.available = False
+        calls = []
+        elector = LeaderElector(lease, lambda: calls.append('elected'),
+                                on_lost=lambda: calls.append('lost'))
+
+        self.assertFalse(elector.step())
+        lease.available = True
+        self.assertTrue(elector.step())
+        self.assertTrue(elector.step())
+        self.assertEqual(calls, ['elected'])
+
+        lease.valid = False
+        self.assertFalse(elector.step())
+        self.assertEqual(calls, ['elected', 'lost'])
+
+if __name__ == '__main__':
+    unittest.main()
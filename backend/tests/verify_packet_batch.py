@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.packet_sniffer import PacketBatchEmitter
+
+class TestPacketBatchEmitter(unittest.TestCase):
+    @patch('services.packet_sniffer.socketio')
+    def test_flush_emits_one_frame_per_batch(self, MockSocketIO):
+        emitter = PacketBatchEmitter(interval_ms=100, batch_size=3, capacity=10, sample_rate=2)
+        for i in range(5):
+            emitter.offer(lambda i=i: f"pkt{i}", i)
+
+        self.assertEqual(emitter.flush(), 3)
+        MockSocketIO.emit.assert_called_once_with(
+            'new_packets', {'ids': [0, 1, 2], 'summaries': ['pkt0', 'pkt1', 'pkt2']}
+        )
+        self.assertEqual(emitter.flush(), 2)
+        self.assertEqual(emitter.stats['emitted'], 5)
+        self.assertEqual(emitter.stats['frames'], 2)
+
+    def test_overflow_samples_without_summarizing(self):
+        emitter = PacketBatchEmitter(batch_size=2, capacity=4, sample_rate=3)
+        calls = []
+
+        def make_summary(i):
+            calls.append(i)
+            return f"pkt{i}"
+
+        for i in range(10):
+            emitter.offer(lambda i=i: make_summary(i))
+
+        # 4 fill the buffer, then 1 in 3 of the remaining 6 is sampled
+        self.assertEqual(emitter.pending(), 4)
+        self.assertEqual(calls, [0, 1, 2, 3, 6, 9])
+        self.assertEqual(emitter.stats['captured'], 10)
+        self.assertEqual(emitter.stats['sampled'], 2)
+        self.assertEqual(emitter.stats['dropped'], 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import unittest
+import sys
+import os
+import struct
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Listener
+from collections import Counter, defaultdict
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import scapy.all as scapy
+from services.capture_backends import create_backend
+from services.capture_worker import capture_worker_main
+from services.flow_table import FlowTable
+from services.packet_sniffer import PacketBatchEmitter, PacketPipeline
+from services.pcap_replay import PcapReplayBackend, read_pcap, synthetic_frames, write_pcap
+from services.protocol_classifier import classify_frame
+
+class TestPcapReplay(unittest.TestCase):
+    def setUp(self):
+        self.frames = synthetic_frames(500, flows=32, seed=7)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'capture.pcap')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_synthetic_frames_are_reproducible_and_valid(self):
+        self.assertEqual(self.frames, synthetic_frames(500, flows=32, seed=7))
+        counts = Counter(classify_frame(frame) for frame, _ in self.frames)
+        self.assertEqual(set(counts), {'TLS', 'HTTP', 'TCP', 'QUIC', 'DNS', 'UDP', 'ICMP', 'ARP'})
+        # Scapy 能完整解析合成帧
+        packet = scapy.Ether(self.frames[0][0])
+        self.assertEqual(bytes(packet), self.frames[0][0])
+
+    def test_pcap_round_trip(self):
+        for nanosecond in (False, True):
+            write_pcap(self.path, self.frames, nanosecond=nanosecond)
+            frames = read_pcap(self.path)
+            self.assertEqual([frame for frame, _ in frames], [frame for frame, _ in self.frames])
+            self.assertAlmostEqual(frames[-1][1], self.frames[-1][1], places=5)
+
+        # Scapy 写出的文件(微秒时间戳)
+        scapy.wrpcap(self.path, [scapy.Ether(frame) for frame, _ in self.frames[:3]])
+        self.assertEqual([frame for frame, _ in read_pcap(self.path)], [f for f, _ in self.frames[:3]])
+
+        with open(self.path, 'wb') as f:
+            f.write(struct.pack('<IHHiIII', 0x0A0D0D0A, 1, 0, 0, 0, 0, 1))
+        with self.assertRaises(ValueError):
+            read_pcap(self.path)
+
+    def test_replay_through_pipeline(self):
+        expected = Counter(classify_frame(frame) for frame, _ in self.frames)
+        write_pcap(self.path, self.frames)
+        backend = create_backend({'CAPTURE_BACKEND': 'pcap', 'CAPTURE_PCAP_FILE': self.path,
+                                  'CAPTURE_REPLAY_LOOPS': 2})
+        self.assertIsInstance(backend, PcapReplayBackend)
+
+        pipeline = PacketPipeline(PacketBatchEmitter(capacity=50), defaultdict(int))
+        pipeline.run(backend)
+        self.assertEqual(backend.replayed, 1000)
+        self.assertEqual(dict(pipeline.protocol_counts), {k: v * 2 for k, v in expected.items()})
+        self.assertEqual(pipeline.emitter.pending(), 50)
+
+        # Scapy 数据包路径得到相同的分类结果
+        pipeline = PacketPipeline(PacketBatchEmitter(), defaultdict(int), print_interval=10 ** 6)
+        pipeline.run(PcapReplayBackend(frames=self.frames[:100], as_packets=True))
+        self.assertEqual(dict(pipeline.protocol_counts),
+                         dict(Counter(classify_frame(frame) for frame, _ in self.frames[:100])))
+
+    def test_replay_rebases_timestamps_to_wall_clock(self):
+        timestamps = []
+        started = time.time()
+        PcapReplayBackend(frames=self.frames[:10]).run(lambda frame, ts: timestamps.append(ts))
+        self.assertGreaterEqual(timestamps[0], started)
+        self.assertAlmostEqual(timestamps[9] - timestamps[0], self.frames[9][1] - self.frames[0][1])
+
+        # 流表按当前时间淘汰空闲流时，回放的流仍然存活
+        pipeline = PacketPipeline(PacketBatchEmitter(), defaultdict(int), flow_table=FlowTable())
+        pipeline.run(PcapReplayBackend(frames=self.frames))
+        active = len(pipeline.flow_table)
+        pipeline.flow_table.expire()
+        self.assertEqual(len(pipeline.flow_table), active)
+
+        raw = []
+        PcapReplayBackend(frames=self.frames[:1], rebase_time=False).run(lambda frame, ts: raw.append(ts))
+        self.assertEqual(raw, [self.frames[0][1]])
+
+    def test_infinite_replay(self):
+        backend = PcapReplayBackend(frames=self.frames[:10], loops=0)
+        self.assertFalse(backend.finite)
+        seen = []
+
+        def handler(frame, timestamp):
+            seen.append(timestamp)
+            if len(seen) == 35:
+                raise StopIteration
+        with self.assertRaises(StopIteration):
+            backend.run(handler)
+        self.assertEqual(backend.replayed, 30)
+
+    def test_worker_exits_cleanly_after_replay(self):
+        write_pcap(self.path, self.frames)
+        address = os.path.join(self.tmpdir.name, 'capture.sock')
+        config = {'CAPTURE_BACKEND': 'pcap', 'CAPTURE_PCAP_FILE': self.path, 'PACKET_BATCH_INTERVAL_MS': 50}
+        with Listener(address, family='AF_UNIX', authkey=b'key') as listener:
+            worker = threading.Thread(target=capture_worker_main, args=('all', None, address, b'key', config))
+            worker.start()
+            messages = []
+            with listener.accept() as conn:
+                while True:
+                    try:
+                        messages.append(conn.recv())
+                    except EOFError:
+                        break
+            worker.join(timeout=5)
+        self.assertFalse(worker.is_alive())
+        final = messages[-1]
+        self.assertEqual(final['counts'], dict(Counter(classify_frame(frame) for frame, _ in self.frames)))
+        self.assertIsNotNone(final['flows'])
+
+    def test_worker_reports_capture_error_after_final_aggregate(self):
+        address = os.path.join(self.tmpdir.name, 'capture.sock')
+        config = {'CAPTURE_BACKEND': 'pcap', 'CAPTURE_PCAP_FILE': os.path.join(self.tmpdir.name, 'missing.pcap'),
+                  'PACKET_BATCH_INTERVAL_MS': 50}
+        exits = []
+
+        def run_worker():
+            try:
+                capture_worker_main('all', None, address, b'key', config)
+            except SystemExit as e:
+                exits.append(e.code)
+
+        with Listener(address, family='AF_UNIX', authkey=b'key') as listener:
+            worker = threading.Thread(target=run_worker)
+            worker.start()
+            messages = []
+            with listener.accept() as conn:
+                while True:
+                    try:
+                        messages.append(conn.recv())
+                    except EOFError:
+                        break
+            worker.join(timeout=5)
+        self.assertEqual(exits, [1])
+        # 错误消息由发送线程在最后一次聚合结果之后发送，消息流没有交错损坏
+        self.assertEqual(messages[-1]['type'], 'error')
+        self.assertIn('missing.pcap', messages[-1]['error'])
+        self.assertEqual(messages[-2]['type'], 'aggregate')
+        self.assertIsNotNone(messages[-2]['flows'])
+
+if __name__ == '__main__':
+    unittest.main()
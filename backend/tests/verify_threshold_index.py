@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import services.cooldown_store as cooldown_store
+import services.threshold_index as threshold_index
+from services.cooldown_store import CooldownStore
+from services.threshold_index import THRESHOLD_CHANGED_EVENT, ThresholdIndex, notify_threshold_changed
+from services.message_queue import _dispatch_worker_event
+
+def make_threshold(threshold_id, value, metric='bytes_sent_sec', interface=None, is_enabled=True):
+    return SimpleNamespace(id=threshold_id, user_id=1, metric=metric, value=value,
+                           interface=interface, is_enabled=is_enabled)
+
+class TestThresholdIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ThresholdIndex()
+        self.index.load([
+            make_threshold(1, 100),
+            make_threshold(2, 500),
+            make_threshold(3, 300, interface='eth0'),
+            make_threshold(4, 50, metric='bytes_recv_sec'),
+            make_threshold(5, 10, is_enabled=False)
+        ])
+
+    def ids(self, metric, interface, value):
+        return [t.id for t in self.index.breached(metric, interface, value)]
+
+    def test_breached_uses_strict_comparison_and_scope(self):
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.ids('bytes_sent_sec', 'eth0', 100), [])
+        self.assertEqual(self.ids('bytes_sent_sec', 'eth0', 400), [1, 3])
+        self.assertEqual(self.ids('bytes_sent_sec', 'wlan0', 400), [1])
+        self.assertEqual(self.ids('bytes_sent_sec', 'eth0', 1000), [1, 3, 2])
+        self.assertEqual(self.ids('unknown', 'eth0', 1000), [])
+
+    def test_incremental_updates(self):
+        self.index.upsert(make_threshold(6, 200))
+        self.index.upsert(make_threshold(1, 700))
+        self.index.upsert(make_threshold(2, 500, is_enabled=False))
+        self.index.remove(3)
+
+        self.assertEqual(self.ids('bytes_sent_sec', 'eth0', 650), [6])
+        self.assertEqual(self.ids('bytes_sent_sec', 'eth0', 701), [6, 1])
+        self.index.upsert(make_threshold(5, 10))
+        self.assertEqual(self.ids('bytes_sent_sec', None, 20), [5])
+
+class TestThresholdChanges(unittest.TestCase):
+    def setUp(self):
+        self.index = ThresholdIndex()
+        self.index.load([make_threshold(1, 100)])
+        self.store = CooldownStore()
+        patch.object(threshold_index, '_index', self.index).start()
+        patch.object(cooldown_store, '_store', self.store).start()
+        self.publish = patch('services.threshold_index.publish_worker_event').start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_change_is_applied_locally_and_published(self):
+        self.store.try_acquire(1, 'eth0')
+        notify_threshold_changed(1, make_threshold(1, 900))
+        self.assertTrue(self.store.try_acquire(1, 'eth0'))
+        name, change = self.publish.call_args[0]
+        self.assertEqual((name, change['id'], change['entry']['value']), (THRESHOLD_CHANGED_EVENT, 1, 900))
+
+        notify_threshold_changed(1)
+        self.assertEqual(len(self.index), 0)
+        self.assertIsNone(self.publish.call_args[0][1]['entry'])
+
+    def test_remote_change_updates_leader(self):
+        # 处理请求的进程发布的事件经过 JSON 序列化后到达主进程
+        entry = ThresholdIndex.make_entry(make_threshold(7, 200, interface='eth0'))._asdict()
+        self.store.try_acquire(1, 'eth0')
+        _dispatch_worker_event(THRESHOLD_CHANGED_EVENT, json.loads(json.dumps(
+            {'id': 7, 'entry': entry, 'reset_cooldown': False})))
+        self.assertEqual([t.id for t in self.index.breached('bytes_sent_sec', 'eth0', 300)], [1, 7])
+        self.assertFalse(self.store.try_acquire(1, 'eth0'))
+
+        _dispatch_worker_event(THRESHOLD_CHANGED_EVENT, {'id': 1, 'entry': None, 'reset_cooldown': True})
+        self.assertEqual([t.id for t in self.index.breached('bytes_sent_sec', 'eth0', 300)], [7])
+        self.assertTrue(self.store.try_acquire(1, 'eth0'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import csv
+import io
+import json
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from extensions import db
+from models import Traffic
+from routes.history import history_bp
+from services.traffic_export import read_columnar
+
+class TestTrafficExport(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app.config['TRAFFIC_EXPORT_CHUNK_SIZE'] = 4
+        db.init_app(self.app)
+        self.app.register_blueprint(history_bp, url_prefix='/api/history')
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.start = datetime(2026, 1, 1, 12, 0, 0, 250000)
+        for i in range(10):
+            db.session.add(Traffic(
+                interface='eth0' if i % 3 else 'wlan0', bytes_sent=i * 100, bytes_recv=i,
+                created_at=self.start + timedelta(seconds=3 * i)
+            ))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def export(self, **params):
+        response = self.client.get('/api/history/traffic/export', query_string=params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_ndjson(self):
+        lines = self.export().get_data(as_text=True).splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['bytes_recv'] for row in rows], list(range(10)))
+        self.assertEqual(rows[0]['created_at'], '2026-01-01 12:00:00.250000')
+
+    def test_csv_with_filters(self):
+        body = self.export(format='csv', interface='eth0',
+                           start_time='2026-01-01T12:00:10Z').get_data(as_text=True)
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([int(row['bytes_recv']) for row in rows], [4, 5, 7, 8])
+
+    def test_columnar_round_trip(self):
+        columns = read_columnar(self.export(format='columnar').get_data())
+        self.assertEqual(columns['bytes_sent'], [i * 100 for i in range(10)])
+        self.assertEqual(columns['interface'][:4], ['wlan0', 'eth0', 'eth0', 'wlan0'])
+        self.assertEqual(columns['created_at'][1], self.start + timedelta(seconds=3))
+
+    def test_agent_rows_are_separated(self):
+        for i, host in enumerate(('agent-1', 'agent-2', 'agent-1')):
+            db.session.add(Traffic(
+                interface='eth0', bytes_sent=1000 + i, bytes_recv=1000 + i, host_id=host,
+                created_at=self.start + timedelta(seconds=i)
+            ))
+        db.session.commit()
+
+        # 默认只导出本机流量
+        rows = [json.loads(line) for line in self.export().get_data(as_text=True).splitlines()]
+        self.assertEqual([row['bytes_recv'] for row in rows], list(range(10)))
+        self.assertEqual({row['host_id'] for row in rows}, {None})
+
+        rows = [json.loads(line) for line in self.export(host_id='agent-1').get_data(as_text=True).splitlines()]
+        self.assertEqual([(row['host_id'], row['bytes_recv']) for row in rows],
+                         [('agent-1', 1000), ('agent-1', 1002)])
+
+        body = self.export(format='csv', host_id='agent-2').get_data(as_text=True)
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([(row['host_id'], row['interface'], row['bytes_sent']) for row in rows],
+                         [('agent-2', 'eth0', '1001')])
+
+        columns = read_columnar(self.export(format='columnar', host_id='agent-1').get_data())
+        self.assertEqual(columns['host_id'], ['agent-1', 'agent-1'])
+        self.assertEqual(columns['bytes_sent'], [1000, 1002])
+        columns = read_columnar(self.export(format='columnar').get_data())
+        self.assertEqual(columns['host_id'], [None] * 10)
+
+    def test_unknown_format(self):
+        response = self.client.get('/api/history/traffic/export', query_string={'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
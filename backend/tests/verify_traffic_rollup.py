@@ -0,0 +1,146 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from extensions import db
+from models import Traffic, TrafficRollup
+from routes.history import history_bp
+from services.traffic_rollup import run_rollup, choose_resolution
+
+class TestTrafficRollup(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        self.app.config['TRAFFIC_UPDATE_INTERVAL'] = 3
+        db.init_app(self.app)
+        self.app.register_blueprint(history_bp, url_prefix='/api/history')
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def add_samples(self, start, values):
+        for i, (sent, recv) in enumerate(values):
+            db.session.add(Traffic(
+                interface='eth0', bytes_sent=sent, bytes_recv=recv,
+                created_at=start + timedelta(seconds=20 * i)
+            ))
+        db.session.commit()
+
+    def test_incremental_rollup_merges_buckets(self):
+        start = datetime(2026, 1, 1, 12, 0, 0)
+        self.add_samples(start, [(10, 1), (30, 2)])
+        self.assertEqual(run_rollup(), 2)
+        self.assertEqual(run_rollup(), 0)
+
+        # 同一分钟内追加的采样与已有时间桶合并
+        db.session.add(Traffic(interface='eth0', bytes_sent=5, bytes_recv=9,
+                               created_at=start + timedelta(seconds=50)))
+        db.session.commit()
+        self.assertEqual(run_rollup(), 1)
+
+        minute = TrafficRollup.query.filter_by(resolution=60).one().to_dict()
+        self.assertEqual(minute['samples'], 3)
+        self.assertEqual((minute['bytes_sent_min'], minute['bytes_sent_max']), (5, 30))
+        self.assertEqual(minute['bytes_sent_sum'], 45)
+        self.assertEqual(minute['bytes_recv_avg'], 4.0)
+        self.assertEqual(TrafficRollup.query.filter_by(resolution=86400).one().samples, 3)
+
+    def test_choose_resolution(self):
+        end = datetime(2026, 1, 31)
+        self.assertIsNone(choose_resolution(end - timedelta(minutes=10), end, 500, 3))
+        self.assertEqual(choose_resolution(end - timedelta(hours=6), end, 500, 3), 60)
+        self.assertEqual(choose_resolution(end - timedelta(days=30), end, 1000, 3), 3600)
+        self.assertEqual(choose_resolution(end - timedelta(days=30), end, 100, 3), 86400)
+
+    def test_max_points_endpoint(self):
+        start = datetime(2026, 1, 1, 12, 0, 0)
+        self.add_samples(start, [(10, 1)] * 9)
+        run_rollup()
+
+        response = self.app.test_client().get('/api/history/traffic', query_string={
+            'start_time': '2026-01-01T11:00:00Z',
+            'end_time': '2026-01-01T13:00:00Z',
+            'max_points': 200
+        })
+        body = response.get_json()
+        self.assertEqual(body['tier'], '1m')
+        self.assertEqual([p['samples'] for p in body['points']], [3, 3, 3])
+
+    def test_max_points_is_shared_between_interfaces(self):
+        start = datetime(2026, 1, 1, 12, 0, 0)
+        for index in range(4):
+            for i in range(30):
+                db.session.add(Traffic(interface=f'eth{index}', bytes_sent=i, bytes_recv=i,
+                                       created_at=start + timedelta(seconds=3 * i)))
+        db.session.commit()
+        client = self.app.test_client()
+        query = {'start_time': '2026-01-01T12:00:00Z', 'end_time': '2026-01-01T12:01:30Z'}
+
+        # 尚未汇总: 按原始记录统计接口数，4 个接口平分 120 个点，仍可使用原始层级
+        body = client.get('/api/history/traffic', query_string=dict(query, max_points=120)).get_json()
+        self.assertEqual((body['tier'], body['points_per_interface']), ('raw', 30))
+        self.assertEqual(len(body['points']), 120)
+        self.assertFalse(body['truncated'])
+
+        # 单个接口时预算不平分
+        body = client.get('/api/history/traffic',
+                          query_string=dict(query, max_points=40, interface='eth1')).get_json()
+        self.assertEqual((body['tier'], len(body['points'])), ('raw', 30))
+
+        # 汇总后按天汇总的记录统计接口数，每个接口的预算不足以使用原始层级
+        run_rollup()
+        body = client.get('/api/history/traffic', query_string=dict(query, max_points=40)).get_json()
+        self.assertEqual((body['tier'], body['points_per_interface']), ('1m', 10))
+        self.assertEqual(len(body['points']), 8)
+
+        # 预算小于接口数时结果被截断，保留最新的点
+        body = client.get('/api/history/traffic', query_string=dict(query, max_points=3)).get_json()
+        self.assertTrue(body['truncated'])
+        self.assertEqual(len(body['points']), 3)
+        self.assertEqual(body['points'][-1]['interface'], 'eth3')
+
+    def test_keyset_pagination(self):
+        start = datetime(2026, 1, 1, 12, 0, 0)
+        self.add_samples(start, [(i, i) for i in range(5)])
+        # 相同时间戳的记录按 id 区分，不会在翻页时重复或遗漏
+        db.session.add(Traffic(interface='eth1', bytes_sent=99, bytes_recv=99,
+                               created_at=start + timedelta(seconds=80)))
+        db.session.commit()
+
+        client = self.app.test_client()
+        seen, cursor = [], None
+        while True:
+            query = {'per_page': 2, 'include_total': 'true'}
+            if cursor:
+                query['cursor'] = cursor
+            body = client.get('/api/history/traffic', query_string=query).get_json()
+            self.assertEqual(body['total_items'], 6)
+            seen += [item['id'] for item in body['traffic']]
+            cursor = body['next_cursor']
+            if not body['has_next']:
+                break
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+
+        body = client.get('/api/history/traffic', query_string={'interface': 'eth1'}).get_json()
+        self.assertEqual([item['bytes_sent'] for item in body['traffic']], [99])
+        self.assertNotIn('total_items', body)
+
+        response = client.get('/api/history/traffic', query_string={'cursor': '!!bad'})
+        self.assertEqual(response.status_code, 400)
+
+        legacy = client.get('/api/history/traffic', query_string={'page': 1, 'per_page': 4}).get_json()
+        self.assertEqual(legacy['total_items'], 6)
+
+if __name__ == '__main__':
+    unittest.main()
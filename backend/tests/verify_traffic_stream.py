@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.traffic_stream import TrafficStream
+
+def rates(eth0_sent, wlan0_sent=5.0):
+    return [
+        {'interface': 'eth0', 'bytes_sent_sec': eth0_sent, 'bytes_recv_sec': 1.0},
+        {'interface': 'wlan0', 'bytes_sent_sec': wlan0_sent, 'bytes_recv_sec': 1.0}
+    ]
+
+class TestTrafficStream(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.stream = TrafficStream(self.emit, min_interval=1.0, ack_timeout=10, keyframe_every=0)
+
+    def emit(self, event, frame, to, callback, **_kwargs):
+        self.sent.append((event, to, frame, callback))
+
+    def ack_last(self):
+        self.sent[-1][3]()
+
+    def test_subscription_filters_and_deltas(self):
+        self.stream.publish(rates(100.0), now=0)
+        self.stream.subscribe('a', interfaces=['eth0'], metrics=['bytes_sent_sec'], now=0)
+        _, to, frame, _ = self.sent[-1]
+        self.assertEqual(to, 'a')
+        self.assertTrue(frame['keyframe'])
+        self.assertEqual(frame['changes'], {'eth0': {'bytes_sent_sec': 100.0}})
+        self.ack_last()
+
+        # 未订阅的接口变化不产生帧
+        self.stream.publish(rates(100.0, wlan0_sent=9.0), now=2)
+        self.assertEqual(len(self.sent), 1)
+
+        self.stream.publish(rates(250.0), now=3)
+        frame = self.sent[-1][2]
+        self.assertFalse(frame['keyframe'])
+        self.assertEqual(frame['changes'], {'eth0': {'bytes_sent_sec': 250.0}})
+
+    def test_slow_consumer_is_coalesced(self):
+        self.stream.subscribe('slow', now=0)
+        self.stream.publish(rates(1.0), now=1)
+        self.assertEqual(len(self.sent), 1)
+
+        # 未确认期间的多次更新只保留最新状态
+        for i, value in enumerate((2.0, 3.0, 4.0)):
+            self.stream.publish(rates(value), now=2 + i)
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(self.stream.metrics['coalesced'], 1)
+
+        self.stream.ack('slow', self.sent[-1][2]['seq'], now=5)
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(self.sent[-1][2]['changes'], {'eth0': {'bytes_sent_sec': 4.0}})
+
+    def test_ack_timeout_and_removed_interfaces(self):
+        self.stream.subscribe('a', now=0)
+        self.stream.publish(rates(1.0), now=1)
+        self.ack_last()
+        self.stream.publish(rates(2.0)[:1], now=3)
+        self.assertEqual(self.sent[-1][2]['removed'], ['wlan0'])
+
+        # 未确认且超时后重新发送关键帧
+        self.stream.publish(rates(3.0), now=20)
+        frame = self.sent[-1][2]
+        self.assertTrue(frame['keyframe'])
+        self.assertEqual(set(frame['changes']), {'eth0', 'wlan0'})
+        self.assertEqual(self.stream.metrics['ack_timeouts'], 1)
+
+        self.assertTrue(self.stream.unsubscribe('a'))
+        self.assertEqual(len(self.stream), 0)
+
+if __name__ == '__main__':
+    unittest.main()
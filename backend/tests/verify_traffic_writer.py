@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from extensions import db
+from models import Traffic
+from services.traffic_writer import TrafficWriteBuffer
+
+class TestTrafficWriteBuffer(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_size_trigger_and_bulk_insert(self):
+        writer = TrafficWriteBuffer(batch_size=3, flush_interval=3600)
+        writer.add('eth0', 10.6, 20)
+        writer.add('eth1', 11, 21)
+        self.assertFalse(writer.should_flush())
+        writer.add('eth0', 12, 22)
+        self.assertTrue(writer.should_flush())
+
+        self.assertEqual(writer.flush(), 3)
+        self.assertEqual(Traffic.query.count(), 3)
+        self.assertEqual(writer.backlog(), 0)
+        self.assertEqual(writer.get_metrics()['written'], 3)
+        self.assertEqual(Traffic.query.filter_by(interface='eth0').first().bytes_sent, 10)
+
+    def test_bounded_backlog_drops_oldest(self):
+        writer = TrafficWriteBuffer(batch_size=2, max_backlog=4)
+        for i in range(6):
+            writer.add('eth0', i, i)
+
+        self.assertEqual(writer.backlog(), 4)
+        self.assertEqual(writer.metrics['dropped'], 2)
+        writer.flush()
+        self.assertEqual(sorted(t.bytes_sent for t in Traffic.query.all()), [2, 3, 4, 5])
+
+    def test_failed_flush_requeues(self):
+        writer = TrafficWriteBuffer(batch_size=10)
+        writer.add('eth0', 1, 1)
+        with patch.object(db.session, 'commit', side_effect=RuntimeError('database is locked')):
+            self.assertEqual(writer.flush(), 0)
+
+        self.assertEqual(writer.backlog(), 1)
+        self.assertEqual(writer.metrics['failed_flushes'], 1)
+        self.assertEqual(writer.flush(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import random
+import sys
+import os
+from types import SimpleNamespace
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.window_stats import SlidingWindow
+from services.threshold_index import ThresholdIndex
+
+class TestSlidingWindow(unittest.TestCase):
+    def test_running_aggregates_match_exact(self):
+        window = SlidingWindow(window_seconds=10)
+        rng = random.Random(7)
+        samples = []
+        for ts in range(200):
+            value = rng.randint(0, 10000)
+            window.add(ts, value)
+            samples.append((ts, value))
+            current = [v for t, v in samples if t >= ts - 10]
+            self.assertEqual(len(window), len(current))
+            self.assertAlmostEqual(window.avg(), sum(current) / len(current))
+            self.assertEqual(window.min(), min(current))
+            self.assertEqual(window.max(), max(current))
+
+    def test_percentile_relative_error(self):
+        window = SlidingWindow(window_seconds=10000)
+        rng = random.Random(3)
+        values = [rng.lognormvariate(10, 1.5) for _ in range(5000)]
+        for ts, value in enumerate(values):
+            window.add(ts, value)
+        ordered = sorted(values)
+        for q in (0.5, 0.95, 0.99):
+            exact = ordered[int(q * (len(ordered) - 1))]
+            self.assertLess(abs(window.percentile(q) - exact) / exact, 0.02)
+
+    def test_empty_window(self):
+        window = SlidingWindow(window_seconds=5)
+        window.add(0, 100)
+        window.expire(10)
+        self.assertIsNone(window.value('avg'))
+        self.assertIsNone(window.value('p95'))
+
+    def test_index_groups_by_window_spec(self):
+        index = ThresholdIndex()
+        index.load([
+            SimpleNamespace(id=1, user_id=1, metric='bytes_sent_sec', value=100, interface=None,
+                            aggregation='max', window_seconds=60, is_enabled=True),
+            SimpleNamespace(id=2, user_id=1, metric='bytes_sent_sec', value=100, interface=None,
+                            aggregation=None, window_seconds=None, is_enabled=True)
+        ])
+        self.assertEqual(list(index.specs('bytes_sent_sec')), [('avg', 30), ('max', 60)])
+        self.assertEqual([t.id for t in index.breached('bytes_sent_sec', 'eth0', 150, 'max', 60)], [1])
+        self.assertEqual([t.id for t in index.breached('bytes_sent_sec', 'eth0', 150)], [2])
+
+if __name__ == '__main__':
+    unittest.main()
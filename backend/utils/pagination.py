@@ -0,0 +1,51 @@
+"""
+游标分页工具
+按 (时间列, id) 降序的游标(keyset)分页，供历史流量(created_at)和告警列表(last_seen_at)共用。
+"""
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(item, column='created_at'):
+    """将最后一条记录的 (时间列, id) 编码为不透明游标"""
+    raw = f"{getattr(item, column).strftime('%Y-%m-%dT%H:%M:%S.%f')}|{item.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """解析游标，格式无效时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, item_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("游标格式无效") from e
+
+def paginate_by_cursor(query, model, cursor, per_page, column='created_at'):
+    """
+    取游标之后的一页记录。
+    无论翻到多深都只扫描 per_page + 1 行，不需要 COUNT(*) 和 OFFSET。
+
+    Args:
+        query: 已应用过滤条件的查询
+        model: 含时间列和 id 列的模型
+        cursor (str | None): 上一页返回的 next_cursor
+        per_page (int): 每页数量
+        column (str): 排序的时间列(不能为空)
+
+    Returns:
+        tuple: (items, has_next, next_cursor)，游标无效时抛出 ValueError
+    """
+    sort_column = getattr(model, column)
+    if cursor:
+        cursor_time, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            sort_column < cursor_time,
+            and_(sort_column == cursor_time, model.id < cursor_id)
+        ))
+
+    items = query.order_by(sort_column.desc(), model.id.desc()).limit(per_page + 1).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    return items, has_next, encode_cursor(items[-1], column) if has_next else None
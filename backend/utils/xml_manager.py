@@ -1,74 +1,333 @@
-import xml.etree.ElementTree as ET
+"""
+客户端注册表模块
+clients.xml 只在首次访问或文件被其他进程修改(mtime/大小/inode 变化)时解析一次，
+之后的查询走内存中按 ID 和 IP 建立的索引。
+
+写入方式:
+- 修改先进入内存和待写日志，flush_delay 秒内的多次修改合并为一次写入
+- 写入时持有 clients.xml.lock 的排他文件锁；如果文件已被其他进程修改，
+  先重新加载再重放本进程的待写日志，避免覆盖对方的修改
+- 先写临时文件并 fsync，再原子地 rename 到 clients.xml，读者不会看到半个文件
+- 新增客户端需要分配跨进程唯一的 ID，在文件锁内分配并立即写入
+- 字段值必须是字符串，在进入内存和待写日志之前校验；写入失败时待写日志被隔离到
+  quarantined 并记录日志，内存状态从磁盘重新加载，后续写入不受影响
+"""
+import atexit
+import fcntl
+import logging
 import os
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
 
 XML_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clients.xml')
+CLIENT_FIELDS = ('name', 'ip', 'description')
+
+logger = logging.getLogger(__name__)
+
+
+def clean_fields(data, partial=False):
+    """
+    校验客户端字段。
+
+    Args:
+        data (dict): 请求数据
+        partial (bool): 为 True 时只返回 data 中出现且不为 None 的字段(更新)，
+            否则缺失的字段补为空字符串(新增)
+
+    Returns:
+        dict: 字段名 -> 字符串值
+
+    Raises:
+        ValueError: 字段值不是字符串
+    """
+    if not isinstance(data, dict):
+        raise ValueError("客户端数据必须是对象")
+    fields = {}
+    for field in CLIENT_FIELDS:
+        value = data.get(field)
+        if value is None:
+            if not partial:
+                fields[field] = ''
+            continue
+        if not isinstance(value, str):
+            raise ValueError(f"字段 {field} 必须是字符串")
+        fields[field] = value
+    return fields
+
+
+class ClientRegistry:
+    """以 clients.xml 为存储、带内存索引的客户端注册表"""
+
+    def __init__(self, path, flush_delay=0.5):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._clients = {}
+        self._by_ip = {}
+        self._next_id = 1
+        self._journal = []
+        self._signature = None
+        self._lock = threading.RLock()
+        self._timer = None
+        self.quarantined = []
+        self.metrics = {'loads': 0, 'writes': 0, 'coalesced': 0, 'failed_writes': 0}
+
+    # ---------------------------------------------------------------- 查询
+
+    def get_clients(self):
+        """全部客户端(按 ID 排序)"""
+        with self._lock:
+            self._ensure_fresh()
+            return [dict(client) for _, client in sorted(self._clients.items(),
+                                                         key=lambda item: int(item[0]))]
+
+    def get_client(self, client_id):
+        """按 ID 查询，不存在时返回 None"""
+        with self._lock:
+            self._ensure_fresh()
+            client = self._clients.get(str(client_id))
+            return dict(client) if client else None
+
+    def find_by_ip(self, ip):
+        """按 IP 查询，返回该 IP 下的全部客户端"""
+        with self._lock:
+            self._ensure_fresh()
+            return [dict(self._clients[client_id])
+                    for client_id in sorted(self._by_ip.get(ip, ()), key=int)]
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_fresh()
+            return len(self._clients)
+
+    # ---------------------------------------------------------------- 修改
+
+    def add_client(self, data):
+        """新增客户端，返回新 ID(字符串)"""
+        return self.add_clients([data])[0]
+
+    def add_clients(self, items):
+        """
+        批量新增客户端，只写一次文件。
+
+        Raises:
+            ValueError: 字段值不是字符串(此时不做任何修改)
+            OSError: 写入失败(本次及尚未写入的修改被隔离)
+        """
+        cleaned = [clean_fields(data) for data in items]
+        with self._lock, self._file_lock():
+            self._ensure_fresh()
+            ids = []
+            for fields in cleaned:
+                client = {'id': str(self._next_id), **fields}
+                self._apply(('upsert', client))
+                ids.append(client['id'])
+            self._write_locked()
+            return ids
+
+    def update_client(self, client_id, data):
+        """
+        更新客户端，不存在时返回 False；写入会与其他修改合并。
+
+        Raises:
+            ValueError: 字段值不是字符串(此时不做任何修改)
+        """
+        changes = clean_fields(data, partial=True)
+        with self._lock:
+            self._ensure_fresh()
+            client = self._clients.get(str(client_id))
+            if client is None:
+                return False
+            self._apply(('update', str(client_id), changes))
+            self._schedule_flush()
+            return True
+
+    def delete_client(self, client_id):
+        """删除客户端，不存在时返回 False；写入会与其他修改合并"""
+        with self._lock:
+            self._ensure_fresh()
+            if str(client_id) not in self._clients:
+                return False
+            self._apply(('delete', str(client_id)))
+            self._schedule_flush()
+            return True
+
+    def flush(self):
+        """
+        立即写入所有待写修改。
+
+        写入失败时只记录日志(失败的修改已被隔离)，返回 False，
+        这样定时器线程和 atexit 中的调用不会抛出异常。
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._journal:
+                return True
+            try:
+                with self._file_lock():
+                    self._ensure_fresh()
+                    self._write_locked()
+            except Exception: # pylint: disable=broad-exception-caught
+                return False
+            return True
+
+    # ---------------------------------------------------------------- 内部实现
+
+    def _apply(self, operation, record=True):
+        kind = operation[0]
+        if kind == 'upsert':
+            client = dict(operation[1])
+            self._unindex(client['id'])
+            self._clients[client['id']] = client
+            self._by_ip.setdefault(client['ip'], set()).add(client['id'])
+            self._next_id = max(self._next_id, int(client['id']) + 1)
+        elif kind == 'update':
+            client = self._clients.get(operation[1])
+            if client is None:
+                # 已被其他进程删除
+                return
+            self._unindex(client['id'])
+            client.update(operation[2])
+            self._by_ip.setdefault(client['ip'], set()).add(client['id'])
+        elif kind == 'delete':
+            self._unindex(operation[1])
+            self._clients.pop(operation[1], None)
+        if record:
+            self._journal.append(operation)
+
+    def _unindex(self, client_id):
+        client = self._clients.get(client_id)
+        if client is None:
+            return
+        ids = self._by_ip.get(client['ip'])
+        if ids is not None:
+            ids.discard(client_id)
+            if not ids:
+                del self._by_ip[client['ip']]
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _ensure_fresh(self):
+        """文件被其他进程修改过时重新加载，并重放本进程尚未写入的修改"""
+        signature = self._stat_signature()
+        if self._signature is not None and signature == self._signature:
+            return
+        self._clients, self._by_ip, self._next_id = {}, {}, 1
+        if signature is not None:
+            for elem in ET.parse(self.path).getroot().findall('client'):
+                client = {'id': (elem.findtext('id') or '').strip()}
+                if not client['id'].isdigit():
+                    continue
+                client.update({field: elem.findtext(field) or '' for field in CLIENT_FIELDS})
+                self._apply(('upsert', client), record=False)
+        for operation in self._journal:
+            self._apply(operation, record=False)
+        self._signature = signature if signature is not None else ()
+        self.metrics['loads'] += 1
+
+    def _write_locked(self):
+        try:
+            self._write_file()
+        except Exception as e:
+            self._quarantine(e)
+            raise
+        self.metrics['coalesced'] += max(len(self._journal) - 1, 0)
+        self.metrics['writes'] += 1
+        self._journal = []
+        self._signature = self._stat_signature()
+
+    def _quarantine(self, error):
+        """
+        写入失败: 把待写日志移入 quarantined 并从磁盘重新加载，
+        否则同一条无法写入的修改会让之后的每次写入都失败，内存也会与磁盘不一致。
+        """
+        logger.error("写入 %s 失败，隔离 %d 条待写修改: %s", self.path, len(self._journal), error)
+        self.quarantined.extend(self._journal)
+        self.metrics['failed_writes'] += 1
+        self._journal = []
+        self._signature = None
+        self._ensure_fresh()
+
+    def _write_file(self):
+        root = ET.Element('clients')
+        for client_id in sorted(self._clients, key=int):
+            client = self._clients[client_id]
+            elem = ET.SubElement(root, 'client')
+            ET.SubElement(elem, 'id').text = client_id
+            for field in CLIENT_FIELDS:
+                ET.SubElement(elem, field).text = client[field]
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.clients-', suffix='.xml', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                ET.ElementTree(root).write(tmp, encoding='utf-8', xml_declaration=True)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _schedule_flush(self):
+        if self.flush_delay <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.path + '.lock', 'a', encoding='utf-8') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_registry = ClientRegistry(XML_FILE)
+atexit.register(_registry.flush)
+
+
+def get_registry():
+    """获取客户端注册表"""
+    return _registry
+
 
 class XMLManager:
-    @staticmethod
-    def _get_root():
-        if not os.path.exists(XML_FILE):
-             root = ET.Element("clients")
-             tree = ET.ElementTree(root)
-             tree.write(XML_FILE)
-        tree = ET.parse(XML_FILE)
-        return tree, tree.getroot()
+    """客户端注册表的静态接口(兼容原有调用方式)"""
 
     @staticmethod
     def get_clients():
-        _, root = XMLManager._get_root()
-        clients = []
-        for client in root.findall('client'):
-            clients.append({
-                'id': client.find('id').text,
-                'name': client.find('name').text,
-                'ip': client.find('ip').text,
-                'description': client.find('description').text
-            })
-        return clients
+        return _registry.get_clients()
+
+    @staticmethod
+    def get_client(client_id):
+        return _registry.get_client(client_id)
+
+    @staticmethod
+    def find_by_ip(ip):
+        return _registry.find_by_ip(ip)
 
     @staticmethod
     def add_client(data):
-        tree, root = XMLManager._get_root()
-        
-        # Simple ID generation (max id + 1)
-        current_max_id = 0
-        for client in root.findall('client'):
-            try:
-                cid = int(client.find('id').text)
-                if cid > current_max_id:
-                    current_max_id = cid
-            except:
-                pass
-        
-        new_id = str(current_max_id + 1)
-        
-        client_elem = ET.SubElement(root, 'client')
-        ET.SubElement(client_elem, 'id').text = new_id
-        ET.SubElement(client_elem, 'name').text = data.get('name', '')
-        ET.SubElement(client_elem, 'ip').text = data.get('ip', '')
-        ET.SubElement(client_elem, 'description').text = data.get('description', '')
-        
-        tree.write(XML_FILE)
-        return new_id
+        return _registry.add_client(data)
 
     @staticmethod
     def update_client(client_id, data):
-        tree, root = XMLManager._get_root()
-        for client in root.findall('client'):
-            if client.find('id').text == str(client_id):
-                client.find('name').text = data.get('name', client.find('name').text)
-                client.find('ip').text = data.get('ip', client.find('ip').text)
-                client.find('description').text = data.get('description', client.find('description').text)
-                tree.write(XML_FILE)
-                return True
-        return False
+        return _registry.update_client(client_id, data)
 
     @staticmethod
     def delete_client(client_id):
-        tree, root = XMLManager._get_root()
-        for client in root.findall('client'):
-            if client.find('id').text == str(client_id):
-                root.remove(client)
-                tree.write(XML_FILE)
-                return True
-        return False
+        return _registry.delete_client(client_id)
@@ -1,16 +1,32 @@
 // frontend/src/components/AlertHistory.tsx
 import { List, Button, message, Space, Card, Tag, Popconfirm } from 'antd';
-import { getAlerts, markAlertAsRead, markAllAlertsAsRead } from '../services/api';
-import type { Alert } from '../services/api';
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { getAlerts, getUnreadAlertCount, markAlertAsRead, markAllAlertsAsRead } from '../services/api';
+import { useInfiniteQuery, useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { CheckCircleOutlined, BellOutlined } from '@ant-design/icons';
 
+const PAGE_SIZE = 50;
+
 const AlertHistory = () => {
   const queryClient = useQueryClient();
-  const { data: alerts, isLoading, error } = useQuery<Alert[]>({
-    queryKey: ['alerts'],
-    queryFn: getAlerts,
+  const {
+    data,
+    isLoading,
+    error,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
+    queryKey: ['alerts', 'list'],
+    queryFn: ({ pageParam }) => getAlerts({ cursor: pageParam, per_page: PAGE_SIZE }),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+  });
+  const { data: unread } = useQuery({
+    queryKey: ['alerts', 'unread-count'],
+    queryFn: getUnreadAlertCount,
   });
+  const alerts = data?.pages.flatMap((page) => page.alerts) ?? [];
+  const hasUnread = (unread?.unread_count ?? 0) > 0;
 
   const markReadMutation = useMutation({
     mutationFn: (alertId: number) => markAlertAsRead(alertId),
@@ -50,11 +66,11 @@ const AlertHistory = () => {
           onConfirm={() => markAllReadMutation.mutate()}
           okText="是"
           cancelText="否"
-          disabled={!alerts || alerts.filter(a => !a.is_read).length === 0}
+          disabled={!hasUnread}
         >
           <Button
             type="primary"
-            disabled={!alerts || alerts.filter(a => !a.is_read).length === 0}
+            disabled={!hasUnread}
             icon={<CheckCircleOutlined />}
           >
             全部标为已读
@@ -65,6 +81,15 @@ const AlertHistory = () => {
       <List
         itemLayout="horizontal"
         dataSource={alerts}
+        loadMore={
+          hasNextPage ? (
+            <div style={{ textAlign: 'center', marginTop: 12 }}>
+              <Button onClick={() => fetchNextPage()} loading={isFetchingNextPage}>
+                加载更多
+              </Button>
+            </div>
+          ) : null
+        }
         renderItem={(alert) => (
           <List.Item
             actions={[
@@ -90,6 +115,7 @@ const AlertHistory = () => {
               title={
                 <Space>
                   {alert.message}
+                  {alert.count > 1 && <Tag color="orange">×{alert.count}</Tag>}
                   <Tag color={alert.is_read ? 'green' : 'red'}>
                     {alert.is_read ? '已读' : '未读'}
                   </Tag>
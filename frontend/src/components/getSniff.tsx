@@ -19,13 +19,14 @@ export default function GetSniff() {
       return;
     }
 
-    console.log("👂 嗅探: 正在设置 new_packet 监听器");
+    console.log("👂 嗅探: 正在设置 new_packets 监听器");
 
-    const handleNewPacket = (message: { summary: string }) => {
-      console.log("📦 嗅探: 收到新数据包:", message.summary);
+    const handleNewPackets = (message: { summaries: string[] }) => {
+      if (!message.summaries || message.summaries.length === 0) return;
 
       setPacketSummaries((prev_summaries) => {
-        const newPacketSummaries = [message.summary, ...prev_summaries];
+        // 批量帧内按时间先后排列，最新的放在最前面
+        const newPacketSummaries = [...message.summaries].reverse().concat(prev_summaries);
         return newPacketSummaries.slice(0, MAX_PACKETS);
       });
     };
@@ -35,15 +36,15 @@ export default function GetSniff() {
         setError(message.error);
     };
 
-    socket.off("new_packet");
+    socket.off("new_packets");
     socket.off("sniffer_error");
 
-    socket.on("new_packet", handleNewPacket);
+    socket.on("new_packets", handleNewPackets);
     socket.on("sniffer_error", handleSnifferError);
 
     return () => {
       console.log("🧹 嗅探: 清理监听器");
-      socket.off("new_packet", handleNewPacket);
+      socket.off("new_packets", handleNewPackets);
       socket.off("sniffer_error", handleSnifferError);
     };
   }, [socket, isConnected]); // 添加 isConnected 依赖
@@ -1,11 +1,11 @@
 import { Outlet, useNavigate } from "react-router-dom";
 import { Layout, Typography, Button, Badge, Modal, Space } from "antd";
 import { BellOutlined } from '@ant-design/icons';
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import AlertHistory from "../components/AlertHistory";
-import { useQuery } from '@tanstack/react-query';
-import { getAlerts } from '../services/api';
-import type { Alert } from '../services/api';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { getUnreadAlertCount } from '../services/api';
+import { useSocketStore } from '../store/socketStore';
 
 const { Header, Content, Footer } = Layout;
 const { Title } = Typography;
@@ -14,13 +14,22 @@ function DashBoardLayout() {
   const navigate = useNavigate();
   const [isAlertModalVisible, setIsAlertModalVisible] = useState(false);
 
-  const { data: alerts } = useQuery<Alert[]>({
-    queryKey: ['alerts'],
-    queryFn: getAlerts,
-    refetchInterval: 30000, // 每30秒刷新一次告警
+  const queryClient = useQueryClient();
+  const { data: unread } = useQuery({
+    queryKey: ['alerts', 'unread-count'],
+    queryFn: getUnreadAlertCount,
+    refetchInterval: 30000, // Socket 推送之外每30秒校准一次
   });
+  const pushedUnreadCount = useSocketStore((state) => state.unreadAlertCount);
 
-  const unreadAlertCount = alerts?.filter(alert => !alert.is_read).length || 0;
+  // 后端推送的未读数直接写入查询缓存，有新告警时刷新列表
+  useEffect(() => {
+    if (pushedUnreadCount === null) return;
+    queryClient.setQueryData(['alerts', 'unread-count'], { unread_count: pushedUnreadCount });
+    queryClient.invalidateQueries({ queryKey: ['alerts', 'list'] });
+  }, [pushedUnreadCount, queryClient]);
+
+  const unreadAlertCount = unread?.unread_count ?? 0;
 
   const handleLogout = () => {
     localStorage.removeItem("access_token");
@@ -158,10 +158,34 @@ export interface Alert {
   level: string;
   is_read: boolean;
   created_at: string;
+  count: number;
+  interface: string | null;
+  last_seen_at: string;
 }
 
-export const getAlerts = async (): Promise<Alert[]> => {
-  const response = await apiClient.get("/api/alerts");
+export interface AlertPage {
+  alerts: Alert[];
+  per_page: number;
+  has_next: boolean;
+  next_cursor: string | null;
+}
+
+export interface AlertQuery {
+  cursor?: string | null;
+  per_page?: number;
+  level?: string;
+  is_read?: boolean;
+}
+
+export const getAlerts = async (query: AlertQuery = {}): Promise<AlertPage> => {
+  const response = await apiClient.get("/api/alerts", {
+    params: { ...query, cursor: query.cursor || undefined },
+  });
+  return response.data;
+};
+
+export const getUnreadAlertCount = async (): Promise<{ unread_count: number }> => {
+  const response = await apiClient.get("/api/alerts/unread-count");
   return response.data;
 };
 
@@ -11,6 +11,7 @@ interface SocketStore {
   socket: Socket | null;
   isConnected: boolean;
   alert: AlertMessage | null;
+  unreadAlertCount: number | null;
   connect: () => void;
   disconnect: () => void;
   clearAlert: () => void;
@@ -20,6 +21,7 @@ export const useSocketStore = create<SocketStore>((set, get) => ({
   socket: null,
   isConnected: false,
   alert: null,
+  unreadAlertCount: null,
   connect: () => {
     if (get().socket?.connected) {
       console.log("⚠️ Socket 已连接。");
@@ -70,6 +72,11 @@ export const useSocketStore = create<SocketStore>((set, get) => ({
         set({ alert: { ...data, timestamp: Date.now() } });
     });
 
+    // 未读告警数变化时由后端推送
+    socket.on('unread_count', (data: { unread_count: number }) => {
+        set({ unreadAlertCount: data.unread_count });
+    });
+
     set({ socket });
   },
   disconnect: () => {